@@ -0,0 +1,102 @@
+"""
+Parallel execution of the sub-calls of a ``gh_batch`` call.
+
+Each sub-call runs through the same path as a direct tool call, under a
+per-batch concurrency limit on top of the scheduler's global limits. A
+failing call does not fail the others: every call gets its own entry in the
+combined result, in the order the calls were given.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable
+
+
+# Limits for gh_batch
+MAX_BATCH_CALLS = 200
+MAX_BATCH_CONCURRENCY = 32
+DEFAULT_BATCH_CONCURRENCY = 8
+
+ToolRunner = Callable[[str, dict[str, Any]], Awaitable[tuple[bool, str]]]
+
+
+def _concurrency(value: Any) -> int:
+    """
+    Parse a ``concurrency`` argument, clamped to 1..MAX_BATCH_CONCURRENCY.
+
+    Raises
+    ------
+    ValueError
+        If the value is not an integer
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"'concurrency' must be an integer, got {value!r}")
+    try:
+        concurrency = int(value)
+    except ValueError:
+        raise ValueError(f"'concurrency' must be an integer, got {value!r}") from None
+    return max(1, min(concurrency, MAX_BATCH_CONCURRENCY))
+
+
+async def run_calls(arguments: dict[str, Any], run_tool: ToolRunner) -> tuple[bool, str]:
+    """
+    Run the sub-calls of a gh_batch call in parallel.
+
+    Parameters
+    ----------
+    arguments : dict
+        gh_batch arguments with 'calls' and optional 'concurrency'
+    run_tool : Callable
+        Coroutine function running one tool call and returning its success
+        flag and text
+
+    Returns
+    -------
+    tuple
+        Success flag and the combined JSON result with one entry per call
+    """
+    calls = arguments.get("calls") or []
+    if not isinstance(calls, list):
+        return False, "'calls' must be a list of {name, arguments} objects"
+    if len(calls) > MAX_BATCH_CALLS:
+        return False, f"gh_batch accepts at most {MAX_BATCH_CALLS} calls, got {len(calls)}"
+    try:
+        concurrency = _concurrency(arguments.get("concurrency", DEFAULT_BATCH_CONCURRENCY))
+    except ValueError as e:
+        return False, str(e)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int, call: Any) -> dict[str, Any]:
+        entry: dict[str, Any] = {"index": index, "name": None, "ok": False}
+        if not isinstance(call, dict) or not isinstance(call.get("name"), str):
+            entry["error"] = "Each call needs a 'name' and optional 'arguments' object"
+            return entry
+        entry["name"] = call["name"]
+        if call["name"] == "gh_batch":
+            entry["error"] = "gh_batch calls cannot be nested"
+            return entry
+        async with semaphore:
+            try:
+                ok, text = await run_tool(call["name"], call.get("arguments") or {})
+            except KeyError as e:
+                ok, text = False, f"Missing required argument: {e.args[0]}"
+            except Exception as e:
+                ok, text = False, f"{type(e).__name__}: {e}"
+        entry["ok"] = ok
+        if ok:
+            try:
+                entry["result"] = json.loads(text)
+            except ValueError:
+                entry["result"] = text
+        else:
+            entry["error"] = text
+        return entry
+
+    results = await asyncio.gather(*[run_one(i, call) for i, call in enumerate(calls)])
+    succeeded = sum(1 for entry in results if entry["ok"])
+    combined = {
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+    return succeeded == len(results), json.dumps(combined, indent=2)
@@ -0,0 +1,297 @@
+"""
+Coalescing of concurrent pull request and issue view calls into GraphQL batches.
+
+View requests arriving within a short window are sent as one aliased GraphQL
+query, and the result is split back into per-call responses with the same JSON
+shape ``gh pr view --json`` / ``gh issue view --json`` produce.
+
+``gh issue view`` also shows pull requests, which ``repository.issue`` does
+not resolve, so issue views the batch cannot find fall back to gh.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Optional
+
+
+# gh --json field name -> GraphQL selection, per object type
+AUTHOR = "author { login ... on User { id name } }"
+
+COMMON_FIELDS = {
+    "id": "id",
+    "number": "number",
+    "title": "title",
+    "body": "body",
+    "state": "state",
+    "url": "url",
+    "closed": "closed",
+    "closedAt": "closedAt",
+    "createdAt": "createdAt",
+    "updatedAt": "updatedAt",
+    "author": AUTHOR,
+    "labels": "labels(first: 100) { nodes { id name description color } }",
+    "assignees": "assignees(first: 100) { nodes { id login name } }",
+    "milestone": "milestone { number title description dueOn }",
+}
+
+PR_FIELDS = dict(COMMON_FIELDS, **{
+    "isDraft": "isDraft",
+    "mergeable": "mergeable",
+    "merged": "merged",
+    "mergedAt": "mergedAt",
+    "baseRefName": "baseRefName",
+    "headRefName": "headRefName",
+    "additions": "additions",
+    "deletions": "deletions",
+    "changedFiles": "changedFiles",
+})
+
+ISSUE_FIELDS = dict(COMMON_FIELDS)
+
+KINDS = {
+    "pr": ("pullRequest", PR_FIELDS, "PullRequest"),
+    "issue": ("issue", ISSUE_FIELDS, "Issue"),
+}
+
+
+def _export_author(author: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+    """Shape an author node like gh: users carry id/name, apps are flagged as bots."""
+    if author is None:
+        return None
+    if not author.get("id"):
+        return {"is_bot": True, "login": "app/" + author.get("login", "")}
+    return {
+        "id": author["id"],
+        "is_bot": False,
+        "login": author.get("login", ""),
+        "name": author.get("name") or "",
+    }
+
+
+def export_node(node: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    """
+    Convert a GraphQL node into gh's ``--json`` output shape.
+
+    Connections are flattened to lists of nodes, as gh does.
+    """
+    exported = {}
+    for field in fields:
+        value = node.get(field)
+        if field == "author":
+            value = _export_author(value)
+        elif isinstance(value, dict) and "nodes" in value:
+            value = value["nodes"]
+        exported[field] = value
+    return exported
+
+
+def supports(kind: str, fields: list[str]) -> bool:
+    """Return True if every field can be fetched through a batch query."""
+    return kind in KINDS and all(field in KINDS[kind][1] for field in fields)
+
+
+class _Item:
+    __slots__ = ("kind", "owner", "name", "number", "fields", "futures")
+
+    def __init__(self, kind: str, owner: str, name: str, number: int, fields: list[str]):
+        self.kind = kind
+        self.owner = owner
+        self.name = name
+        self.number = number
+        self.fields = fields
+        self.futures: list[asyncio.Future] = []
+
+
+def build_query(items: list[_Item]) -> tuple[str, dict[tuple[int, int], _Item]]:
+    """
+    Build one aliased GraphQL query for a batch of view requests.
+
+    Returns
+    -------
+    tuple
+        The query and a map from ``(repository index, item index)`` alias
+        positions back to the items
+    """
+    repositories: dict[tuple[str, str], list[_Item]] = {}
+    for item in items:
+        repositories.setdefault((item.owner.lower(), item.name.lower()), []).append(item)
+
+    aliases = {}
+    blocks = []
+    for r, ((owner, name), repo_items) in enumerate(repositories.items()):
+        selections = []
+        for i, item in enumerate(repo_items):
+            connection, field_map, _ = KINDS[item.kind]
+            selection = " ".join(field_map[field] for field in item.fields)
+            selections.append(f"i{i}: {connection}(number: {item.number}) {{ {selection} }}")
+            aliases[(r, i)] = item
+        blocks.append(
+            f"r{r}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ "
+            + " ".join(selections) + " }"
+        )
+    return "query { " + " ".join(blocks) + " }", aliases
+
+
+def _error_result(message: str) -> dict[str, Any]:
+    return {"stdout": "", "stderr": message, "returncode": 1, "success": False}
+
+
+class ViewBatcher:
+    """
+    Collect view requests and answer them with batched GraphQL queries.
+
+    Parameters
+    ----------
+    run_query : Callable[[str], Awaitable[dict]]
+        Coroutine function executing a GraphQL query and returning the
+        ``run_gh_command`` result dictionary for it
+    window : float
+        Seconds to wait for more requests after the first one arrives
+    max_batch : int
+        A batch is sent immediately once it holds this many requests
+    """
+
+    def __init__(
+        self,
+        run_query: Callable[[str], Awaitable[dict[str, Any]]],
+        window: float = 0.015,
+        max_batch: int = 50
+    ):
+        self._run_query = run_query
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[tuple, _Item] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    async def view(
+        self,
+        kind: str,
+        repository: str,
+        number: Any,
+        fields: list[str]
+    ) -> Optional[dict[str, Any]]:
+        """
+        Fetch a pull request (``kind="pr"``) or issue as part of a batch.
+
+        Returns
+        -------
+        Optional[dict]
+            Result dictionary in the ``run_gh_command`` format, or None when
+            the request could not be batched and must be run on its own
+        """
+        owner, _, name = repository.partition("/")
+        if not (self.enabled and owner and name and supports(kind, fields)):
+            return None
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            # Branch names and URLs are resolved by gh
+            return None
+
+        key = (kind, owner.lower(), name.lower(), number, tuple(fields))
+        item = self._pending.get(key)
+        if item is None:
+            item = self._pending[key] = _Item(kind, owner, name, number, list(fields))
+        future = asyncio.get_running_loop().create_future()
+        item.futures.append(future)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items = list(self._pending.values())
+        self._pending = {}
+        if not items:
+            return
+        task = asyncio.ensure_future(self._send(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _resolve(item: _Item, result: Optional[dict[str, Any]]) -> None:
+        for future in item.futures:
+            if not future.done():
+                future.set_result(result)
+
+    async def _send(self, items: list[_Item]) -> None:
+        if len(items) == 1:
+            # Nothing to coalesce, let the caller run its normal command
+            self._resolve(items[0], None)
+            return
+
+        query, aliases = build_query(items)
+        try:
+            result = await self._run_query(query)
+            response = json.loads(result["stdout"])
+            data = response.get("data") or {}
+        except Exception:
+            # Unusable batch response, every caller falls back to its own command
+            for item in items:
+                self._resolve(item, None)
+            return
+
+        self.batches += 1
+        self.batched_requests += len(items)
+
+        item_errors: dict[tuple[str, str], str] = {}
+        not_found: set[tuple[str, str]] = set()
+        repo_errors: dict[str, str] = {}
+        for error in response.get("errors") or []:
+            path = error.get("path") or []
+            message = error.get("message", "")
+            if len(path) >= 2:
+                item_errors[(path[0], path[1])] = message
+                if error.get("type") == "NOT_FOUND":
+                    not_found.add((path[0], path[1]))
+            elif len(path) == 1:
+                repo_errors[path[0]] = message
+
+        for (r, i), item in aliases.items():
+            repo_alias, item_alias = f"r{r}", f"i{i}"
+            alias = (repo_alias, item_alias)
+            repo_node = data.get(repo_alias)
+            node = (repo_node or {}).get(item_alias)
+            if node is not None:
+                output = json.dumps(export_node(node, item.fields), sort_keys=True)
+                self._resolve(
+                    item,
+                    {"stdout": output, "stderr": "", "returncode": 0, "success": True}
+                )
+                continue
+            unresolved = alias in not_found or alias not in item_errors
+            if item.kind == "issue" and repo_node is not None and unresolved:
+                # Possibly a pull request number, which gh issue view accepts
+                self._resolve(item, None)
+                continue
+            message = item_errors.get(alias) or repo_errors.get(repo_alias)
+            if not message and repo_node is None:
+                message = (
+                    f"Could not resolve to a Repository with the name '{item.owner}/{item.name}'."
+                )
+            elif not message:
+                message = (
+                    f"Could not resolve to a {KINDS[item.kind][2]} "
+                    f"with the number of {item.number}."
+                )
+            self._resolve(item, _error_result(f"GraphQL: {message}"))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+        }
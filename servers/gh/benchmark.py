@@ -0,0 +1,342 @@
+"""
+Microbenchmarks of the server's own overhead, run against a fake gh.
+
+A stub ``gh`` put first on PATH answers every command with canned JSON of a
+configurable size after a configurable delay, so the suite needs neither
+network access nor an authenticated gh. Metrics, as medians in
+microseconds:
+
+- ``call_tool_overhead_us``: a full ``call_tool`` minus the time spent in
+  the stub process, i.e. what the server adds per call
+- ``build_args_us``: building gh arguments for a set of sample calls
+- ``format_<format>_us``: re-encoding the stub's output in each format
+- ``tool_list_build_us`` and ``list_tools_us``: building the tool
+  definitions, and serializing them as each ``tools/list`` does
+
+``spawn_us`` is reported for reference only. With a stored baseline the run
+fails when a metric is slower than the baseline by more than the tolerance::
+
+    python -m servers.gh.benchmark --save-baseline
+    python -m servers.gh.benchmark
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    from .formatting import FORMATS, format_output
+    from .registry import TOOLS
+except ImportError:  # running as a script: python benchmark.py
+    from formatting import FORMATS, format_output
+    from registry import TOOLS
+
+
+DEFAULT_BASELINE = Path(__file__).with_name("benchmark_baseline.json")
+
+# Metrics reported but not compared against the baseline
+REFERENCE_METRICS = {"spawn_us"}
+
+# Server settings that keep caching, pacing and probes out of the measurement
+SERVER_ENV = {
+    "GH_MCP_BACKEND": "gh",
+    "GH_MCP_CACHE_SIZE": "0",
+    "GH_MCP_ETAG_STORE": "off",
+    "GH_MCP_RATE_LIMIT_RPS": "1000000",
+    "GH_MCP_RATE_LIMIT_BURST": "1000000",
+    "GH_MCP_RATE_LIMIT_PROBE_INTERVAL": "0",
+    "GH_MCP_RETRY_ATTEMPTS": "1",
+}
+
+FAKE_GH = """#!PYTHON
+import json, os, sys, time
+
+args = sys.argv[1:]
+time.sleep(float(os.environ.get("GH_FAKE_DELAY", "0")))
+if args[:1] == ["--version"]:
+    print("gh version 0.0.0 (fake)")
+elif args[:2] == ["auth", "token"]:
+    print("gho_fake")
+elif args[:1] == ["auth"]:
+    pass
+else:
+    items = [
+        {
+            "number": i,
+            "title": f"Item {i}: benchmark payload",
+            "state": "OPEN",
+            "author": {"login": f"user{i % 7}"},
+            "labels": [{"name": "bug"}, {"name": "help wanted"}],
+            "createdAt": "2024-01-01T00:00:00Z",
+            "updatedAt": "2024-06-01T12:00:00Z",
+            "url": f"https://github.com/octo/repo/pull/{i}",
+            "body": "Lorem ipsum dolor sit amet. " * 8,
+        }
+        for i in range(int(os.environ.get("GH_FAKE_SIZE", "100")))
+    ]
+    json.dump(items, sys.stdout)
+"""
+
+# Tool calls whose argument building is measured
+SAMPLE_CALLS = {
+    "gh_pr_list": {"repository": "octo/repo", "state": "open", "limit": 50, "author": "me"},
+    "gh_pr_merge": {"number": 7, "merge_method": "squash", "delete_branch": True},
+    "gh_issue_list": {"repository": "octo/repo", "state": "all", "limit": 100},
+    "gh_repo_list": {"owner": "octo", "visibility": "public"},
+    "gh_search_repos": {"query": "mcp", "language": "python", "stars": ">10"},
+    "gh_gist_create": {"files": "a.py, b.py", "public": True},
+    "gh_api": {"endpoint": "repos/octo/repo/pulls", "method": "GET"},
+}
+
+
+def write_fake_gh(directory: str) -> str:
+    """Write the stub as ``gh`` into ``directory`` and return its path."""
+    path = os.path.join(directory, "gh")
+    with open(path, "w") as f:
+        f.write(FAKE_GH.replace("PYTHON", sys.executable, 1))
+    os.chmod(path, 0o755)
+    return path
+
+
+@contextlib.contextmanager
+def fake_gh(size: int = 100, delay: float = 0.0) -> Iterator[str]:
+    """
+    Put the stub first on PATH for the duration of the block.
+
+    Parameters
+    ----------
+    size : int
+        Number of items in each JSON answer
+    delay : float
+        Seconds the stub sleeps before answering
+
+    Yields
+    ------
+    str
+        Path of the stub
+    """
+    saved = dict(os.environ)
+    with tempfile.TemporaryDirectory(prefix="fake-gh-") as directory:
+        path = write_fake_gh(directory)
+        os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+        os.environ["GH_FAKE_SIZE"] = str(size)
+        os.environ["GH_FAKE_DELAY"] = str(delay)
+        try:
+            yield path
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+
+
+def _median_us(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return 1e6 * statistics.median(samples)
+
+
+def bench_build_args(repeat: int = 200) -> dict[str, float]:
+    """Time building gh arguments for every sample call."""
+    calls = [(TOOLS[name], arguments) for name, arguments in SAMPLE_CALLS.items()]
+
+    def build() -> None:
+        for spec, arguments in calls:
+            spec.build_args(arguments)
+
+    return {"build_args_us": _median_us(build, repeat)}
+
+
+def bench_formatting(output: str, repeat: int = 200) -> dict[str, float]:
+    """Time encoding ``output`` in each output format."""
+    return {
+        f"format_{output_format}_us": _median_us(
+            lambda output_format=output_format: format_output(output, output_format), repeat
+        )
+        for output_format in FORMATS
+    }
+
+
+def _import_server() -> Any:
+    if __package__:
+        from . import server
+    else:  # running as a script: python benchmark.py
+        import server
+    return server
+
+
+def bench_server(calls: int = 50, repeat: int = 200) -> dict[str, float]:
+    """
+    Time tool calls and tool listing through the server module.
+
+    Must run with the stub on PATH; the server is imported here so it picks
+    up ``SERVER_ENV`` and the stub.
+    """
+    os.environ.update(SERVER_ENV)
+    server = _import_server()
+    name, arguments = "gh_pr_list", SAMPLE_CALLS["gh_pr_list"]
+
+    spawned: list[float] = []
+    run_process = server.run_gh_process
+
+    async def timed_run_process(*args: Any, **kwargs: Any) -> dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return await run_process(*args, **kwargs)
+        finally:
+            spawned.append(time.perf_counter() - started)
+
+    async def measure() -> tuple[list[float], list[float]]:
+        # Warm up readiness, credentials and the first spawn
+        await server.call_tool(name, arguments)
+        spawns, overheads = [], []
+        for _ in range(calls):
+            spawned.clear()
+            started = time.perf_counter()
+            await server.call_tool(name, arguments)
+            elapsed = time.perf_counter() - started
+            spawns.append(sum(spawned))
+            overheads.append(elapsed - sum(spawned))
+        return spawns, overheads
+
+    # Time spent in gh itself is subtracted from each call
+    server.run_gh_process = timed_run_process
+    try:
+        spawns, overheads = asyncio.run(measure())
+    finally:
+        server.run_gh_process = run_process
+    tools = server.tool_list()
+    return {
+        "spawn_us": 1e6 * statistics.median(spawns),
+        "call_tool_overhead_us": 1e6 * statistics.median(overheads),
+        "tool_list_build_us": _median_us(
+            lambda: [server.build_tool(spec) for spec in server.TOOL_SPECS],
+            repeat
+        ),
+        "list_tools_us": _median_us(
+            lambda: json.dumps([tool.model_dump(mode="json", exclude_none=True) for tool in tools]),
+            repeat
+        ),
+    }
+
+
+def run_benchmarks(
+    size: int = 100,
+    delay: float = 0.0,
+    calls: int = 50,
+    repeat: int = 200
+) -> dict[str, Any]:
+    """
+    Run the suite against the stub.
+
+    Returns
+    -------
+    dict
+        ``config`` (the stub settings), ``metrics`` and ``skipped`` (a reason
+        if the server benchmarks could not run, e.g. without mcp installed)
+    """
+    report: dict[str, Any] = {
+        "config": {"size": size, "delay": delay},
+        "metrics": {},
+        "skipped": None
+    }
+    with fake_gh(size, delay) as gh:
+        output = subprocess.run(
+            [gh, "pr", "list"], check=True, capture_output=True, text=True
+        ).stdout
+        report["metrics"].update(bench_build_args(repeat))
+        report["metrics"].update(bench_formatting(output, repeat))
+        try:
+            report["metrics"].update(bench_server(calls, repeat))
+        except ImportError as e:
+            report["skipped"] = f"server benchmarks: {e}"
+    report["metrics"] = {name: round(value, 1) for name, value in report["metrics"].items()}
+    return report
+
+
+def compare(
+    metrics: dict[str, float],
+    baseline: dict[str, float],
+    tolerance: float = 0.5,
+    min_delta_us: float = 5.0
+) -> list[str]:
+    """
+    Return a message for every metric that regressed against the baseline.
+
+    A metric regresses when it is more than ``tolerance`` (a fraction) and
+    more than ``min_delta_us`` slower than its baseline value; the absolute
+    floor keeps timer noise on tiny metrics from failing the run.
+    """
+    regressions = []
+    for name, value in sorted(metrics.items()):
+        if name in REFERENCE_METRICS or name not in baseline:
+            continue
+        base = baseline[name]
+        if value > base * (1 + tolerance) and value - base > min_delta_us:
+            regressions.append(f"{name}: {value:.1f}us, baseline {base:.1f}us")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the gh MCP server against a fake gh")
+    parser.add_argument(
+        "--size", type=int, default=100, help="Items in each fake gh answer (default: 100)"
+    )
+    parser.add_argument(
+        "--delay", type=float, default=0.0, help="Seconds the fake gh sleeps (default: 0)"
+    )
+    parser.add_argument("--calls", type=int, default=50, help="Tool calls to time (default: 50)")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=200,
+        help="Repetitions of the in-process benchmarks (default: 200)"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store the results as the new baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="Allowed slowdown as a fraction (default: 0.5)"
+    )
+    options = parser.parse_args(argv)
+
+    report = run_benchmarks(options.size, options.delay, options.calls, options.repeat)
+    print(json.dumps(report, indent=2))
+
+    if options.save_baseline:
+        baseline = {"config": report["config"], "metrics": report["metrics"]}
+        options.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline saved to {options.baseline}", file=sys.stderr)
+        return 0
+    if not options.baseline.exists():
+        print(
+            f"No baseline at {options.baseline}, run with --save-baseline to store one",
+            file=sys.stderr
+        )
+        return 0
+    baseline = json.loads(options.baseline.read_text())
+    if baseline["config"] != report["config"]:
+        print(f"Baseline was recorded with {baseline['config']}, not compared", file=sys.stderr)
+        return 0
+    regressions = compare(report["metrics"], baseline["metrics"], options.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+In-process response cache for read-only gh tools.
+
+Entries are keyed on the tool name plus normalized arguments, expire after a
+TTL and are evicted least-recently-used first. Write tools invalidate the
+entries of the tools they affect, scoped to the repository they touched.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+
+def normalize_arguments(arguments: dict[str, Any]) -> dict[str, Any]:
+    """
+    Normalize tool arguments so equivalent calls share a cache key.
+
+    None values are dropped, integral floats become ints (MCP clients send
+    numbers as either) and the repository is lowercased, since GitHub
+    repository names are case-insensitive.
+    """
+    normalized = {}
+    for key, value in arguments.items():
+        if value is None:
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if key == "repository" and isinstance(value, str):
+            value = value.strip().lower()
+        normalized[key] = value
+    return normalized
+
+
+class _Entry:
+    __slots__ = ("tool", "repository", "expires", "value")
+
+    def __init__(self, tool: str, repository: Optional[str], expires: float, value: Any):
+        self.tool = tool
+        self.repository = repository
+        self.expires = expires
+        self.value = value
+
+
+class ResponseCache:
+    """
+    LRU cache with per-entry TTL.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of cached responses
+    ttl : float
+        Seconds a response stays valid. A TTL of 0 disables the cache.
+    clock : Callable[[], float]
+        Monotonic time source, replaceable for testing
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def key(tool: str, arguments: dict[str, Any]) -> str:
+        """Return the cache key for a tool call."""
+        return json.dumps([tool, normalize_arguments(arguments)], sort_keys=True)
+
+    def get(self, tool: str, arguments: dict[str, Any]) -> Optional[Any]:
+        """Return the cached response for a tool call, or None on a miss."""
+        if not self.enabled:
+            return None
+        key = self.key(tool, arguments)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, tool: str, arguments: dict[str, Any], value: Any) -> None:
+        """Store the response for a tool call."""
+        if not self.enabled:
+            return
+        key = self.key(tool, arguments)
+        repository = normalize_arguments(arguments).get("repository")
+        self._entries[key] = _Entry(tool, repository, self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, tools: Iterable[str], repository: Optional[str] = None) -> int:
+        """
+        Drop cached responses of ``tools``.
+
+        Parameters
+        ----------
+        tools : Iterable[str]
+            Tool names whose responses are affected
+        repository : Optional[str]
+            Only drop responses for this OWNER/REPO. When None the write
+            targeted the current directory's repository, which cannot be
+            resolved here, so the tools are dropped for every repository.
+
+        Returns
+        -------
+        int
+            Number of entries removed
+        """
+        tools = set(tools)
+        repository = repository.strip().lower() if repository else None
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry.tool in tools
+            and (repository is None or entry.repository in (repository, None))
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot of cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
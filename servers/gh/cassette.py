@@ -0,0 +1,222 @@
+"""
+Record gh invocations to a cassette file and replay them.
+
+In record mode every gh invocation is run as usual and written to the
+cassette, one JSON object per line, with its arguments, stdin, stdout,
+stderr, exit code and duration. In replay mode invocations are answered
+from the cassette without running gh, optionally taking the recorded time,
+so the server can be load tested and profiled under recorded traffic on a
+machine without GitHub access or rate-limit budget.
+
+Invocations are matched on their arguments and stdin. An invocation recorded
+several times is answered with its recordings in turn, starting over after
+the last one. The output of ``gh auth token`` is never written.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+Runner = Callable[..., Awaitable[dict[str, Any]]]
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+# Commands whose stdout is a secret and is replaced in the cassette
+REDACTED_COMMANDS = (["auth", "token"],)
+REDACTED = "REDACTED"
+
+
+def _key(args: list[str], input_data: Optional[str]) -> str:
+    return json.dumps([args, input_data])
+
+
+def _redacted(args: list[str]) -> bool:
+    return any(args[:len(command)] == command for command in REDACTED_COMMANDS)
+
+
+class Cassette:
+    """
+    Runner recording gh invocations to, or replaying them from, a file.
+
+    ``run`` has the signature of ``run_process`` and replaces it.
+
+    Parameters
+    ----------
+    path : str or Path
+        Cassette file, JSON lines. Recording appends to it.
+    mode : str
+        RECORD or REPLAY
+    run : Callable
+        Runner executing invocations in record mode, like ``run_process``
+    latency : float
+        In replay mode, the fraction of the recorded duration each answer
+        takes: 0 answers at once, 1 reproduces the recorded latency
+    sleep : Callable
+        Coroutine function used to wait, replaceable in tests
+    """
+
+    def __init__(
+        self,
+        path: Any,
+        mode: str = REPLAY,
+        run: Optional[Runner] = None,
+        latency: float = 0.0,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}, got {mode!r}")
+        if mode == RECORD and run is None:
+            raise ValueError("Recording needs a runner")
+        self.path = Path(path)
+        self.mode = mode
+        self._run = run
+        self.latency = latency
+        self._sleep = sleep
+        self._recordings: Optional[dict[str, list[dict[str, Any]]]] = None
+        self._next: dict[str, int] = defaultdict(int)
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+
+    def _load(self) -> dict[str, list[dict[str, Any]]]:
+        if self._recordings is None:
+            self._recordings = defaultdict(list)
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recordings[_key(entry["args"], entry["stdin"])].append(entry)
+        return self._recordings
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.recorded += 1
+
+    async def run(
+        self,
+        argv: list[str],
+        input_data: Optional[str] = None,
+        timeout: Optional[float] = 60,
+        on_stdout: Optional[Callable[[bytes], None]] = None,
+        on_stderr: Optional[Callable[[bytes], None]] = None,
+        env: Optional[dict[str, str]] = None
+    ) -> dict[str, Any]:
+        """Run or replay ``argv``; arguments as for ``run_process``."""
+        # The executable's path differs between machines
+        args = list(argv[1:])
+        if self.mode == RECORD:
+            return await self._record(argv, args, input_data, timeout, on_stdout, on_stderr, env)
+        return await self._replay(args, input_data, timeout, on_stdout, on_stderr)
+
+    async def _record(
+        self,
+        argv: list[str],
+        args: list[str],
+        input_data: Optional[str],
+        timeout: Optional[float],
+        on_stdout: Optional[Callable[[bytes], None]],
+        on_stderr: Optional[Callable[[bytes], None]],
+        env: Optional[dict[str, str]]
+    ) -> dict[str, Any]:
+        chunks: list[bytes] = []
+
+        def tee(chunk: bytes) -> None:
+            chunks.append(chunk)
+            on_stdout(chunk)
+
+        started = time.perf_counter()
+        result = await self._run(
+            argv,
+            input_data=input_data,
+            timeout=timeout,
+            on_stdout=tee if on_stdout is not None else None,
+            on_stderr=on_stderr,
+            env=env
+        )
+        duration = time.perf_counter() - started
+        if on_stdout is not None:
+            stdout = b"".join(chunks).decode("utf-8", errors="replace")
+        else:
+            stdout = result["stdout"]
+        self._write({
+            "args": args,
+            "stdin": input_data,
+            "stdout": REDACTED if _redacted(args) and stdout else stdout,
+            "stderr": result["stderr"],
+            "returncode": result["returncode"],
+            "duration": round(duration, 6),
+            "recorded_at": time.time(),
+        })
+        return result
+
+    async def _replay(
+        self,
+        args: list[str],
+        input_data: Optional[str],
+        timeout: Optional[float],
+        on_stdout: Optional[Callable[[bytes], None]],
+        on_stderr: Optional[Callable[[bytes], None]]
+    ) -> dict[str, Any]:
+        key = _key(args, input_data)
+        entries = self._load().get(key)
+        if not entries:
+            self.missed += 1
+            logger.debug("No recorded gh invocation for %s", args)
+            return {
+                "stdout": "",
+                "stderr": f"No recorded gh invocation for: gh {' '.join(args)}",
+                "returncode": 1,
+                "success": False,
+            }
+        entry = entries[self._next[key] % len(entries)]
+        self._next[key] += 1
+        self.replayed += 1
+
+        delay = self.latency * entry["duration"]
+        if timeout is not None and delay > timeout:
+            await self._sleep(timeout)
+            return {
+                "stdout": "",
+                "stderr": f"Command timed out after {timeout:g} seconds",
+                "returncode": -1,
+                "success": False
+            }
+        if delay > 0:
+            await self._sleep(delay)
+
+        stdout, stderr = entry["stdout"], entry["stderr"]
+        if on_stdout is not None:
+            if stdout:
+                on_stdout(stdout.encode("utf-8"))
+            stdout = ""
+        if on_stderr is not None:
+            if stderr:
+                on_stderr(stderr.encode("utf-8"))
+            stderr = ""
+        return {
+            "stdout": stdout,
+            "stderr": stderr,
+            "returncode": entry["returncode"],
+            "success": entry["returncode"] == 0
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "mode": self.mode,
+            "latency": self.latency,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "missed": self.missed,
+        }
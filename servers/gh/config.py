@@ -0,0 +1,70 @@
+"""
+Environment-based configuration for the GitHub CLI MCP server.
+
+Settings are read from ``GH_MCP_*`` environment variables so they can be set
+in the ``env`` block of an MCP client configuration without editing code.
+"""
+
+import os
+from typing import Optional
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Return the environment variable ``name``, or ``default`` if unset or empty."""
+    value = os.environ.get(name, "").strip()
+    return value if value else default
+
+
+def env_int(name: str, default: int) -> int:
+    """Return the environment variable ``name`` as an int."""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def env_float(name: str, default: float) -> float:
+    """Return the environment variable ``name`` as a float."""
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Return the environment variable ``name`` as a bool (1/true/yes/on)."""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def env_float_map(name: str) -> dict[str, float]:
+    """
+    Return the environment variable ``name`` parsed as ``key=number`` pairs.
+
+    Pairs are separated by commas, e.g. ``gh_pr_checkout=900,gh_auth_status=5``.
+    """
+    value = env_str(name)
+    if value is None:
+        return {}
+    mapping = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        key, sep, number = item.partition("=")
+        try:
+            if not sep:
+                raise ValueError
+            mapping[key.strip()] = float(number)
+        except ValueError:
+            raise ValueError(
+                f"{name} must be a comma-separated list of name=seconds, got {item.strip()!r}"
+            )
+    return mapping
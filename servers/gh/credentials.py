@@ -0,0 +1,225 @@
+"""
+Token and environment for spawned gh processes.
+
+Left to itself every gh process looks up its token in the OS keyring, reads
+``hosts.yml`` and may check for a newer release. Instead the token is
+resolved once with ``gh auth token`` and each child gets a small prebuilt
+environment carrying it, with prompts and update checks disabled, so the
+children skip all of that. The environment and the path of the gh
+executable are built once and reused for every spawn.
+
+The token is resolved again after ``ttl`` seconds, for tokens that expire,
+and whenever a call is rejected with HTTP 401.
+"""
+
+import asyncio
+import os
+import shutil
+import time
+from typing import Any, Awaitable, Callable, Iterable, Mapping, Optional
+
+
+Runner = Callable[..., Awaitable[dict[str, Any]]]
+
+# Variables passed on to gh children, by exact name
+PASSTHROUGH = (
+    "PATH", "HOME", "USER", "LOGNAME", "SHELL", "LANG", "TZ", "TERM",
+    "TMPDIR", "TMP", "TEMP",
+    "http_proxy", "https_proxy", "no_proxy", "all_proxy",
+    "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "ALL_PROXY",
+    "SSL_CERT_FILE", "SSL_CERT_DIR",
+    "DISPLAY", "WAYLAND_DISPLAY", "BROWSER", "DBUS_SESSION_BUS_ADDRESS",
+    # Windows
+    "SYSTEMROOT", "SYSTEMDRIVE", "COMSPEC", "PATHEXT", "WINDIR",
+    "APPDATA", "LOCALAPPDATA", "USERPROFILE", "PROGRAMDATA",
+)
+
+# Variables passed on to gh children, by prefix
+PASSTHROUGH_PREFIXES = ("LC_", "XDG_", "GH_", "GIT_", "SSH_")
+
+# Set in every child: no prompts, no update or extension checks, no spinner
+DISABLED = {
+    "GH_PROMPT_DISABLED": "1",
+    "GH_NO_UPDATE_NOTIFIER": "1",
+    "GH_NO_EXTENSION_UPDATE_NOTIFIER": "1",
+    "GH_SPINNER_DISABLED": "1",
+    "GIT_TERMINAL_PROMPT": "0",
+}
+
+REJECTED_PATTERNS = ("HTTP 401", "Bad credentials")
+
+
+def token_variable(host: str) -> str:
+    """Return the variable gh reads the token for ``host`` from."""
+    if host == "github.com" or host.endswith(".ghe.com"):
+        return "GH_TOKEN"
+    return "GH_ENTERPRISE_TOKEN"
+
+
+def minimal_environment(environ: Mapping[str, str], extra: Iterable[str] = ()) -> dict[str, str]:
+    """
+    Return the subset of ``environ`` gh children need, with prompts disabled.
+
+    Parameters
+    ----------
+    environ : Mapping[str, str]
+        Environment of the server
+    extra : Iterable[str]
+        Further variable names to pass on
+    """
+    names = set(PASSTHROUGH) | set(extra)
+    env = {
+        name: value for name, value in environ.items()
+        if name in names or name.startswith(PASSTHROUGH_PREFIXES)
+    }
+    env.update(DISABLED)
+    return env
+
+
+def is_rejected(result: dict[str, Any]) -> bool:
+    """Return True if a gh result failed because the token was rejected."""
+    return not result["success"] and any(
+        pattern in result["stderr"] for pattern in REJECTED_PATTERNS
+    )
+
+
+class GhCredentials:
+    """
+    Resolve the gh token once and build the environment for gh children.
+
+    Parameters
+    ----------
+    run : Callable
+        Coroutine function running an argv list, like ``run_process``. It
+        runs ``gh auth token`` with the server's full environment, so the
+        keyring is only consulted there.
+    host : str
+        GitHub host whose token is resolved
+    ttl : float
+        Seconds before the token is resolved again
+    retry_interval : float
+        Seconds before a failed resolution is attempted again. Meanwhile
+        children get the server's full environment and authenticate
+        themselves.
+    passthrough : Iterable[str]
+        Further variable names to pass on to children
+    environ : Mapping[str, str], optional
+        Environment to build from, ``os.environ`` by default
+    clock : Callable
+        Monotonic clock, replaceable in tests
+    """
+
+    def __init__(
+        self,
+        run: Runner,
+        host: str = "github.com",
+        ttl: float = 3600.0,
+        retry_interval: float = 30.0,
+        passthrough: Iterable[str] = (),
+        environ: Optional[Mapping[str, str]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._run = run
+        self.host = host
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._environ = os.environ if environ is None else environ
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self.token_variable = token_variable(host)
+        self._base = minimal_environment(self._environ, passthrough)
+        self._fallback = dict(self._environ, **DISABLED)
+        self._executable: Optional[str] = None
+        self._token: Optional[str] = None
+        self._env: Optional[dict[str, str]] = None
+        self._resolved_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.resolutions = 0
+        self.rejections = 0
+
+    @property
+    def executable(self) -> str:
+        """Absolute path of gh, looked up on PATH once."""
+        if self._executable is None:
+            self._executable = shutil.which("gh", path=self._environ.get("PATH")) or "gh"
+        return self._executable
+
+    def argv(self, args: list[str]) -> list[str]:
+        """Return the argv running gh with ``args``."""
+        return [self.executable, *args]
+
+    async def _resolve(self, force: bool) -> None:
+        now = self._clock()
+        if not force:
+            if self._token is not None and now - self._resolved_at < self.ttl:
+                return
+            failed_recently = (
+                self._failed_at is not None and now - self._failed_at < self.retry_interval
+            )
+            if self._token is None and failed_recently:
+                return
+        self.resolutions += 1
+        result = await self._run(
+            [self.executable, "auth", "token", "--hostname", self.host], timeout=15
+        )
+        token = result["stdout"].strip()
+        if not result["success"] or not token:
+            self.error = f"Could not get a token from gh auth token: {result['stderr'].strip()}"
+            self._token = self._env = None
+            self._failed_at = now
+            return
+        self._token = token
+        self._env = dict(self._base, **{self.token_variable: token})
+        self._resolved_at = now
+        self._failed_at = None
+        self.error = None
+
+    async def token(self, refresh: bool = False) -> str:
+        """
+        Return the token gh is authenticated with.
+
+        Parameters
+        ----------
+        refresh : bool
+            Resolve the token again, e.g. after the cached one was rejected
+
+        Raises
+        ------
+        RuntimeError
+            If gh has no token for the host
+        """
+        async with self._lock:
+            await self._resolve(refresh)
+            if self._token is None:
+                raise RuntimeError(self.error)
+            return self._token
+
+    async def environment(self, refresh: bool = False) -> dict[str, str]:
+        """
+        Return the environment for a gh child.
+
+        The same dictionary is returned until the token changes. Without a
+        token it is the server's environment with prompts disabled.
+        """
+        async with self._lock:
+            await self._resolve(refresh)
+            return self._env if self._env is not None else self._fallback
+
+    async def rejected(self) -> dict[str, str]:
+        """Record a rejected token and return the environment with a new one."""
+        self.rejections += 1
+        return await self.environment(refresh=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executable": self.executable,
+            "token_variable": self.token_variable,
+            "resolved": self._token is not None,
+            "token_age": (
+                round(self._clock() - self._resolved_at, 1) if self._token is not None else None
+            ),
+            "resolutions": self.resolutions,
+            "rejections": self.rejections,
+            "error": self.error,
+        }
@@ -0,0 +1,225 @@
+"""
+Persistent ETag / Last-Modified store for conditional GitHub API requests.
+
+Response bodies are kept in SQLite together with their validators. Requests
+for a stored resource are sent with ``If-None-Match`` / ``If-Modified-Since``
+and a ``304 Not Modified`` answer, which GitHub does not count against the
+REST rate limit, is served from the store.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+
+def default_cache_dir() -> Path:
+    """Return the directory for the server's on-disk caches."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "gh-mcp"
+
+
+def parse_http_response(output: str) -> tuple[int, dict[str, str], str]:
+    """
+    Split the output of ``gh api --include`` into status, headers and body.
+
+    Parameters
+    ----------
+    output : str
+        Raw stdout of the command
+
+    Returns
+    -------
+    tuple
+        HTTP status code (0 if no status line was found), headers keyed by
+        lowercased name, and the response body
+    """
+    if not output.startswith("HTTP/"):
+        return 0, {}, output
+    normalized = output.replace("\r\n", "\n")
+    head, _, body = normalized.partition("\n\n")
+    lines = head.split("\n")
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        status = 0
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return status, headers, body
+
+
+class ETagStore:
+    """
+    SQLite-backed store of response bodies and their validators.
+
+    The database may be shared by several server processes.
+
+    Parameters
+    ----------
+    path : str or Path
+        Database file, or ``":memory:"``
+    max_entries : int
+        Least recently used entries beyond this count are pruned
+    max_body_bytes : int
+        Larger bodies are not stored
+    """
+
+    def __init__(self, path: Any, max_entries: int = 5000, max_body_bytes: int = 10 * 1024 * 1024):
+        # Imported here so servers with the store disabled never load sqlite3
+        import sqlite3
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path,
+            timeout=5,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self.not_modified = 0
+        self.fetched = 0
+
+    @staticmethod
+    def key(args: list[str], host: Optional[str] = None) -> str:
+        """Return the store key for a ``gh api`` invocation."""
+        return json.dumps([host or os.environ.get("GH_HOST", "github.com"), args])
+
+    def lookup(self, key: str) -> Optional[tuple[Optional[str], Optional[str], str]]:
+        """Return ``(etag, last_modified, body)`` for ``key``, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+
+    def save(self, key: str, etag: Optional[str], last_modified: Optional[str], body: str) -> None:
+        """Store a response body with its validators, pruning old entries."""
+        if not (etag or last_modified) or len(body) > self.max_body_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, body, now, now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY used_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "not_modified": self.not_modified,
+            "fetched": self.fetched,
+        }
+
+
+def open_store(path: Optional[str], **kwargs: Any) -> Optional[ETagStore]:
+    """
+    Open the store at ``path``, returning None if it is disabled or unusable.
+
+    A path of ``"off"`` disables the store; None selects the default location.
+    """
+    if path is not None and path.lower() in ("off", "none", "0", "false"):
+        return None
+    import sqlite3
+
+    path = path or default_cache_dir() / "etags.sqlite3"
+    try:
+        return ETagStore(path, **kwargs)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("ETag store disabled, cannot open %s: %s", path, e)
+        return None
+
+
+async def conditional_api_request(
+    store: ETagStore,
+    run: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    args: list[str]
+) -> dict[str, Any]:
+    """
+    Run a GET ``gh api`` command conditionally against the store.
+
+    Parameters
+    ----------
+    store : ETagStore
+        Store holding previous responses
+    run : Callable
+        Coroutine function executing gh arguments and returning the
+        ``run_gh_command`` result dictionary
+    args : list[str]
+        gh arguments, starting with ``api``
+
+    Returns
+    -------
+    dict
+        Result dictionary as returned by ``run``, with the response headers
+        removed from stdout and a 304 answered from the store
+    """
+    # The store is queried in a thread: a busy database must not block the event loop
+    key = store.key(args)
+    stored = await asyncio.to_thread(store.lookup, key)
+    request = args[:1] + ["--include"] + args[1:]
+    if stored is not None:
+        etag, last_modified, _ = stored
+        if etag:
+            request += ["--header", f"If-None-Match: {etag}"]
+        if last_modified:
+            request += ["--header", f"If-Modified-Since: {last_modified}"]
+
+    result = await run(request)
+    status, headers, body = parse_http_response(result["stdout"])
+
+    if status == 304 and stored is not None:
+        store.not_modified += 1
+        await asyncio.to_thread(store.touch, key)
+        return {"stdout": stored[2], "stderr": "", "returncode": 0, "success": True}
+
+    store.fetched += 1
+    if result["success"] and status == 200:
+        await asyncio.to_thread(
+            store.save, key, headers.get("etag"), headers.get("last-modified"), body
+        )
+    return dict(result, stdout=body)
@@ -0,0 +1,192 @@
+"""
+Asynchronous subprocess execution for the GitHub CLI MCP server.
+
+Commands are started with ``asyncio.create_subprocess_exec`` and their
+stdout/stderr pipes are drained concurrently, so a slow ``gh`` process never
+blocks the event loop and many tool calls can have a process in flight at once.
+
+On POSIX each child runs in its own session, so a timeout or cancellation
+terminates the whole process group, including the ``git`` and pager
+processes gh starts, rather than only the ``gh`` process itself.
+"""
+
+import asyncio
+import os
+import signal
+import time
+from typing import Any, Callable, Optional
+
+try:
+    from .metrics import SPAWN, add_phase
+except ImportError:  # running as a script: python server.py
+    from metrics import SPAWN, add_phase
+
+
+# Size of each read from the child's pipes
+CHUNK_SIZE = 64 * 1024
+
+# Seconds a terminated process group gets to exit before it is killed
+KILL_GRACE = 2.0
+
+PROCESS_GROUPS = os.name == "posix"
+
+StreamCallback = Callable[[bytes], None]
+
+
+def _result(stdout: str, stderr: str, returncode: int) -> dict[str, Any]:
+    """Build the result dictionary shared by all execution paths."""
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": returncode,
+        "success": returncode == 0
+    }
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    chunks: list[bytes],
+    callback: Optional[StreamCallback]
+) -> None:
+    """
+    Drain a pipe until EOF.
+
+    Chunks are handed to ``callback`` when one is given, otherwise they are
+    collected in ``chunks``.
+    """
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if callback is not None:
+            callback(chunk)
+        else:
+            chunks.append(chunk)
+
+
+async def _feed(stdin: Optional[asyncio.StreamWriter], data: Optional[bytes]) -> None:
+    """Write ``data`` to the child's stdin and close it."""
+    if stdin is None:
+        return
+    try:
+        if data:
+            stdin.write(data)
+            await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        stdin.close()
+
+
+def _signal(process: asyncio.subprocess.Process, sig: int) -> None:
+    """Send ``sig`` to the child's process group, or to the child alone without groups."""
+    try:
+        if PROCESS_GROUPS:
+            os.killpg(process.pid, sig)
+        else:
+            process.send_signal(sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    """
+    Terminate the child's process group and reap the child.
+
+    The group is sent SIGTERM so git can remove its lock files, then SIGKILL
+    after ``KILL_GRACE`` seconds. The final SIGKILL also reaches descendants
+    that outlived the child and would otherwise keep its pipes open.
+    """
+    if process.returncode is None:
+        _signal(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), KILL_GRACE)
+        except asyncio.TimeoutError:
+            pass
+    if PROCESS_GROUPS:
+        _signal(process, signal.SIGKILL)
+    elif process.returncode is None:
+        process.kill()
+    await process.wait()
+
+
+def _decode(chunks: list[bytes]) -> str:
+    return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+async def run_process(
+    argv: list[str],
+    input_data: Optional[str] = None,
+    timeout: Optional[float] = 60,
+    on_stdout: Optional[StreamCallback] = None,
+    on_stderr: Optional[StreamCallback] = None,
+    env: Optional[dict[str, str]] = None
+) -> dict[str, Any]:
+    """
+    Run a command without blocking the event loop.
+
+    Parameters
+    ----------
+    argv : list[str]
+        Program and arguments to execute
+    input_data : Optional[str]
+        Optional stdin input for the command. When omitted the child's stdin
+        is connected to ``/dev/null`` so it can never read the MCP stdio stream.
+    timeout : Optional[float]
+        Seconds before the child is killed, or None to wait indefinitely
+    on_stdout : Optional[Callable[[bytes], None]]
+        Receives stdout chunks as they arrive instead of buffering them. The
+        returned ``stdout`` is empty in that case.
+    on_stderr : Optional[Callable[[bytes], None]]
+        Same as ``on_stdout`` for stderr
+    env : Optional[dict[str, str]]
+        Environment of the child, or None to inherit the server's
+
+    Returns
+    -------
+    dict
+        Dictionary with 'stdout', 'stderr', 'returncode', 'success' keys
+    """
+    started = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=PROCESS_GROUPS,
+            env=env
+        )
+    except Exception as e:
+        return _result("", str(e), -1)
+    add_phase(SPAWN, time.perf_counter() - started)
+
+    stdout_chunks: list[bytes] = []
+    stderr_chunks: list[bytes] = []
+    data = input_data.encode("utf-8") if input_data is not None else None
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _feed(process.stdin, data),
+                _pump(process.stdout, stdout_chunks, on_stdout),
+                _pump(process.stderr, stderr_chunks, on_stderr),
+                process.wait()
+            ),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        await _kill(process)
+        return _result(
+            _decode(stdout_chunks),
+            f"Command timed out after {timeout:g} seconds",
+            -1
+        )
+    except asyncio.CancelledError:
+        await _kill(process)
+        raise
+    except Exception as e:
+        await _kill(process)
+        return _result(_decode(stdout_chunks), str(e), -1)
+
+    return _result(_decode(stdout_chunks), _decode(stderr_chunks), process.returncode)
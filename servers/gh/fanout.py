@@ -0,0 +1,122 @@
+"""
+Fan-out of list tools over many repositories.
+
+The repositories are queried in parallel under a concurrency limit. Each
+answer is sorted newest first by ``updatedAt`` and merged into the running
+result as soon as it arrives, with a lazy k-way merge that stops at the
+global limit. At most ``limit`` merged items and the answers in flight are
+held at any time, however many repositories are queried.
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+
+REPOSITORY_PATTERN = re.compile(r"[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+")
+
+# Key items are merged on; items without it sort last
+UPDATED = "updatedAt"
+
+Fetcher = Callable[[str], Awaitable[list[dict[str, Any]]]]
+
+
+class FanoutError(Exception):
+    """A repository whose items could not be listed."""
+
+
+def parse_repositories(value: Any) -> list[str]:
+    """
+    Parse a ``repositories`` argument, a list or a comma-separated string.
+
+    Raises
+    ------
+    ValueError
+        If a name is not in OWNER/REPO format
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("'repositories' must be a list of OWNER/REPO names")
+    repositories = list(dict.fromkeys(str(name).strip() for name in value if str(name).strip()))
+    invalid = [name for name in repositories if not REPOSITORY_PATTERN.fullmatch(name)]
+    if invalid:
+        raise ValueError(f"Repositories must be in OWNER/REPO format: {', '.join(invalid)}")
+    return repositories
+
+
+def _updated(item: dict[str, Any]) -> str:
+    value = item.get(UPDATED) if isinstance(item, dict) else None
+    # ISO 8601 timestamps in UTC compare correctly as strings
+    return value if isinstance(value, str) else ""
+
+
+def merge_newest(
+    *streams: Iterable[dict[str, Any]],
+    limit: Optional[int] = None
+) -> list[dict[str, Any]]:
+    """
+    Merge streams sorted newest first into one, keeping the first ``limit`` items.
+
+    The merge is lazy, so no stream is read past the items it contributes.
+    """
+    merged = heapq.merge(*streams, key=_updated, reverse=True)
+    return list(itertools.islice(merged, limit))
+
+
+async def fan_out(
+    repositories: list[str],
+    fetch: Fetcher,
+    limit: int,
+    concurrency: int = 8
+) -> tuple[list[dict[str, Any]], dict[str, str]]:
+    """
+    List items of many repositories and merge them newest first.
+
+    Parameters
+    ----------
+    repositories : list[str]
+        Repositories in OWNER/REPO format
+    fetch : Callable
+        Coroutine function returning the items of one repository, raising
+        FanoutError when they cannot be listed
+    limit : int
+        Maximum number of items returned in total
+    concurrency : int
+        Maximum number of repositories queried at once
+
+    Returns
+    -------
+    tuple
+        The merged items, each tagged with its ``repository``, and the
+        error of each repository that failed
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(repository: str) -> tuple[str, Any]:
+        async with semaphore:
+            try:
+                return repository, await fetch(repository)
+            except FanoutError as e:
+                return repository, e
+
+    tasks = [asyncio.ensure_future(fetch_one(repository)) for repository in repositories]
+    merged: list[dict[str, Any]] = []
+    errors: dict[str, str] = {}
+    try:
+        for answer in asyncio.as_completed(tasks):
+            repository, items = await answer
+            if isinstance(items, FanoutError):
+                errors[repository] = str(items)
+                continue
+            for item in items:
+                item["repository"] = repository
+            items.sort(key=_updated, reverse=True)
+            merged = merge_newest(merged, items, limit=limit)
+    finally:
+        # Stop the remaining queries when the call is cancelled
+        for task in tasks:
+            task.cancel()
+    return merged, errors
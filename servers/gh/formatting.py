@@ -0,0 +1,153 @@
+"""
+Output encodings for tool results.
+
+gh prints JSON; the server can return it unchanged, minified, indented, as
+JSON Lines, or as a tab-separated table with one header row. Compact encodings
+cut transfer and context size considerably for large list results. Output
+can also be projected to selected keys before it is encoded.
+"""
+
+import json
+from typing import Any, Optional
+
+
+RAW = "raw"
+JSON = "json"
+PRETTY = "pretty"
+JSONL = "jsonl"
+TSV = "tsv"
+
+FORMATS = (RAW, JSON, PRETTY, JSONL, TSV)
+
+
+def _cell(value: Any) -> str:
+    """Render one TSV cell, keeping every row on a single line."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    else:
+        text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def to_tsv(rows: list[Any]) -> str:
+    """
+    Render a list of objects as TSV with a header row.
+
+    Columns are the union of the objects' keys in first-seen order. Nested
+    values are written as compact JSON, and tabs and newlines inside values
+    are escaped as ``\\t`` and ``\\n``.
+    """
+    columns: dict[str, None] = {}
+    for row in rows:
+        if isinstance(row, dict):
+            columns.update(dict.fromkeys(row))
+    if not columns:
+        return "\n".join(_cell(row) for row in rows)
+    lines = ["\t".join(columns)]
+    for row in rows:
+        if not isinstance(row, dict):
+            row = {}
+        lines.append("\t".join(_cell(row.get(column)) for column in columns))
+    return "\n".join(lines)
+
+
+def _field_tree(fields: list[str]) -> dict[str, Any]:
+    """Turn dotted paths into a nested dict; None marks a key kept whole."""
+    tree: dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        *parents, last = field.split(".")
+        for key in parents:
+            child = node.get(key, {})
+            if child is None:
+                break
+            node = node.setdefault(key, child)
+        else:
+            node[last] = None
+    return tree
+
+
+def _project(value: Any, tree: Optional[dict[str, Any]]) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+def project(data: Any, fields: list[str]) -> Any:
+    """
+    Keep only the named keys of decoded JSON.
+
+    A list is projected item by item. Dotted paths select nested keys, e.g.
+    ``owner.login``, also through lists, and missing keys are left out.
+    This is the server-side equivalent of a jq object construction, without
+    running jq.
+    """
+    return _project(data, _field_tree(fields))
+
+
+def format_output(
+    output: str,
+    output_format: str = PRETTY,
+    fields: Optional[list[str]] = None
+) -> str:
+    """
+    Encode gh output in the requested format.
+
+    Parameters
+    ----------
+    output : str
+        stdout of a successful gh command
+    output_format : str
+        One of ``raw`` (unchanged, skips parsing), ``json`` (minified),
+        ``pretty`` (indented), ``jsonl`` (one JSON value per line) or ``tsv``
+    fields : Optional[list[str]]
+        Keys to keep, see :func:`project`. ``raw`` output is minified when
+        projected.
+
+    Returns
+    -------
+    str
+        Encoded output. Output that is not JSON is returned unchanged.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(
+            f"Unknown output format {output_format!r}, expected one of: {', '.join(FORMATS)}"
+        )
+    if output_format == RAW and not fields:
+        return output
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return output
+    if fields:
+        data = project(data, fields)
+    return encode_output(data, output_format)
+
+
+def encode_output(data: Any, output_format: str = PRETTY) -> str:
+    """
+    Encode decoded JSON in the requested format.
+
+    ``raw`` has no original text to return here, so it is encoded like ``json``.
+    """
+    if output_format == PRETTY:
+        return json.dumps(data, indent=2)
+    if output_format in (JSON, RAW):
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    rows = data if isinstance(data, list) else [data]
+    if output_format == JSONL:
+        return "\n".join(json.dumps(row, separators=(",", ":"), ensure_ascii=False) for row in rows)
+    if output_format == TSV:
+        return to_tsv(rows)
+    raise ValueError(
+        f"Unknown output format {output_format!r}, expected one of: {', '.join(FORMATS)}"
+    )
@@ -0,0 +1,336 @@
+"""
+Direct HTTP backend for ``gh api`` invocations.
+
+Instead of forking ``gh`` for every call, API requests are sent over a
+persistent keep-alive connection pool with the token from ``gh auth token``.
+The backend understands the ``gh api`` argument subset the server produces
+and returns output in the same format as ``gh``; anything else (``--paginate``,
+``{owner}`` placeholders, full jq expressions, non-api subcommands, absolute
+URLs outside the API host) is declined so the caller falls back to the ``gh``
+subprocess.
+"""
+
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+
+# jq expressions simple enough to evaluate without jq: ".", ".a", ".a.b[0]"
+SIMPLE_JQ = re.compile(r"^\.$|^(\.[A-Za-z_][\w-]*(\[\d+\])*)+$")
+JQ_STEP = re.compile(r"\.([A-Za-z_][\w-]*)|\[(\d+)\]")
+
+# gh api options that take a value
+VALUE_OPTIONS = {
+    "--method", "-X",
+    "--jq", "-q",
+    "--header", "-H",
+    "--raw-field", "-f",
+    "--field", "-F",
+    "--input",
+}
+
+
+class ApiRequest:
+    """A parsed ``gh api`` invocation."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.method: Optional[str] = None
+        self.jq: Optional[str] = None
+        self.include = False
+        self.headers: dict[str, str] = {}
+        self.fields: dict[str, Any] = {}
+        self.input_stdin = False
+        self.body: Optional[str] = None
+
+    @property
+    def is_graphql(self) -> bool:
+        return self.endpoint.strip("/") == "graphql"
+
+    @property
+    def http_method(self) -> str:
+        if self.method:
+            return self.method.upper()
+        # Like gh, requests with fields or a body default to POST
+        return "POST" if self.fields or self.input_stdin or self.is_graphql else "GET"
+
+
+def _typed_field(value: str) -> Any:
+    """Convert a ``--field`` value the way gh does."""
+    if value in ("true", "false"):
+        return value == "true"
+    if value == "null":
+        return None
+    if re.fullmatch(r"-?\d+", value):
+        return int(value)
+    return value
+
+
+def parse_api_args(args: list[str]) -> Optional[ApiRequest]:
+    """
+    Parse ``gh api`` arguments.
+
+    Parameters
+    ----------
+    args : list[str]
+        gh arguments, starting with ``api``
+
+    Returns
+    -------
+    Optional[ApiRequest]
+        The parsed request, or None if the arguments use features the
+        backend does not support
+    """
+    if len(args) < 2 or args[0] != "api":
+        return None
+    request = ApiRequest("")
+    endpoint = None
+    i = 1
+    while i < len(args):
+        arg = args[i]
+        if arg in ("--include", "-i"):
+            request.include = True
+            i += 1
+            continue
+        if arg in VALUE_OPTIONS:
+            if i + 1 >= len(args):
+                return None
+            value = args[i + 1]
+            i += 2
+            if arg in ("--method", "-X"):
+                request.method = value
+            elif arg == "--input":
+                if value != "-":
+                    return None
+                request.input_stdin = True
+            elif arg in ("--jq", "-q"):
+                if not SIMPLE_JQ.match(value):
+                    return None
+                request.jq = value
+            elif arg in ("--header", "-H"):
+                name, sep, header_value = value.partition(":")
+                if not sep:
+                    return None
+                request.headers[name.strip()] = header_value.strip()
+            else:
+                key, sep, field_value = value.partition("=")
+                if not sep:
+                    return None
+                if arg in ("--raw-field", "-f"):
+                    request.fields[key] = field_value
+                elif field_value.startswith("@"):
+                    return None
+                else:
+                    request.fields[key] = _typed_field(field_value)
+            continue
+        if arg.startswith("-") or endpoint is not None or "{" in arg:
+            # --paginate, --input FILE, placeholders and anything unknown
+            return None
+        endpoint = arg
+        i += 1
+    if endpoint is None:
+        return None
+    request.endpoint = endpoint
+    return request
+
+
+def apply_jq(data: Any, expression: str) -> Any:
+    """Evaluate a simple jq path expression against decoded JSON."""
+    for name, index in JQ_STEP.findall(expression):
+        if name:
+            if data is None:
+                return None
+            if not isinstance(data, dict):
+                raise ValueError(f"Cannot index {type(data).__name__} with \"{name}\"")
+            data = data.get(name)
+        else:
+            if data is None:
+                return None
+            if not isinstance(data, list):
+                raise ValueError(f"Cannot index {type(data).__name__} with number")
+            position = int(index)
+            data = data[position] if position < len(data) else None
+    return data
+
+
+def format_jq_output(value: Any) -> str:
+    """Format a jq result like gh: strings raw, everything else as JSON."""
+    if isinstance(value, str):
+        return value + "\n"
+    return json.dumps(value) + "\n"
+
+
+class HttpBackend:
+    """
+    Execute ``gh api`` requests over a pooled ``requests`` session.
+
+    Parameters
+    ----------
+    token_provider : Callable[[bool], Awaitable[str]]
+        Coroutine function returning the GitHub token. It is called with
+        ``refresh=True`` after a 401 so an expired token can be replaced.
+    host : str
+        GitHub host, ``github.com`` or a GitHub Enterprise hostname
+    pool_size : int
+        Maximum number of pooled keep-alive connections
+    timeout : float
+        Request timeout in seconds
+    on_response : Optional[Callable[[int, dict], None]]
+        Called with the status code and lowercase headers of every response
+    """
+
+    def __init__(
+        self,
+        token_provider: Callable[..., Awaitable[str]],
+        host: str = "github.com",
+        pool_size: int = 8,
+        timeout: float = 60,
+        on_response: Optional[Callable[[int, dict[str, str]], None]] = None
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._token_provider = token_provider
+        self._on_response = on_response
+        self.timeout = timeout
+        self.host = host
+        if host == "github.com":
+            self.rest_base = "https://api.github.com/"
+            self.graphql_url = "https://api.github.com/graphql"
+        else:
+            self.rest_base = f"https://{host}/api/v3/"
+            self.graphql_url = f"https://{host}/api/graphql"
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "gh-mcp-server",
+            "X-GitHub-Api-Version": "2022-11-28",
+        })
+        self.requests = 0
+        self.declined = 0
+
+    def _url(self, request: ApiRequest) -> Optional[str]:
+        """
+        Return the URL of a request, or None for an absolute URL outside the API.
+
+        The token is only ever sent to the configured API host over HTTPS;
+        links to other hosts or over plain HTTP are left to gh.
+        """
+        if request.is_graphql:
+            return self.graphql_url
+        if request.endpoint.startswith(("https://", "http://")):
+            url = urlsplit(request.endpoint)
+            api = urlsplit(self.rest_base)
+            same_origin = (url.scheme, url.netloc.lower()) == (api.scheme, api.netloc)
+            if not same_origin or not url.path.startswith(api.path):
+                return None
+            return request.endpoint
+        return self.rest_base + request.endpoint.lstrip("/")
+
+    def _send(self, request: ApiRequest, url: str, token: str, timeout: Optional[float]):
+        method = request.http_method
+        kwargs: dict[str, Any] = {"timeout": timeout}
+        if request.body is not None:
+            kwargs["data"] = request.body.encode("utf-8")
+        elif request.is_graphql:
+            fields = dict(request.fields)
+            query = fields.pop("query", "")
+            kwargs["json"] = {"query": query, "variables": fields}
+        elif request.fields:
+            kwargs["params" if method == "GET" else "json"] = request.fields
+        headers = dict(request.headers)
+        headers["Authorization"] = f"token {token}"
+        return self._session.request(method, url, headers=headers, **kwargs)
+
+    def _render(self, request: ApiRequest, response) -> dict[str, Any]:
+        """Turn an HTTP response into a gh-style result dictionary."""
+        stdout = ""
+        if request.include:
+            reason = response.reason or ""
+            stdout = f"HTTP/1.1 {response.status_code} {reason}\r\n"
+            stdout += "".join(f"{name}: {value}\r\n" for name, value in response.headers.items())
+            stdout += "\r\n"
+        body = response.text
+        stderr = ""
+        returncode = 0
+
+        if request.jq and response.status_code < 300 and body:
+            try:
+                body = format_jq_output(apply_jq(json.loads(body), request.jq))
+            except (ValueError, IndexError) as e:
+                return {
+                    "stdout": "",
+                    "stderr": f"jq: error: {e}",
+                    "returncode": 1,
+                    "success": False
+                }
+        stdout += body
+
+        if response.status_code > 299:
+            returncode = 1
+            message = ""
+            try:
+                message = response.json().get("message", "")
+            except ValueError:
+                pass
+            status = f"HTTP {response.status_code}"
+            stderr = f"gh: {message} ({status})" if message else f"gh: {status}"
+        elif request.is_graphql:
+            try:
+                errors = response.json().get("errors")
+            except ValueError:
+                errors = None
+            if errors:
+                returncode = 1
+                stderr = "gh: " + "\n".join(error.get("message", "") for error in errors)
+        return {
+            "stdout": stdout,
+            "stderr": stderr,
+            "returncode": returncode,
+            "success": returncode == 0
+        }
+
+    async def execute(
+        self,
+        args: list[str],
+        input_data: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[dict[str, Any]]:
+        """
+        Execute gh arguments over HTTP.
+
+        ``timeout`` overrides the backend's request timeout for this call.
+
+        Returns
+        -------
+        Optional[dict]
+            Result dictionary in the ``run_gh_command`` format, or None when
+            the arguments are not supported and gh must be used instead
+        """
+        request = parse_api_args(args)
+        url = self._url(request) if request is not None else None
+        if url is None or request.input_stdin != (input_data is not None):
+            self.declined += 1
+            return None
+        request.body = input_data
+        self.requests += 1
+        try:
+            timeout = timeout or self.timeout
+            token = await self._token_provider()
+            response = await asyncio.to_thread(self._send, request, url, token, timeout)
+            if response.status_code == 401:
+                token = await self._token_provider(refresh=True)
+                response = await asyncio.to_thread(self._send, request, url, token, timeout)
+        except Exception as e:
+            return {"stdout": "", "stderr": str(e), "returncode": -1, "success": False}
+        if self._on_response is not None:
+            headers = {name.lower(): value for name, value in response.headers.items()}
+            self._on_response(response.status_code, headers)
+        return self._render(request, response)
+
+    def stats(self) -> dict[str, Any]:
+        return {"host": self.host, "requests": self.requests, "declined": self.declined}
@@ -0,0 +1,347 @@
+"""
+Disk-spooled access to workflow run logs.
+
+``gh run view --log`` output is streamed straight to a spool file instead of
+being collected in memory. Selections (tail, byte or line ranges, job/step and
+regex filters) are then served by scanning the memory-mapped file, so the
+server never holds a full log, which can run to hundreds of MB.
+
+Each log line has the form ``JOB<TAB>STEP<TAB>TIMESTAMP TEXT``.
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import stat
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+
+# Default selection sizes
+DEFAULT_LOG_TAIL = 200
+DEFAULT_LOG_MAX_LINES = 500
+DEFAULT_LOG_BYTES = 65536
+
+# Largest selections served, so a request cannot pull a whole log into memory
+MAX_LOG_LINES = 5000
+MAX_LOG_BYTES = 1024 * 1024
+
+
+def selection_size(
+    arguments: dict[str, Any],
+    name: str,
+    maximum: Optional[int] = None
+) -> Optional[int]:
+    """
+    Read a non-negative integer selection argument, capped at ``maximum``.
+
+    Returns
+    -------
+    Optional[int]
+        The value, or None if the argument is missing
+
+    Raises
+    ------
+    ValueError
+        If the value is not a non-negative integer
+    """
+    value = arguments.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer, got {value!r}") from None
+    if number < 0:
+        raise ValueError(f"'{name}' must not be negative, got {number}")
+    return min(number, maximum) if maximum is not None else number
+
+
+def default_spool_dir() -> Path:
+    """Return the per-user spool directory under the system temp directory."""
+    user = os.getuid() if hasattr(os, "getuid") else "user"
+    return Path(tempfile.gettempdir()) / f"gh-mcp-logs-{user}"
+
+
+def ensure_private_dir(directory: Path) -> None:
+    """
+    Create ``directory`` accessible to the current user only, or check that
+    an existing one is.
+
+    Spool and spill directories live under the shared temp directory at
+    predictable paths, so files another user planted there must not be served.
+
+    Raises
+    ------
+    PermissionError
+        If the directory is a symlink, belongs to another user, or is
+        writable by group or others
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):
+        return
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{directory} is not a directory")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{directory} belongs to another user")
+    if info.st_mode & 0o022:
+        raise PermissionError(f"{directory} is writable by other users")
+
+
+def evict_files(directory: Path, pattern: str, max_bytes: int, max_age: float) -> None:
+    """
+    Remove files matching ``pattern`` not used for ``max_age`` seconds, then
+    the least recently used ones until their total size is under ``max_bytes``.
+
+    Use is tracked by modification time, which readers refresh with ``os.utime``.
+    """
+    if not directory.exists():
+        return
+    now = time.time()
+    entries = []
+    for path in directory.glob(pattern):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if now - stat.st_mtime >= max_age:
+            path.unlink(missing_ok=True)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+@contextmanager
+def _mapped(path: Path) -> Iterator[Any]:
+    """Memory-map a file read-only; empty files map to an empty bytes object."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def read_byte_range(path: Path, offset: int, length: int) -> bytes:
+    """Return ``length`` bytes of the file starting at ``offset``."""
+    with _mapped(path) as data:
+        offset = max(0, offset)
+        return bytes(data[offset:offset + max(0, length)])
+
+
+def tail_lines(path: Path, count: int) -> list[bytes]:
+    """Return the last ``count`` lines by scanning backwards from the end of the file."""
+    if count <= 0:
+        return []
+    with _mapped(path) as data:
+        end = len(data)
+        if data[end - 1:end] == b"\n":
+            end -= 1
+        start = end
+        for _ in range(count):
+            newline = data.rfind(b"\n", 0, start)
+            if newline < 0:
+                start = 0
+                break
+            start = newline
+        else:
+            # Skip the newline in front of the first kept line
+            start += 1
+        return bytes(data[start:end]).split(b"\n") if end > start else []
+
+
+def _line_matcher(
+    job: Optional[str],
+    step: Optional[str],
+    pattern: Optional[str]
+) -> Optional[Callable[[bytes], bool]]:
+    """Build a predicate for job/step/regex filtering, or None if nothing is filtered."""
+    job_bytes = job.lower().encode("utf-8") if job else None
+    step_bytes = step.lower().encode("utf-8") if step else None
+    regex = re.compile(pattern.encode("utf-8")) if pattern else None
+    if job_bytes is None and step_bytes is None and regex is None:
+        return None
+
+    def matches(line: bytes) -> bool:
+        if job_bytes is not None or step_bytes is not None:
+            fields = line.split(b"\t", 2)
+            if len(fields) < 3:
+                return False
+            if job_bytes is not None and job_bytes not in fields[0].lower():
+                return False
+            if step_bytes is not None and step_bytes not in fields[1].lower():
+                return False
+        return regex is None or regex.search(line) is not None
+
+    return matches
+
+
+def select_lines(
+    path: Path,
+    job: Optional[str] = None,
+    step: Optional[str] = None,
+    pattern: Optional[str] = None,
+    tail: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    max_lines: int = DEFAULT_LOG_MAX_LINES
+) -> dict[str, Any]:
+    """
+    Select lines from a spooled log.
+
+    Filters (``job``, ``step``, ``pattern``) are applied first; ``tail`` or the
+    1-based inclusive ``start_line``/``end_line`` range then selects from the
+    filtered lines. At most ``max_lines`` lines are returned.
+
+    Returns
+    -------
+    dict
+        ``lines`` (decoded), ``matched`` (filtered line count, when the whole
+        file was scanned) and ``truncated``
+    """
+    matcher = _line_matcher(job, step, pattern)
+    if matcher is None and tail is not None and start_line is None and end_line is None:
+        lines = tail_lines(path, min(tail, max_lines))
+        return {
+            "lines": [line.decode("utf-8", errors="replace") for line in lines],
+            "matched": None,
+            "truncated": tail > max_lines and len(lines) == max_lines,
+        }
+
+    first = max(1, start_line or 1)
+    limit = min(tail, max_lines) if tail is not None else max_lines
+    kept: Any = deque(maxlen=limit) if tail is not None else []
+    matched = 0
+    complete = True
+    truncated = False
+    with _mapped(path) as data:
+        position = 0
+        size = len(data)
+        while position < size:
+            newline = data.find(b"\n", position)
+            end = size if newline < 0 else newline
+            line = data[position:end]
+            position = end + 1
+            if matcher is not None and not matcher(line):
+                continue
+            matched += 1
+            if matched < first:
+                continue
+            if end_line is not None and matched > end_line:
+                complete = False
+                break
+            if tail is None and len(kept) >= limit:
+                truncated = True
+                complete = False
+                break
+            kept.append(line)
+    if tail is not None:
+        truncated = min(matched, end_line or matched) - first + 1 > len(kept)
+    return {
+        "lines": [bytes(line).decode("utf-8", errors="replace") for line in kept],
+        "matched": matched if complete else None,
+        "truncated": truncated,
+    }
+
+
+class LogSpool:
+    """
+    On-disk spool of workflow run logs, evicted by age and total size.
+
+    Parameters
+    ----------
+    directory : Path
+        Spool directory
+    max_bytes : int
+        Total size of spooled logs before the oldest are removed
+    max_age : float
+        Seconds a spooled log is kept
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 2 * 1024 ** 3, max_age: float = 3600):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._locks: dict[str, tuple[asyncio.Lock, int]] = {}
+
+    def path_for(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{digest}.log"
+
+    async def fetch(
+        self,
+        key: str,
+        download: Callable[[Callable[[bytes], None]], Awaitable[dict[str, Any]]]
+    ) -> tuple[Optional[Path], dict[str, Any]]:
+        """
+        Return the spool file for ``key``, downloading it if needed.
+
+        Parameters
+        ----------
+        key : str
+            Identifies the log, e.g. repository, run ID and job
+        download : Callable
+            Coroutine function that runs gh, passing stdout chunks to the
+            callback it receives, and returns the result dictionary
+
+        Returns
+        -------
+        tuple
+            The spool file (None if the download failed) and the download
+            result dictionary (stdout empty)
+        """
+        # One lock per log being fetched; dropped once nobody uses it
+        lock, users = self._locks.get(key, (asyncio.Lock(), 0))
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                return await self._fetch(key, download)
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    async def _fetch(
+        self,
+        key: str,
+        download: Callable[[Callable[[bytes], None]], Awaitable[dict[str, Any]]]
+    ) -> tuple[Optional[Path], dict[str, Any]]:
+        # Also before serving a spooled file, which another user could have planted
+        ensure_private_dir(self.directory)
+        path = self.path_for(key)
+        if path.exists() and time.time() - path.stat().st_mtime < self.max_age:
+            os.utime(path)
+            return path, {"stdout": "", "stderr": "", "returncode": 0, "success": True}
+
+        self.evict()
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                result = await download(spool.write)
+            if not result["success"]:
+                os.unlink(partial)
+                return None, result
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+        return path, result
+
+    def evict(self) -> None:
+        """Remove expired logs, then the least recently used ones until under ``max_bytes``."""
+        evict_files(self.directory, "*.log", self.max_bytes, self.max_age)
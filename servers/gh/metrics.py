@@ -0,0 +1,292 @@
+"""
+Per-tool latency, output size, error and cache metrics.
+
+Each tool call is tracked in a context variable, so code deep in the call
+(the scheduler slot, the executor, the formatter) can attribute time to the
+current call without passing it around. Only the task handling the call
+counts: background tasks started during a call, such as rate-limit probes,
+inherit the context variable but are not counted.
+
+Phases, each a histogram per tool:
+
+- ``total``: the whole tool call
+- ``queue``: waiting for rate-limit pacing and a scheduler slot
+- ``spawn``: starting gh processes
+- ``github``: gh processes running after they started, or HTTP requests
+- ``format``: re-encoding the output
+
+A call running several commands, e.g. when paginating or retrying, adds up
+their phases. The metrics can also be written periodically to a file in the
+Prometheus text format, for node_exporter's textfile collector.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+TOTAL = "total"
+QUEUE = "queue"
+SPAWN = "spawn"
+GITHUB = "github"
+FORMAT = "format"
+PHASES = (TOTAL, QUEUE, SPAWN, GITHUB, FORMAT)
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"),
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile as the upper bound of its bucket, capped at the maximum."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.sum / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(1000 * self.quantile(0.5), 2),
+            "p95_ms": round(1000 * self.quantile(0.95), 2),
+            "max_ms": round(1000 * self.max, 2),
+        }
+
+
+class CallRecord:
+    """What happened during one tool call."""
+
+    __slots__ = ("task", "phases", "stdout_bytes", "timeouts", "cache_hit", "failed")
+
+    def __init__(self):
+        self.task = _current_task()
+        self.phases: dict[str, float] = {}
+        self.stdout_bytes = 0
+        self.timeouts = 0
+        self.cache_hit: Optional[bool] = None
+        self.failed = False
+
+
+_current: ContextVar[Optional[CallRecord]] = ContextVar("gh_mcp_call", default=None)
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def _record() -> Optional[CallRecord]:
+    """Return the current call's record, unless running in a task the call started."""
+    record = _current.get()
+    if record is not None and record.task is _current_task():
+        return record
+    return None
+
+
+def add_phase(name: str, seconds: float) -> None:
+    """Add ``seconds`` to a phase of the current call, if any."""
+    record = _record()
+    if record is not None:
+        record.phases[name] = record.phases.get(name, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the block as part of a phase of the current call."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(name, time.perf_counter() - started)
+
+
+def add_stdout_bytes(count: int) -> None:
+    record = _record()
+    if record is not None:
+        record.stdout_bytes += count
+
+
+def note_timeout() -> None:
+    record = _record()
+    if record is not None:
+        record.timeouts += 1
+
+
+def note_cache(hit: bool) -> None:
+    record = _record()
+    if record is not None:
+        record.cache_hit = hit
+
+
+class _ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stdout_bytes = 0
+        self.phases = {name: Histogram() for name in PHASES}
+
+
+class ToolMetrics:
+    """
+    Metrics of every tool, fed by ``track``.
+
+    Parameters
+    ----------
+    clock : Callable
+        Monotonic clock, replaceable in tests
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._tools: dict[str, _ToolStats] = {}
+
+    @contextlib.contextmanager
+    def track(self, tool: str) -> Iterator[CallRecord]:
+        """Track a tool call for the duration of the block; set ``failed`` on the yielded record."""
+        record = CallRecord()
+        token = _current.set(record)
+        started = self._clock()
+        try:
+            yield record
+        except BaseException:
+            record.failed = True
+            raise
+        finally:
+            _current.reset(token)
+            record.phases[TOTAL] = self._clock() - started
+            self.record(tool, record)
+
+    def record(self, tool: str, record: CallRecord) -> None:
+        """Add a finished call to the metrics of ``tool``."""
+        stats = self._tools.get(tool)
+        if stats is None:
+            stats = self._tools[tool] = _ToolStats()
+        stats.calls += 1
+        stats.errors += record.failed
+        stats.timeouts += record.timeouts
+        stats.stdout_bytes += record.stdout_bytes
+        if record.cache_hit is not None:
+            if record.cache_hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+        phases = dict(record.phases)
+        if GITHUB in phases:
+            # The github phase is timed around whole commands, spawn included
+            phases[GITHUB] = max(0.0, phases[GITHUB] - phases.get(SPAWN, 0.0))
+        for name, seconds in phases.items():
+            stats.phases[name].observe(seconds)
+
+    def stats(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot per tool."""
+        report = {}
+        for tool, stats in sorted(self._tools.items()):
+            lookups = stats.cache_hits + stats.cache_misses
+            report[tool] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "timeouts": stats.timeouts,
+                "stdout_bytes": stats.stdout_bytes,
+                "cache_hit_ratio": round(stats.cache_hits / lookups, 3) if lookups else None,
+                "latency": {
+                    name: histogram.snapshot()
+                    for name, histogram in stats.phases.items() if histogram.count
+                },
+            }
+        return report
+
+    def render_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        counters = (
+            ("gh_mcp_tool_calls_total", "Tool calls", "calls"),
+            ("gh_mcp_tool_errors_total", "Tool calls that failed", "errors"),
+            ("gh_mcp_tool_timeouts_total", "gh commands killed after their timeout", "timeouts"),
+            (
+                "gh_mcp_tool_cache_hits_total",
+                "Tool calls answered from the response cache",
+                "cache_hits"
+            ),
+            (
+                "gh_mcp_tool_cache_misses_total",
+                "Cacheable tool calls not in the response cache",
+                "cache_misses"
+            ),
+            ("gh_mcp_tool_stdout_bytes_total", "Bytes of gh output", "stdout_bytes"),
+        )
+        lines = []
+        for metric, description, attribute in counters:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for tool, stats in sorted(self._tools.items()):
+                lines.append(f'{metric}{{tool="{tool}"}} {getattr(stats, attribute)}')
+
+        metric = "gh_mcp_tool_phase_seconds"
+        lines.append(f"# HELP {metric} Time spent per tool call and phase")
+        lines.append(f"# TYPE {metric} histogram")
+        for tool, stats in sorted(self._tools.items()):
+            for name, histogram in stats.phases.items():
+                if not histogram.count:
+                    continue
+                labels = f'tool="{tool}",phase="{name}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Write the metrics to ``path`` atomically, so collectors never read a partial file."""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(temporary, path)
+
+    async def export(self, path: str, interval: float = 15.0) -> None:
+        """Write the textfile every ``interval`` seconds until cancelled."""
+        while True:
+            try:
+                await asyncio.to_thread(self.write_textfile, path)
+            except OSError as e:
+                logger.warning("Could not write metrics to %s: %s", path, e)
+            await asyncio.sleep(interval)
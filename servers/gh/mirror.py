@@ -0,0 +1,360 @@
+"""
+Local SQLite mirror of issues and pull requests with full-text search.
+
+The issues and pull requests of the configured repositories are copied into
+SQLite and indexed with FTS5 over their titles, bodies, labels and authors.
+A background task keeps the mirror current with incremental syncs (see
+:mod:`sync`): each pass only fetches items changed since the repository's
+watermark, which is stored in the database with the items, so restarts
+continue where the last pass stopped. Searches are answered from the index
+without touching the Search API and its rate limit.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    from .sync import Runner, SyncError, Watermark, list_changes
+except ImportError:  # running as a script: python server.py
+    from sync import Runner, SyncError, Watermark, list_changes
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    repository TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    is_pull_request INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    author TEXT NOT NULL,
+    url TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (repository, number)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, body, labels, author, content='items', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, title, body, labels, author)
+    VALUES (new.rowid, new.title, new.body, new.labels, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, title, body, labels, author)
+    VALUES ('delete', old.rowid, old.title, old.body, old.labels, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, title, body, labels, author)
+    VALUES ('delete', old.rowid, old.title, old.body, old.labels, old.author);
+    INSERT INTO items_fts (rowid, title, body, labels, author)
+    VALUES (new.rowid, new.title, new.body, new.labels, new.author);
+END;
+CREATE TABLE IF NOT EXISTS repositories (
+    repository TEXT PRIMARY KEY,
+    updated_at TEXT,
+    numbers TEXT NOT NULL,
+    complete INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (repository, number) DO UPDATE SET
+    is_pull_request = excluded.is_pull_request, state = excluded.state, title = excluded.title,
+    body = excluded.body, labels = excluded.labels, author = excluded.author, url = excluded.url,
+    created_at = excluded.created_at, updated_at = excluded.updated_at
+"""
+
+# Relevance weights of the indexed columns: title, body, labels, author
+WEIGHTS = (10.0, 1.0, 5.0, 5.0)
+
+# gh search issues --json fields giving the shape of search results
+SEARCH_FIELDS = [
+    "number", "title", "state", "url", "repository", "author", "labels", "isPullRequest",
+    "createdAt", "updatedAt",
+]
+
+# Items fetched per sync request; a pass repeats them until it is complete
+SYNC_BATCH = 1000
+
+
+def match_expression(query: str) -> str:
+    """
+    Turn a free-text query into an FTS5 expression matching all its words.
+
+    Raises
+    ------
+    ValueError
+        If the query contains no words
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise ValueError("The query must contain at least one word")
+    return " ".join(f'"{word}"' for word in words)
+
+
+def _row(repository: str, issue: dict[str, Any]) -> tuple:
+    return (
+        repository,
+        issue["number"],
+        int("pull_request" in issue),
+        issue.get("state") or "",
+        issue.get("title") or "",
+        issue.get("body") or "",
+        json.dumps([label.get("name") for label in issue.get("labels") or []]),
+        (issue.get("user") or {}).get("login") or "",
+        issue.get("html_url") or "",
+        issue.get("created_at") or "",
+        issue.get("updated_at") or "",
+    )
+
+
+class IssueMirror:
+    """
+    Full-text indexed copy of the issues and pull requests of some repositories.
+
+    Parameters
+    ----------
+    path : str or Path
+        Database file, or ``":memory:"``
+    repositories : list[str]
+        Mirrored repositories in OWNER/REPO format
+    """
+
+    def __init__(self, path: Any, repositories: list[str]):
+        # Imported here so servers without a mirror never load sqlite3
+        import sqlite3
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.repositories = list(repositories)
+        # Names are stored lowercased and shown as configured
+        self._mirrored = {repository.lower(): repository for repository in self.repositories}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path, timeout=5, check_same_thread=False, isolation_level=None
+        )
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self.searches = 0
+        self.synced_items = 0
+        self.errors: dict[str, str] = {}
+
+    def mirrors(self, repository: str) -> bool:
+        """Return True if ``repository`` is mirrored and has been synced completely once."""
+        if repository.lower() not in self._mirrored:
+            return False
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM repositories WHERE repository = ? AND complete",
+                (repository.lower(),)
+            ).fetchone()
+        return row is not None
+
+    def watermark(self, repository: str) -> Optional[Watermark]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT updated_at, numbers FROM repositories WHERE repository = ?",
+                (repository.lower(),)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return Watermark(row[0], json.loads(row[1]))
+
+    def store(
+        self,
+        repository: str,
+        items: list[dict[str, Any]],
+        watermark: Optional[Watermark],
+        complete: bool
+    ) -> None:
+        """Save changed items and the repository's new watermark in one transaction."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(UPSERT, [_row(repository.lower(), issue) for issue in items])
+                self._db.execute(
+                    "INSERT INTO repositories VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (repository) DO UPDATE SET "
+                    "updated_at = excluded.updated_at, numbers = excluded.numbers, "
+                    "complete = repositories.complete OR excluded.complete, "
+                    "synced_at = excluded.synced_at",
+                    (
+                        repository.lower(),
+                        watermark.updated_at if watermark else None,
+                        json.dumps(sorted(watermark.numbers) if watermark else []),
+                        int(complete),
+                        time.time(),
+                    )
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        self.synced_items += len(items)
+
+    async def sync(self, run: Runner, repository: str) -> int:
+        """
+        Fetch the changes of a repository since its watermark.
+
+        Returns
+        -------
+        int
+            Number of items added or updated
+
+        Raises
+        ------
+        SyncError
+            If the changes cannot be listed
+        """
+        count = 0
+        complete = False
+        while not complete:
+            since = await asyncio.to_thread(self.watermark, repository)
+            items, watermark, complete = await list_changes(
+                run, None, repository, since, SYNC_BATCH, state="all"
+            )
+            await asyncio.to_thread(self.store, repository, items, watermark, complete)
+            count += len(items)
+        return count
+
+    async def sync_all(self, run: Runner) -> None:
+        """Sync every mirrored repository in turn, logging failures."""
+        for repository in self.repositories:
+            try:
+                count = await self.sync(run, repository)
+            except SyncError as e:
+                self.errors[repository] = str(e)
+                logger.warning("Could not update the mirror of %s: %s", repository, e)
+                continue
+            except Exception as e:
+                # A database error or malformed item must not stop the other repositories
+                self.errors[repository] = f"{type(e).__name__}: {e}"
+                logger.exception("Could not update the mirror of %s", repository)
+                continue
+            self.errors.pop(repository, None)
+            if count:
+                logger.debug("Mirrored %d changed items of %s", count, repository)
+
+    async def keep_current(self, run: Runner, interval: float = 300.0) -> None:
+        """Sync every ``interval`` seconds until cancelled, surviving failed passes."""
+        while True:
+            try:
+                await self.sync_all(run)
+            except Exception:
+                logger.exception("Mirror update pass failed")
+            await asyncio.sleep(interval)
+
+    def search(
+        self,
+        query: str,
+        repository: Optional[str] = None,
+        state: Optional[str] = None,
+        pull_requests: Optional[bool] = None,
+        limit: int = 30
+    ) -> list[dict[str, Any]]:
+        """
+        Search the mirror, best matches first.
+
+        Parameters
+        ----------
+        query : str
+            Words that must all occur in the title, body, labels or author
+        repository : Optional[str]
+            Only this repository
+        state : Optional[str]
+            ``open`` or ``closed``
+        pull_requests : Optional[bool]
+            True for pull requests only, False for issues only
+        limit : int
+            Maximum number of results
+
+        Returns
+        -------
+        list[dict]
+            Items in the shape of ``gh search issues --json``
+
+        Raises
+        ------
+        ValueError
+            If the query contains no words
+        """
+        sql = (
+            "SELECT i.repository, i.number, i.is_pull_request, i.state, i.title, i.labels, "
+            "i.author, i.url, i.created_at, i.updated_at "
+            "FROM items_fts JOIN items i ON i.rowid = items_fts.rowid "
+            "WHERE items_fts MATCH ?"
+        )
+        parameters: list[Any] = [match_expression(query)]
+        if repository:
+            sql += " AND i.repository = ?"
+            parameters.append(repository.lower())
+        if state:
+            sql += " AND i.state = ?"
+            parameters.append(state)
+        if pull_requests is not None:
+            sql += " AND i.is_pull_request = ?"
+            parameters.append(int(pull_requests))
+        sql += f" ORDER BY bm25(items_fts, {', '.join(map(str, WEIGHTS))}) LIMIT ?"
+        parameters.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, parameters).fetchall()
+        self.searches += 1
+        return [
+            {
+                "number": number,
+                "title": title,
+                "state": state,
+                "url": url,
+                "repository": {"name": name.partition("/")[2], "nameWithOwner": name},
+                "author": {"login": author},
+                "labels": [{"name": label} for label in json.loads(labels)],
+                "isPullRequest": bool(is_pull_request),
+                "createdAt": created_at,
+                "updatedAt": updated_at,
+            }
+            for (
+                name, number, is_pull_request, state, title, labels, author, url, created_at,
+                updated_at
+            ) in (
+                (self._mirrored.get(row[0], row[0]),) + tuple(row[1:]) for row in rows
+            )
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            items = self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            synced = dict(
+                self._db.execute("SELECT repository, synced_at FROM repositories").fetchall()
+            )
+        return {
+            "path": self.path,
+            "items": items,
+            "repositories": {
+                repository: {
+                    "synced_at": synced.get(repository.lower()),
+                    "ready": self.mirrors(repository),
+                    "error": self.errors.get(repository),
+                }
+                for repository in self.repositories
+            },
+            "searches": self.searches,
+            "synced_items": self.synced_items,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
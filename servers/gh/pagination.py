@@ -0,0 +1,251 @@
+"""
+Cursor-based pagination for ``gh api`` requests.
+
+Each call fetches a single page and returns it with an opaque continuation
+cursor, so large listings are never buffered in full. REST pages are followed
+through ``Link`` headers and GraphQL pages through ``pageInfo`` cursors.
+"""
+
+import base64
+import json
+import re
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    from .etag_store import parse_http_response
+except ImportError:  # running as a script: python server.py
+    from etag_store import parse_http_response
+
+
+Runner = Callable[..., Awaitable[dict[str, Any]]]
+
+# Keys of a page besides its items
+PAGE_KEYS = ["next_cursor", "returned", "total_returned"]
+
+LINK = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+
+
+def encode_cursor(state: dict[str, Any]) -> str:
+    """Encode pagination state as an opaque cursor string."""
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(state, dict) or state.get("kind") not in ("rest", "graphql"):
+        raise ValueError("Invalid pagination cursor")
+    return state
+
+
+def parse_link_header(value: str) -> dict[str, str]:
+    """Parse a ``Link`` header into a map of rel to URL."""
+    return {rel: url for url, rel in LINK.findall(value or "")}
+
+
+def with_query_param(url: str, key: str, value: Any) -> str:
+    """Return ``url`` with the query parameter ``key`` set to ``value``."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != key]
+    query.append((key, str(value)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def extract_items(body: Any) -> tuple[list[Any], dict[str, Any]]:
+    """
+    Split a REST page into its items and remaining top-level fields.
+
+    List endpoints return a JSON array, while search and Actions endpoints
+    wrap the array in an object such as ``{"total_count": n, "items": [...]}``.
+    """
+    if isinstance(body, list):
+        return body, {}
+    if isinstance(body, dict):
+        for key, value in body.items():
+            if isinstance(value, list):
+                rest = {
+                    k: v for k, v in body.items() if k != key and not isinstance(v, (list, dict))
+                }
+                return value, rest
+    return [body], {}
+
+
+def find_page_info(data: Any) -> Optional[tuple[list[Any], dict[str, Any]]]:
+    """
+    Find the first paginated connection in a GraphQL response.
+
+    Returns
+    -------
+    Optional[tuple]
+        The connection's ``nodes`` (or ``edges``) and its ``pageInfo``, or
+        None if the response has no ``pageInfo``
+    """
+    if isinstance(data, dict):
+        if isinstance(data.get("pageInfo"), dict):
+            items = data.get("nodes")
+            if items is None:
+                items = data.get("edges") or []
+            return items, data["pageInfo"]
+        for value in data.values():
+            found = find_page_info(value)
+            if found is not None:
+                return found
+    elif isinstance(data, list):
+        for value in data:
+            found = find_page_info(value)
+            if found is not None:
+                return found
+    return None
+
+
+def _cap(items: list[Any], seen: int, max_items: Optional[int]) -> tuple[list[Any], bool]:
+    """Apply the item cap across pages, returning the kept items and whether the cap was hit."""
+    if max_items is not None and seen + len(items) >= max_items:
+        return items[:max(0, max_items - seen)], True
+    return items, False
+
+
+def _page_result(page: dict[str, Any]) -> dict[str, Any]:
+    return {"stdout": json.dumps(page), "stderr": "", "returncode": 0, "success": True}
+
+
+async def fetch_rest_page(
+    run: Runner,
+    endpoint: str,
+    per_page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    max_items: Optional[int] = None
+) -> dict[str, Any]:
+    """
+    Fetch one page of a REST listing.
+
+    Parameters
+    ----------
+    run : Callable
+        Coroutine function executing gh arguments
+    endpoint : str
+        API endpoint of the first page
+    per_page : Optional[int]
+        Page size requested from the API
+    cursor : Optional[str]
+        Continuation cursor from a previous page
+    max_items : Optional[int]
+        Stop once this many items have been returned across all pages
+
+    Returns
+    -------
+    dict
+        Result dictionary whose stdout is a JSON object with ``items``,
+        ``next_cursor`` (null on the last page) and ``returned`` counts
+    """
+    state = decode_cursor(cursor) if cursor else {"kind": "rest", "url": endpoint, "seen": 0}
+    if state["kind"] != "rest":
+        raise ValueError("Cursor belongs to a GraphQL query")
+    if cursor is None and per_page:
+        state["url"] = with_query_param(endpoint, "per_page", per_page)
+    if max_items is None:
+        max_items = state.get("max")
+
+    result = await run(["api", "--include", state["url"]])
+    _, headers, body = parse_http_response(result["stdout"])
+    if not result["success"]:
+        return dict(result, stdout=body)
+    try:
+        items, extra = extract_items(json.loads(body))
+    except ValueError:
+        return dict(result, stdout=body)
+
+    items, capped = _cap(items, state["seen"], max_items)
+    seen = state["seen"] + len(items)
+    next_url = parse_link_header(headers.get("link", "")).get("next")
+
+    next_state = None
+    if next_url and not capped:
+        next_state = {"kind": "rest", "url": next_url, "seen": seen}
+        if max_items is not None:
+            next_state["max"] = max_items
+
+    page = dict(extra, items=items, next_cursor=encode_cursor(next_state) if next_state else None)
+    page["returned"] = len(items)
+    page["total_returned"] = seen
+    return _page_result(page)
+
+
+async def fetch_graphql_page(
+    run: Runner,
+    query: str,
+    variables: Optional[dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+    max_items: Optional[int] = None
+) -> dict[str, Any]:
+    """
+    Fetch one page of a paginated GraphQL query.
+
+    The query must declare an ``$endCursor: String`` variable, pass it as the
+    ``after`` argument of the connection and select
+    ``pageInfo { hasNextPage endCursor }``, the same convention
+    ``gh api --paginate`` uses.
+
+    Parameters
+    ----------
+    run : Callable
+        Coroutine function executing gh arguments with optional stdin
+    query : str
+        GraphQL query
+    variables : Optional[dict]
+        Query variables other than ``endCursor``
+    cursor : Optional[str]
+        Continuation cursor from a previous page
+    max_items : Optional[int]
+        Stop once this many items have been returned across all pages
+
+    Returns
+    -------
+    dict
+        Result dictionary whose stdout is a JSON object with ``items``,
+        ``next_cursor`` (null on the last page) and ``returned`` counts
+    """
+    if "$endCursor" not in query:
+        raise ValueError("Paginated GraphQL queries must declare an $endCursor variable")
+    state = decode_cursor(cursor) if cursor else {"kind": "graphql", "after": None, "seen": 0}
+    if state["kind"] != "graphql":
+        raise ValueError("Cursor belongs to a REST endpoint")
+    if max_items is None:
+        max_items = state.get("max")
+
+    request_variables = dict(variables or {}, endCursor=state["after"])
+    payload = json.dumps({"query": query, "variables": request_variables})
+    result = await run(["api", "graphql", "--input", "-"], input_data=payload)
+    if not result["success"]:
+        return result
+    try:
+        response = json.loads(result["stdout"])
+    except ValueError:
+        return result
+    found = find_page_info(response.get("data"))
+    if found is None:
+        raise ValueError("GraphQL response has no pageInfo to paginate")
+
+    items, page_info = found
+    items, capped = _cap(items, state["seen"], max_items)
+    seen = state["seen"] + len(items)
+
+    next_state = None
+    if not capped and page_info.get("hasNextPage") and page_info.get("endCursor"):
+        next_state = {"kind": "graphql", "after": page_info["endCursor"], "seen": seen}
+        if max_items is not None:
+            next_state["max"] = max_items
+
+    page = {
+        "items": items,
+        "next_cursor": encode_cursor(next_state) if next_state else None,
+        "returned": len(items),
+        "total_returned": seen,
+    }
+    return _page_result(page)
@@ -0,0 +1,304 @@
+"""
+Opt-in profiling of tool calls and event-loop stall detection.
+
+A sampler thread wakes every ``interval`` seconds and records the stack the
+event loop thread is executing, attributed to the tool call whose task is
+running. Time spent waiting for gh is not sampled, since the loop is idle
+then; the gh commands a call ran are kept with it instead. The ``slowest``
+calls are kept with their arguments, commands and most frequent stacks.
+
+With memory profiling, tracemalloc traces allocations, and the calls that
+grew traced memory the most keep the top allocation sites at their end,
+compared with a snapshot taken when profiling started. Concurrent calls
+share the process heap, so growth is attributed approximately, and taking a
+snapshot blocks the loop briefly; as the kept calls fill up, only ever
+larger growth triggers one.
+
+The same thread watches a heartbeat the event loop updates every quarter of
+``stall_threshold``. When the heartbeat is late by more than the threshold,
+something is blocking the loop; the stack at that moment is logged together
+with the tool call that was running.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Stack frames kept per sample, innermost first
+MAX_DEPTH = 30
+
+# Characters kept of each string argument
+MAX_ARGUMENT_LENGTH = 200
+
+# gh commands kept per call
+MAX_COMMANDS = 10
+
+# The profiler's own allocations
+IGNORED_ALLOCATIONS = (
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+
+def _stack(frame: Any) -> str:
+    """Return a frame's stack, outermost first, as ``file:function:line`` entries."""
+    entries = []
+    while frame is not None and len(entries) < MAX_DEPTH:
+        code = frame.f_code
+        entries.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(entries))
+
+
+def _truncated(arguments: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: (
+            value[:MAX_ARGUMENT_LENGTH] + "..."
+            if isinstance(value, str) and len(value) > MAX_ARGUMENT_LENGTH
+            else value
+        )
+        for key, value in arguments.items()
+    }
+
+
+class _Call:
+    __slots__ = ("tool", "arguments", "task", "started", "commands", "samples", "memory")
+
+    def __init__(self, tool: str, arguments: dict[str, Any], task: Optional[asyncio.Task]):
+        self.tool = tool
+        self.arguments = arguments
+        self.task = task
+        self.started = time.perf_counter()
+        self.commands: list[list[str]] = []
+        self.samples: Counter = Counter()
+        self.memory = 0
+
+
+_current: ContextVar[Optional[_Call]] = ContextVar("gh_mcp_profile", default=None)
+
+
+class Profiler:
+    """
+    Sampling profiler of tool calls with event-loop stall detection.
+
+    Parameters
+    ----------
+    slowest : int
+        Number of slowest calls, and of largest allocating calls, kept
+    interval : float
+        Seconds between stack samples
+    stall_threshold : float
+        Seconds the event loop may be blocked before it is reported
+    memory : bool
+        Trace allocations with tracemalloc
+    memory_frames : int
+        Frames tracemalloc keeps per allocation
+    """
+
+    def __init__(
+        self,
+        slowest: int = 10,
+        interval: float = 0.005,
+        stall_threshold: float = 0.1,
+        memory: bool = True,
+        memory_frames: int = 10
+    ):
+        self.slowest = slowest
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.memory = memory
+        self.memory_frames = memory_frames
+        self._calls: dict[asyncio.Task, _Call] = {}
+        # Guards the sample counters, which the sampler thread updates
+        self._lock = threading.Lock()
+        self._slowest: list[tuple[float, int, dict[str, Any]]] = []
+        self._largest: list[tuple[int, int, dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._last_beat = 0.0
+        self._stalled_since: Optional[float] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._tracing = False
+        self.samples = 0
+        self.stall_count = 0
+        self.stalls: deque = deque(maxlen=20)
+
+    def start(self) -> None:
+        """Start sampling the running event loop."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+                self._tracing = True
+            self._baseline = tracemalloc.take_snapshot().filter_traces(IGNORED_ALLOCATIONS)
+        self._last_beat = time.monotonic()
+        self._heartbeat = asyncio.ensure_future(self._beat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="gh-mcp-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and tracing; the collected calls are kept."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    async def _beat(self) -> None:
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.stall_threshold / 4)
+
+    def _running_call(self) -> Optional[_Call]:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return None
+        return self._calls.get(task) if task is not None else None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            call = self._running_call()
+            stack = None
+            if call is not None:
+                stack = _stack(frame)
+                with self._lock:
+                    call.samples[stack] += 1
+                    self.samples += 1
+            self._check_stall(frame, call, stack)
+
+    def _check_stall(self, frame: Any, call: Optional[_Call], stack: Optional[str]) -> None:
+        now = time.monotonic()
+        late = now - self._last_beat - self.stall_threshold / 4
+        if late <= self.stall_threshold:
+            if self._stalled_since is not None and self.stalls:
+                self.stalls[-1]["duration_ms"] = round(1000 * (now - self._stalled_since), 1)
+            self._stalled_since = None
+            return
+        if self._stalled_since is not None:
+            return
+        self._stalled_since = self._last_beat + self.stall_threshold / 4
+        self.stall_count += 1
+        stall = {
+            "at": time.time(),
+            "tool": call.tool if call is not None else None,
+            "duration_ms": None,
+            "stack": (stack or _stack(frame)).split(";"),
+        }
+        self.stalls.append(stall)
+        logger.warning(
+            "Event loop blocked for more than %.0f ms%s at:\n  %s",
+            1000 * self.stall_threshold,
+            f" in {call.tool}" if call is not None else "",
+            "\n  ".join(stall["stack"][-10:])
+        )
+
+    @contextlib.contextmanager
+    def track(self, tool: str, arguments: dict[str, Any]) -> Iterator[None]:
+        """Profile a tool call for the duration of the block."""
+        task = asyncio.current_task()
+        call = _Call(tool, arguments, task)
+        token = _current.set(call)
+        if task is not None:
+            self._calls[task] = call
+        if self.memory and tracemalloc.is_tracing():
+            call.memory = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            _current.reset(token)
+            if task is not None:
+                self._calls.pop(task, None)
+            self._finish(call)
+
+    def note_command(self, args: list[str]) -> None:
+        """Record a gh command run by the current call."""
+        call = _current.get()
+        # Background tasks started during the call inherit the context variable
+        if call is None or call.task is not asyncio.current_task():
+            return
+        if len(call.commands) < MAX_COMMANDS:
+            call.commands.append(list(args))
+
+    def _entry(self, call: _Call, duration: float) -> dict[str, Any]:
+        with self._lock:
+            samples = call.samples.copy()
+        return {
+            "tool": call.tool,
+            "arguments": _truncated(call.arguments),
+            "duration_ms": round(1000 * duration, 1),
+            "commands": call.commands,
+            "samples": sum(samples.values()),
+            "stacks": [
+                {"count": count, "stack": stack.split(";")}
+                for stack, count in samples.most_common(3)
+            ],
+        }
+
+    def _finish(self, call: _Call) -> None:
+        duration = time.perf_counter() - call.started
+        if len(self._slowest) < self.slowest or duration > self._slowest[0][0]:
+            item = (duration, next(self._sequence), self._entry(call, duration))
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, item)
+            else:
+                heapq.heapreplace(self._slowest, item)
+
+        if not (self.memory and tracemalloc.is_tracing()):
+            return
+        growth = tracemalloc.get_traced_memory()[0] - call.memory
+        if growth <= 0 or (len(self._largest) >= self.slowest and growth <= self._largest[0][0]):
+            return
+        entry = self._entry(call, duration)
+        entry["memory_growth"] = growth
+        snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED_ALLOCATIONS)
+        if self._baseline:
+            statistics = snapshot.compare_to(self._baseline, "lineno")
+        else:
+            statistics = snapshot.statistics("lineno")
+        entry["allocations"] = [str(statistic) for statistic in statistics[:10]]
+        item = (growth, next(self._sequence), entry)
+        if len(self._largest) < self.slowest:
+            heapq.heappush(self._largest, item)
+        else:
+            heapq.heapreplace(self._largest, item)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval_ms": 1000 * self.interval,
+            "stall_threshold_ms": 1000 * self.stall_threshold,
+            "samples": self.samples,
+            "stalls": {"count": self.stall_count, "recent": list(self.stalls)},
+            "slowest": [entry for _, _, entry in sorted(self._slowest, reverse=True)],
+            "largest_allocations": [entry for _, _, entry in sorted(self._largest, reverse=True)],
+        }
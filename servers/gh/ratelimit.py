@@ -0,0 +1,415 @@
+"""
+Rate-limit governor for GitHub API calls.
+
+GitHub enforces a primary limit per token (an hourly budget tracked per
+resource: ``core``, ``graphql``, ``search``, ...) and secondary limits on
+bursts. Clients sharing one token can exhaust either for everyone, so calls
+are paced before a limit is reached instead of failing once it has been:
+
+- a token bucket caps the sustained request rate, with writes costing more
+  points as in GitHub's secondary limit accounting;
+- once a resource's remaining budget falls below a reserve, calls are spread
+  evenly over the time left until the budget resets;
+- after a secondary limit response, calls wait for its ``Retry-After``.
+
+Budgets are read from ``X-RateLimit-*`` response headers and from periodic
+``rate_limit`` probes, which do not count against the limit.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+try:
+    from .etag_store import parse_http_response
+    from .http_backend import VALUE_OPTIONS
+except ImportError:  # running as a script: python server.py
+    from etag_store import parse_http_response
+    from http_backend import VALUE_OPTIONS
+
+
+logger = logging.getLogger(__name__)
+
+CORE = "core"
+GRAPHQL = "graphql"
+SEARCH = "search"
+
+# gh subcommands backed by REST endpoints; the others query GraphQL
+REST_COMMANDS = {"run", "workflow", "release", "gist", "cache", "secret", "variable"}
+
+# Subcommand verbs that create or modify content
+WRITE_VERBS = {
+    "create", "edit", "close", "reopen", "merge", "comment", "delete", "review",
+    "ready", "rerun", "cancel", "fork", "lock", "unlock", "transfer", "pin",
+    "unpin", "enable", "disable", "upload", "archive", "rename", "set",
+}
+
+# Secondary limit points: GitHub counts most writes as five reads
+READ_COST = 1
+WRITE_COST = 5
+
+# Wait after a secondary limit response without Retry-After, per GitHub's guidance
+SECONDARY_BACKOFF = 60.0
+
+MUTATION = re.compile(r"^\s*mutation\b")
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a call would have to wait longer than the governor allows."""
+
+
+def _api_request(args: list[str], input_data: Optional[str]) -> tuple[Optional[str], bool]:
+    """Return the endpoint of ``gh api`` arguments and whether the request writes."""
+    endpoint = None
+    method = None
+    has_body = input_data is not None
+    mutation = bool(input_data and "mutation" in input_data)
+    i = 1
+    while i < len(args):
+        arg = args[i]
+        if arg in VALUE_OPTIONS and i + 1 < len(args):
+            value = args[i + 1]
+            if arg in ("--method", "-X"):
+                method = value.upper()
+            elif arg not in ("--jq", "-q", "--header", "-H"):
+                has_body = True
+                if value.startswith("query=") and MUTATION.match(value[len("query="):]):
+                    mutation = True
+            i += 2
+            continue
+        if not arg.startswith("-") and endpoint is None:
+            endpoint = arg.strip("/")
+        i += 1
+    if endpoint == "graphql":
+        return endpoint, mutation
+    if method is None:
+        method = "POST" if has_body else "GET"
+    return endpoint, method != "GET"
+
+
+def classify(args: list[str], input_data: Optional[str] = None) -> tuple[Optional[str], int]:
+    """
+    Determine the rate-limit resource a gh command draws from and its cost.
+
+    Returns
+    -------
+    tuple
+        Resource name (None for commands that are not metered) and the
+        number of secondary limit points the call costs
+    """
+    if not args:
+        return None, 0
+    command = args[0]
+    if command == "api":
+        endpoint, write = _api_request(args, input_data)
+        if endpoint is None or endpoint == "rate_limit":
+            return None, 0
+        if endpoint == "graphql":
+            resource = GRAPHQL
+        elif endpoint.startswith("search/"):
+            resource = SEARCH
+        else:
+            resource = CORE
+        return resource, WRITE_COST if write else READ_COST
+    if command == "auth":
+        return None, 0
+    if command == "search":
+        return SEARCH, READ_COST
+    verb = args[1] if len(args) > 1 else ""
+    write = verb in WRITE_VERBS or (command == "workflow" and verb == "run")
+    resource = CORE if command in REST_COMMANDS else GRAPHQL
+    return resource, WRITE_COST if write else READ_COST
+
+
+class _Budget:
+    """Primary rate-limit state of one resource."""
+
+    __slots__ = ("limit", "remaining", "used", "reset", "source", "updated", "next_slot")
+
+    def __init__(
+        self,
+        limit: int,
+        remaining: int,
+        used: int,
+        reset: float,
+        source: str,
+        updated: float
+    ):
+        self.limit = limit
+        self.remaining = remaining
+        self.used = used
+        self.reset = reset
+        self.source = source
+        self.updated = updated
+        self.next_slot = 0.0
+
+
+class RateLimitGovernor:
+    """
+    Pace GitHub API calls to stay within primary and secondary rate limits.
+
+    Parameters
+    ----------
+    rate : float
+        Sustained secondary limit points per second; 0 disables the bucket
+    burst : float
+        Points that may be spent at once before pacing starts
+    reserve : float
+        Fraction of a resource's budget below which calls are spread
+        evenly until the budget resets
+    max_wait : float
+        Calls that would have to wait longer than this many seconds fail
+        immediately with :class:`RateLimitExceeded`
+    probe : Optional[Callable[[], Awaitable[dict]]]
+        Coroutine function running ``gh api rate_limit`` and returning its
+        result dictionary
+    probe_interval : float
+        Seconds between background probes; 0 disables periodic probing
+    clock : Callable[[], float]
+        Wall clock returning epoch seconds, as rate-limit resets are epoch based
+    sleep : Callable[[float], Awaitable]
+        Coroutine function used to wait
+    """
+
+    def __init__(
+        self,
+        rate: float = 15.0,
+        burst: float = 30.0,
+        reserve: float = 0.1,
+        max_wait: float = 60.0,
+        probe: Optional[Callable[[], Awaitable[dict[str, Any]]]] = None,
+        probe_interval: float = 300.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.probe_interval = probe_interval
+        self._probe = probe
+        self._probing: Optional[asyncio.Task] = None
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = burst
+        self._filled = clock()
+        self.budgets: dict[str, _Budget] = {}
+        self.blocked_until = 0.0
+        self.last_probe: Optional[float] = None
+        self.paced = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+    async def acquire(self, args: list[str], input_data: Optional[str] = None) -> float:
+        """
+        Wait until the gh command may be sent.
+
+        Returns
+        -------
+        float
+            Seconds the call was delayed
+
+        Raises
+        ------
+        RateLimitExceeded
+            If the call would have to wait longer than ``max_wait``
+        """
+        resource, cost = classify(args, input_data)
+        if resource is None:
+            return 0.0
+        self._start_probe()
+        wait = self._reserve(resource, cost)
+        if wait > 0:
+            self.paced += 1
+            self.total_wait += wait
+            await self._sleep(wait)
+        return wait
+
+    def _reserve(self, resource: str, cost: int) -> float:
+        """Take ``cost`` points and one request of ``resource``, returning the wait."""
+        now = self._clock()
+        wait = max(0.0, self.blocked_until - now)
+
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._filled) * self.rate)
+            self._filled = now
+            if self._tokens < cost:
+                wait = max(wait, (cost - self._tokens) / self.rate)
+
+        budget = self.budgets.get(resource)
+        slot = None
+        if budget is not None and budget.reset > now:
+            if budget.remaining <= 0:
+                wait = max(wait, budget.reset - now)
+            elif budget.remaining <= budget.limit * self.reserve:
+                # Spread the rest of the budget evenly over the time left
+                slot = max(now, budget.next_slot)
+                wait = max(wait, slot - now)
+
+        if wait > self.max_wait:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                f"GitHub {resource} rate limit: call would wait {wait:.0f}s "
+                f"(more than {self.max_wait:g}s), try again later"
+            )
+
+        if self.rate > 0:
+            self._tokens -= cost
+        if budget is not None and budget.reset > now:
+            if slot is not None:
+                budget.next_slot = slot + (budget.reset - now) / budget.remaining
+            budget.remaining = max(0, budget.remaining - 1)
+        return wait
+
+    def update(
+        self,
+        resource: str,
+        limit: int,
+        remaining: int,
+        reset: float,
+        used: Optional[int] = None,
+        source: str = "headers"
+    ) -> None:
+        """Record the primary budget of a resource."""
+        if used is None:
+            used = max(0, limit - remaining)
+        budget = self.budgets.get(resource)
+        if budget is None:
+            self.budgets[resource] = _Budget(limit, remaining, used, reset, source, self._clock())
+            return
+        budget.limit = limit
+        budget.remaining = remaining
+        budget.used = used
+        budget.reset = reset
+        budget.source = source
+        budget.updated = self._clock()
+
+    def observe_headers(self, status: int, headers: dict[str, str]) -> None:
+        """
+        Update budgets from an HTTP response.
+
+        Parameters
+        ----------
+        status : int
+            HTTP status code
+        headers : dict[str, str]
+            Response headers with lowercase names
+        """
+        try:
+            if "x-ratelimit-remaining" in headers:
+                self.update(
+                    headers.get("x-ratelimit-resource", CORE),
+                    limit=int(headers.get("x-ratelimit-limit", 0)),
+                    remaining=int(headers["x-ratelimit-remaining"]),
+                    reset=float(headers.get("x-ratelimit-reset", 0)),
+                    used=int(headers["x-ratelimit-used"]) if "x-ratelimit-used" in headers else None
+                )
+            if status in (403, 429) and "retry-after" in headers:
+                self.block(float(headers["retry-after"]))
+        except ValueError:
+            logger.debug("Ignoring malformed rate-limit headers: %r", headers)
+
+    def observe(self, args: list[str], result: dict[str, Any]) -> None:
+        """Update the governor from the result of a gh command."""
+        if args[:1] == ["api"] and ("--include" in args or "-i" in args):
+            status, headers, _ = parse_http_response(result.get("stdout", ""))
+            if status:
+                self.observe_headers(status, headers)
+        if result.get("success"):
+            return
+        stderr = result.get("stderr", "").lower()
+        if "secondary rate limit" in stderr:
+            self.block(SECONDARY_BACKOFF)
+        elif "rate limit exceeded" in stderr:
+            # The primary budget ran out; fetch the reset time
+            self._start_probe(force=True)
+
+    def block(self, seconds: float) -> None:
+        """Hold all calls for ``seconds`` after a secondary limit response."""
+        self.blocked_until = max(self.blocked_until, self._clock() + seconds)
+
+    def update_from_probe(self, data: dict[str, Any]) -> None:
+        """Record every budget reported by the ``rate_limit`` endpoint."""
+        for resource, values in (data.get("resources") or {}).items():
+            if isinstance(values, dict) and "remaining" in values:
+                self.update(
+                    resource,
+                    limit=int(values.get("limit", 0)),
+                    remaining=int(values["remaining"]),
+                    reset=float(values.get("reset", 0)),
+                    used=values.get("used"),
+                    source="probe"
+                )
+
+    def _start_probe(self, force: bool = False) -> None:
+        """Start a background probe if one is due."""
+        if self._probe is None or self._probing is not None:
+            return
+        now = self._clock()
+        if not force:
+            if self.probe_interval <= 0:
+                return
+            if self.last_probe is not None and now - self.last_probe < self.probe_interval:
+                return
+        self.last_probe = now
+        self._probing = asyncio.ensure_future(self._run_probe())
+
+    async def _run_probe(self) -> None:
+        try:
+            result = await self._probe()
+            if result["success"]:
+                self.update_from_probe(json.loads(result["stdout"]))
+            else:
+                logger.debug("Rate-limit probe failed: %s", result["stderr"])
+        except Exception:
+            logger.debug("Rate-limit probe failed", exc_info=True)
+        finally:
+            self._probing = None
+
+    async def refresh(self) -> None:
+        """Probe the rate-limit endpoint now and wait for the result."""
+        if self._probe is None:
+            return
+        if self._probing is None:
+            self.last_probe = self._clock()
+            self._probing = asyncio.ensure_future(self._run_probe())
+        await asyncio.shield(self._probing)
+
+    def stats(self) -> dict[str, Any]:
+        now = self._clock()
+        if self.rate > 0:
+            tokens = min(self.burst, self._tokens + (now - self._filled) * self.rate)
+        else:
+            tokens = None
+        resources = {}
+        for name, budget in sorted(self.budgets.items()):
+            expired = budget.reset <= now
+            resources[name] = {
+                "limit": budget.limit,
+                "remaining": budget.limit if expired else budget.remaining,
+                "used": 0 if expired else budget.used,
+                "reset": int(budget.reset),
+                "resets_in_s": round(max(0.0, budget.reset - now), 1),
+                "paced": not expired and budget.remaining <= budget.limit * self.reserve,
+                "source": budget.source,
+                "age_s": round(now - budget.updated, 1),
+            }
+        return {
+            "bucket": {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "available": round(tokens, 2) if tokens is not None else None,
+            },
+            "reserve_fraction": self.reserve,
+            "secondary_blocked_for_s": round(max(0.0, self.blocked_until - now), 1),
+            "paced_calls": self.paced,
+            "rejected_calls": self.rejected,
+            "total_wait_s": round(self.total_wait, 3),
+            "last_probe_age_s": (
+                round(now - self.last_probe, 1) if self.last_probe is not None else None
+            ),
+            "resources": resources,
+        }
@@ -0,0 +1,97 @@
+"""
+Background check that gh is installed and authenticated.
+
+The check starts as soon as the server starts serving, so it overlaps with
+the client's initialize handshake instead of delaying the first tool call.
+Tool calls only wait for the local ``gh --version`` part, and only if it has
+not finished yet; the authentication check runs on in the background.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+
+Runner = Callable[..., Awaitable[dict[str, Any]]]
+
+INSTALL_HINT = "Install it from https://cli.github.com/ and make sure it is on PATH."
+
+
+class GhReadiness:
+    """
+    Probe gh availability and authentication once, in the background.
+
+    Parameters
+    ----------
+    run : Callable
+        Coroutine function running an argv list, like ``run_process``
+    host : str
+        GitHub host whose authentication is checked
+    """
+
+    def __init__(self, run: Runner, host: str = "github.com"):
+        self._run = run
+        self.host = host
+        self._task: Optional[asyncio.Task] = None
+        self._installed: Optional[asyncio.Event] = None
+        self.version: Optional[str] = None
+        self.installed: Optional[bool] = None
+        self.authenticated: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+
+    def start(self) -> None:
+        """Start the probe unless it is already running or done."""
+        if self._task is None:
+            self._installed = asyncio.Event()
+            self._task = asyncio.ensure_future(self._probe())
+
+    async def _probe(self) -> None:
+        started = time.perf_counter()
+        try:
+            result = await self._run(["gh", "--version"], timeout=10)
+            self.installed = result["success"]
+            if self.installed:
+                self.version = result["stdout"].splitlines()[0].strip() if result["stdout"] else ""
+            else:
+                self.error = f"gh is not available: {result['stderr'].strip()}. {INSTALL_HINT}"
+            self._installed.set()
+            if not self.installed:
+                return
+            result = await self._run(["gh", "auth", "status", "--hostname", self.host], timeout=15)
+            self.authenticated = result["success"]
+            if not self.authenticated:
+                self.error = (
+                    f"gh is not authenticated to {self.host}, run 'gh auth login': "
+                    f"{result['stderr'].strip()}"
+                )
+        finally:
+            self._installed.set()
+            self.duration = time.perf_counter() - started
+
+    async def wait(self) -> None:
+        """Wait for the whole probe, starting it if needed."""
+        self.start()
+        await asyncio.shield(self._task)
+
+    async def check(self) -> Optional[str]:
+        """
+        Return an error message if gh is not installed, None otherwise.
+
+        Only waits for the installation check, not for authentication.
+        """
+        self.start()
+        await self._installed.wait()
+        if self.installed is False:
+            return self.error
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "checked": self.duration is not None,
+            "installed": self.installed,
+            "version": self.version,
+            "authenticated": self.authenticated,
+            "error": self.error,
+            "probe_ms": round(1000 * self.duration, 1) if self.duration is not None else None,
+        }
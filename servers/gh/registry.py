@@ -0,0 +1,1065 @@
+"""
+Declarative registry of the server's tools.
+
+Each tool is defined once as a :class:`ToolSpec`: its description, its
+parameters and how they map to gh arguments, the ``--json`` fields it
+requests by default and may be asked for, and how it is executed (cached,
+retried, time limited). The MCP input schema and the gh argument list are
+both generated from that definition, and tools are looked up by name in
+:data:`TOOLS`, so adding a tool means adding one entry to :data:`TOOL_SPECS`.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+try:
+    from .logs import (
+        DEFAULT_LOG_BYTES,
+        DEFAULT_LOG_MAX_LINES,
+        DEFAULT_LOG_TAIL,
+        MAX_LOG_BYTES,
+        MAX_LOG_LINES,
+    )
+    from .retry import IDEMPOTENT, READ, WRITE
+except ImportError:  # running as a script: python server.py
+    from logs import (
+        DEFAULT_LOG_BYTES,
+        DEFAULT_LOG_MAX_LINES,
+        DEFAULT_LOG_TAIL,
+        MAX_LOG_BYTES,
+        MAX_LOG_LINES,
+    )
+    from retry import IDEMPOTENT, READ, WRITE
+
+
+class Param:
+    """
+    A tool parameter and how it maps to gh arguments.
+
+    Parameters without a mapping only appear in the schema and are read by
+    the server itself.
+
+    Parameters
+    ----------
+    name : str
+        Argument name
+    type : str
+        JSON schema type
+    description : str
+        Description shown to clients
+    required : bool
+        Whether the argument must be given
+    enum : Optional[list[str]]
+        Allowed values
+    option : Optional[str]
+        gh option taking the value, e.g. ``--repo``
+    switch : Optional[str]
+        gh flag added when the value is true
+    otherwise : Optional[str]
+        gh flag added when a ``switch`` value is false or missing
+    positional : bool
+        Pass the value as a positional argument
+    value_flag : bool
+        Pass the value itself as a flag, ``--<value>``
+    split : Optional[str]
+        Split a positional value into several arguments on this separator
+    qualifier : Optional[str]
+        Append ``qualifier:value`` to the tool's positional search query
+    schema : Optional[dict]
+        Further JSON schema keywords, e.g. ``items``
+    """
+
+    __slots__ = (
+        "name", "type", "description", "required", "enum", "option", "switch",
+        "otherwise", "positional", "value_flag", "split", "qualifier", "schema",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        description: str,
+        required: bool = False,
+        enum: Optional[list[str]] = None,
+        option: Optional[str] = None,
+        switch: Optional[str] = None,
+        otherwise: Optional[str] = None,
+        positional: bool = False,
+        value_flag: bool = False,
+        split: Optional[str] = None,
+        qualifier: Optional[str] = None,
+        schema: Optional[dict[str, Any]] = None
+    ):
+        self.name = name
+        self.type = type
+        self.description = description
+        self.required = required
+        self.enum = enum
+        self.option = option
+        self.switch = switch
+        self.otherwise = otherwise
+        self.positional = positional
+        self.value_flag = value_flag
+        self.split = split
+        self.qualifier = qualifier
+        self.schema = schema
+
+    @property
+    def mapped(self) -> bool:
+        return bool(
+            self.option or self.switch or self.positional or self.value_flag or self.qualifier
+        )
+
+    def json_schema(self) -> dict[str, Any]:
+        schema: dict[str, Any] = {"type": self.type}
+        if self.enum is not None:
+            schema["enum"] = list(self.enum)
+        schema["description"] = self.description
+        if self.schema:
+            schema.update(self.schema)
+        return schema
+
+
+def parse_fields(value: Any) -> list[str]:
+    """
+    Parse a ``fields`` argument, a list of names or a comma-separated string.
+
+    Raises
+    ------
+    ValueError
+        If no field is named
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)):
+        raise ValueError("'fields' must be a list of field names")
+    fields = list(dict.fromkeys(str(field).strip() for field in value if str(field).strip()))
+    if not fields:
+        raise ValueError("'fields' must name at least one field")
+    return fields
+
+
+ArgsBuilder = Callable[[dict[str, Any]], tuple[list[str], Optional[str]]]
+
+
+class ToolSpec:
+    """
+    Definition of one tool.
+
+    Parameters
+    ----------
+    name : str
+        Tool name
+    description : str
+        Description shown to clients
+    params : list[Param]
+        Parameters, in the order their gh arguments are emitted
+    command : Optional[tuple[str, ...]]
+        gh subcommand, e.g. ``("pr", "list")``; None for tools the server
+        answers itself
+    json_fields : Optional[list[str]]
+        Fields requested with ``--json`` by default, unless the call opens a
+        browser
+    allowed_fields : Optional[list[str]]
+        Further ``--json`` fields callers may select with the ``fields``
+        argument, which is added to tools with ``json_fields``
+    build : Optional[Callable]
+        Custom argument builder returning the gh arguments and stdin data,
+        for tools whose arguments do not map one to one
+    idempotency : str
+        Retry classification, ``READ``, ``IDEMPOTENT`` or ``WRITE``
+    writes_with : tuple[str, ...]
+        Parameters that make a call a ``WRITE`` when set, e.g. a comment
+        posted by an otherwise idempotent command
+    timeout : Optional[float]
+        Default timeout in seconds, None for the server default
+    bulk : bool
+        Run in the bulk scheduler lane
+    cacheable : bool
+        Cache successful responses
+    invalidates : tuple[str, ...]
+        Cached tools whose responses a call makes stale
+    fanout : bool
+        Accept ``repositories`` and ``org`` to list many repositories at once
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        params: Optional[list[Param]] = None,
+        command: Optional[tuple[str, ...]] = None,
+        json_fields: Optional[list[str]] = None,
+        allowed_fields: Optional[list[str]] = None,
+        build: Optional[ArgsBuilder] = None,
+        idempotency: str = READ,
+        writes_with: tuple[str, ...] = (),
+        timeout: Optional[float] = None,
+        bulk: bool = False,
+        cacheable: bool = False,
+        invalidates: tuple[str, ...] = (),
+        fanout: bool = False
+    ):
+        self.name = name
+        self.description = description
+        self.params = list(params or [])
+        self.command = command
+        self.json_fields = json_fields
+        self.allowed_fields = sorted(set(json_fields or ()) | set(allowed_fields or ()))
+        if json_fields:
+            self.params.append(Param(
+                "fields",
+                "array",
+                f"JSON fields to return (default: {','.join(json_fields)}). "
+                "Request only what you need: fields like body, comments or mergeable are "
+                "expensive for GitHub to compute",
+                schema={"items": {"type": "string", "enum": self.allowed_fields}},
+            ))
+        self.build = build
+        self.idempotency = idempotency
+        self.writes_with = writes_with
+        self.timeout = timeout
+        self.bulk = bulk
+        self.cacheable = cacheable
+        self.invalidates = invalidates
+        self.fanout = fanout
+        if fanout:
+            self.params.extend([
+                Param(
+                    "repositories",
+                    "array",
+                    "List these repositories (OWNER/REPO) in parallel instead of one; results are "
+                    "merged, most recently updated first, up to 'limit' in total, and tagged with "
+                    "their repository",
+                    schema={"items": {"type": "string"}},
+                ),
+                Param(
+                    "org",
+                    "string",
+                    "List all non-archived repositories of this organization, like 'repositories'",
+                ),
+                Param("topic", "string", "With org: only repositories with this topic"),
+            ])
+        self._mapped = [param for param in self.params if param.mapped and not param.qualifier]
+        self._qualifiers = [param for param in self.params if param.qualifier]
+
+    @property
+    def default_limit(self) -> Optional[int]:
+        """gh's default ``--limit`` of the tool, None if it takes no limit."""
+        for param in self.params:
+            if param.name == "limit" and param.schema:
+                return param.schema.get("default")
+        return None
+
+    @property
+    def runs_gh(self) -> bool:
+        """True if the tool runs a gh command, False if the server answers it."""
+        return self.command is not None
+
+    def call_idempotency(self, arguments: dict[str, Any]) -> str:
+        """Return the retry classification of a call with ``arguments``."""
+        if any(arguments.get(name) for name in self.writes_with):
+            return WRITE
+        return self.idempotency
+
+    def input_schema(self) -> dict[str, Any]:
+        """Generate the JSON schema of the tool's arguments."""
+        schema: dict[str, Any] = {
+            "type": "object",
+            "properties": {param.name: param.json_schema() for param in self.params},
+        }
+        required = [param.name for param in self.params if param.required]
+        if required:
+            schema["required"] = required
+        return schema
+
+    def build_args(self, arguments: dict[str, Any]) -> tuple[list[str], Optional[str]]:
+        """
+        Build the gh arguments for a call.
+
+        Returns
+        -------
+        tuple
+            gh arguments and stdin data (None without input)
+
+        Raises
+        ------
+        KeyError
+            If a required argument is missing
+        ValueError
+            If the arguments are invalid
+        """
+        if self.build is not None:
+            return self.build(arguments)
+        args = list(self.command or ())
+        for param in self._mapped:
+            if param.switch:
+                if arguments.get(param.name):
+                    args.append(param.switch)
+                elif param.otherwise:
+                    args.append(param.otherwise)
+                continue
+            value = arguments[param.name] if param.required else arguments.get(param.name)
+            if value is None:
+                continue
+            if param.positional:
+                text = str(value) + "".join(
+                    f" {qualifier.qualifier}:{arguments[qualifier.name]}"
+                    for qualifier in self._qualifiers if arguments.get(qualifier.name) is not None
+                )
+                if param.split:
+                    args.extend(part.strip() for part in text.split(param.split))
+                else:
+                    args.append(text)
+            elif param.value_flag:
+                args.append("--" + str(value))
+            else:
+                args.extend([param.option, str(value)])
+        if self.json_fields and not arguments.get("web"):
+            args.extend(["--json", ",".join(self.selected_fields(arguments))])
+        return args, None
+
+    def selected_fields(self, arguments: dict[str, Any]) -> list[str]:
+        """
+        Return the ``--json`` fields a call requests.
+
+        Raises
+        ------
+        ValueError
+            If the call selects a field the tool does not allow
+        """
+        if arguments.get("fields") is None:
+            return list(self.json_fields or ())
+        fields = parse_fields(arguments["fields"])
+        unknown = [field for field in fields if field not in self.allowed_fields]
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s) for {self.name}: {', '.join(unknown)}. "
+                f"Available: {', '.join(self.allowed_fields)}"
+            )
+        return fields
+
+
+def build_api_args(arguments: dict[str, Any]) -> tuple[list[str], Optional[str]]:
+    """Build gh_api arguments; GraphQL queries are sent as a JSON body on stdin."""
+    input_data = None
+    if "query" in arguments:
+        if arguments["endpoint"].strip("/") != "graphql":
+            raise ValueError("The 'query' argument requires endpoint 'graphql'")
+        args = ["api", "graphql", "--input", "-"]
+        input_data = json.dumps({
+            "query": arguments["query"],
+            "variables": arguments.get("variables") or {}
+        })
+    else:
+        args = ["api", arguments["endpoint"]]
+    if "method" in arguments and "query" not in arguments:
+        args.extend(["--method", arguments["method"]])
+    if "field" in arguments:
+        args.extend(["--jq", f'.{arguments["field"]}'])
+    elif "jq" in arguments:
+        args.extend(["--jq", arguments["jq"]])
+    return args, input_data
+
+
+def repository(
+    description: str = "Repository in OWNER/REPO format (defaults to current repo)"
+) -> Param:
+    return Param("repository", "string", description, option="--repo")
+
+
+def limit(description: str, default: int) -> Param:
+    """Return a ``--limit`` parameter; ``default`` is gh's own default for the command."""
+    return Param(
+        "limit",
+        "number",
+        f"{description} (default: {default})",
+        option="--limit",
+        schema={"default": default},
+    )
+
+
+def web(description: str) -> Param:
+    return Param("web", "boolean", description, switch="--web")
+
+
+# Fields gh accepts with --json, per command
+REPO_FIELDS = [
+    "archivedAt", "assignableUsers", "codeOfConduct", "contactLinks", "createdAt",
+    "defaultBranchRef", "deleteBranchOnMerge", "description", "diskUsage", "forkCount",
+    "fundingLinks", "hasDiscussionsEnabled", "hasIssuesEnabled", "hasProjectsEnabled",
+    "hasWikiEnabled", "homepageUrl", "id", "isArchived", "isBlankIssuesEnabled", "isEmpty",
+    "isFork", "isInOrganization", "isMirror", "isPrivate", "isSecurityPolicyEnabled", "isTemplate",
+    "isUserConfigurationRepository", "issueTemplates", "issues", "labels", "languages",
+    "latestRelease", "licenseInfo", "mentionableUsers", "mergeCommitAllowed", "milestones",
+    "mirrorUrl", "name", "nameWithOwner", "openGraphImageUrl", "owner", "parent", "primaryLanguage",
+    "projects", "pullRequestTemplates", "pullRequests", "pushedAt", "rebaseMergeAllowed",
+    "repositoryTopics", "securityPolicyUrl", "squashMergeAllowed", "sshUrl", "stargazerCount",
+    "templateRepository", "updatedAt", "url", "usesCustomOpenGraphImage", "viewerCanAdminister",
+    "viewerDefaultCommitEmail", "viewerDefaultMergeMethod", "viewerHasStarred", "viewerPermission",
+    "viewerPossibleCommitEmails", "viewerSubscription", "visibility", "watchers",
+]
+
+PR_FIELDS = [
+    "additions", "assignees", "author", "autoMergeRequest", "baseRefName", "baseRefOid", "body",
+    "changedFiles", "closed", "closedAt", "closingIssuesReferences", "comments", "commits",
+    "createdAt", "deletions", "files", "fullDatabaseId", "headRefName", "headRefOid",
+    "headRepository", "headRepositoryOwner", "id", "isCrossRepository", "isDraft", "labels",
+    "latestReviews", "maintainerCanModify", "mergeCommit", "mergeStateStatus", "mergeable",
+    "mergedAt", "mergedBy", "milestone", "number", "potentialMergeCommit", "projectCards",
+    "projectItems", "reactionGroups", "reviewDecision", "reviewRequests", "reviews", "state",
+    "statusCheckRollup", "title", "updatedAt", "url",
+]
+
+ISSUE_FIELDS = [
+    "assignees", "author", "body", "closed", "closedAt", "closedByPullRequestsReferences",
+    "comments", "createdAt", "id", "isPinned", "labels", "milestone", "number", "projectCards",
+    "projectItems", "reactionGroups", "state", "stateReason", "title", "updatedAt", "url",
+]
+
+WORKFLOW_FIELDS = ["id", "name", "path", "state"]
+
+RUN_LIST_FIELDS = [
+    "attempt", "conclusion", "createdAt", "databaseId", "displayTitle", "event", "headBranch",
+    "headSha", "name", "number", "startedAt", "status", "updatedAt", "url", "workflowDatabaseId",
+    "workflowName",
+]
+
+RUN_VIEW_FIELDS = RUN_LIST_FIELDS + ["jobs"]
+
+RELEASE_LIST_FIELDS = [
+    "createdAt", "isDraft", "isLatest", "isPrerelease", "name", "publishedAt", "tagName",
+]
+
+RELEASE_VIEW_FIELDS = [
+    "apiUrl", "assets", "author", "body", "createdAt", "databaseId", "id", "isDraft",
+    "isPrerelease", "name", "publishedAt", "tagName", "tarballUrl", "targetCommitish", "uploadUrl",
+    "url", "zipballUrl",
+]
+
+SEARCH_REPO_FIELDS = [
+    "createdAt", "defaultBranch", "description", "forksCount", "fullName", "hasDownloads",
+    "hasIssues", "hasPages", "hasProjects", "hasWiki", "homepage", "id", "isArchived", "isDisabled",
+    "isFork", "isPrivate", "language", "license", "name", "openIssuesCount", "owner", "pushedAt",
+    "size", "stargazersCount", "updatedAt", "url", "visibility", "watchersCount",
+]
+
+SEARCH_ISSUE_FIELDS = [
+    "assignees", "author", "authorAssociation", "body", "closedAt", "commentsCount", "createdAt",
+    "id", "isLocked", "isPullRequest", "labels", "number", "repository", "state", "title",
+    "updatedAt", "url",
+]
+
+
+TOOL_SPECS = [
+    # Repository commands
+    ToolSpec(
+        "gh_repo_list",
+        "List repositories for a user or organization",
+        command=("repo", "list"),
+        params=[
+            Param(
+                "owner",
+                "string",
+                "Repository owner (user or org). If not specified, lists repos for the "
+                "authenticated user",
+                positional=True,
+            ),
+            limit("Maximum number of repositories to list", 30),
+            Param(
+                "visibility",
+                "string",
+                "Filter by repository visibility",
+                enum=["public", "private", "internal"],
+                value_flag=True,
+            ),
+        ],
+        json_fields=["name", "description", "url", "isPrivate", "stargazerCount", "updatedAt"],
+        allowed_fields=REPO_FIELDS,
+        bulk=True,
+    ),
+    ToolSpec(
+        "gh_repo_view",
+        "View information about a repository",
+        command=("repo", "view"),
+        params=[
+            Param(
+                "repository",
+                "string",
+                "Repository in OWNER/REPO format",
+                required=True,
+                positional=True,
+            ),
+            web("Open the repository in a web browser"),
+        ],
+        json_fields=[
+            "name", "description", "url", "isPrivate", "stargazerCount", "defaultBranchRef",
+            "createdAt", "updatedAt",
+        ],
+        allowed_fields=REPO_FIELDS,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_repo_create",
+        "Create a new repository",
+        command=("repo", "create"),
+        params=[
+            Param("name", "string", "Name of the repository", required=True, positional=True),
+            Param("description", "string", "Description of the repository", option="--description"),
+            Param(
+                "public",
+                "boolean",
+                "Make the repository public (default: private)",
+                switch="--public",
+                otherwise="--private",
+            ),
+            Param("clone", "boolean", "Clone the repository after creating", switch="--clone"),
+        ],
+        idempotency=WRITE,
+        timeout=120.0,
+    ),
+    # Pull Request commands
+    ToolSpec(
+        "gh_pr_list",
+        "List pull requests in a repository",
+        command=("pr", "list"),
+        params=[
+            repository(),
+            Param(
+                "state",
+                "string",
+                "Filter by state (default: open)",
+                enum=["open", "closed", "merged", "all"],
+                option="--state",
+            ),
+            limit("Maximum number of PRs to list", 30),
+            Param("assignee", "string", "Filter by assignee", option="--assignee"),
+            Param("author", "string", "Filter by author", option="--author"),
+            Param(
+                "since",
+                "string",
+                "Only items created or changed since this ISO 8601 timestamp, or \"last\" for "
+                "those changed since the previous call with \"last\" and the same filters. Oldest "
+                "change first (default limit: 1000). Author and assignee names are empty in this "
+                "mode",
+            ),
+        ],
+        json_fields=["number", "title", "state", "url", "author", "createdAt", "updatedAt"],
+        allowed_fields=PR_FIELDS,
+        bulk=True,
+        fanout=True,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_pr_view",
+        "View a pull request",
+        command=("pr", "view"),
+        params=[
+            Param("number", "number", "Pull request number", required=True, positional=True),
+            repository(),
+            Param("comments", "boolean", "View pull request comments", switch="--comments"),
+            web("Open the pull request in a web browser"),
+        ],
+        json_fields=[
+            "number", "title", "body", "state", "url", "author", "createdAt", "updatedAt",
+            "mergeable", "baseRefName", "headRefName",
+        ],
+        allowed_fields=PR_FIELDS,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_pr_create",
+        "Create a pull request",
+        command=("pr", "create"),
+        params=[
+            Param("title", "string", "Title of the pull request", option="--title"),
+            Param("body", "string", "Body/description of the pull request", option="--body"),
+            Param("base", "string", "Base branch (default: default branch)", option="--base"),
+            Param("head", "string", "Head branch (default: current branch)", option="--head"),
+            Param("draft", "boolean", "Create as draft pull request", switch="--draft"),
+            web("Open in browser to continue"),
+        ],
+        idempotency=WRITE,
+        invalidates=("gh_pr_list",),
+    ),
+    ToolSpec(
+        "gh_pr_merge",
+        "Merge a pull request",
+        command=("pr", "merge"),
+        params=[
+            Param("number", "number", "Pull request number", required=True, positional=True),
+            Param(
+                "merge_method",
+                "string",
+                "Merge method to use",
+                enum=["merge", "squash", "rebase"],
+                value_flag=True,
+            ),
+            Param(
+                "delete_branch",
+                "boolean",
+                "Delete the branch after merging",
+                switch="--delete-branch",
+            ),
+        ],
+        idempotency=WRITE,
+        invalidates=("gh_pr_list", "gh_pr_view"),
+    ),
+    ToolSpec(
+        "gh_pr_checkout",
+        "Check out a pull request in git",
+        command=("pr", "checkout"),
+        params=[
+            Param("number", "number", "Pull request number", required=True, positional=True),
+            Param("branch", "string", "Local branch name to use", positional=True),
+        ],
+        idempotency=IDEMPOTENT,
+        timeout=600.0,
+    ),
+    # Issue commands
+    ToolSpec(
+        "gh_issue_list",
+        "List issues in a repository",
+        command=("issue", "list"),
+        params=[
+            repository(),
+            Param(
+                "state",
+                "string",
+                "Filter by state (default: open)",
+                enum=["open", "closed", "all"],
+                option="--state",
+            ),
+            limit("Maximum number of issues to list", 30),
+            Param("assignee", "string", "Filter by assignee", option="--assignee"),
+            Param("author", "string", "Filter by author", option="--author"),
+            Param("label", "string", "Filter by label", option="--label"),
+            Param(
+                "since",
+                "string",
+                "Only items created or changed since this ISO 8601 timestamp, or \"last\" for "
+                "those changed since the previous call with \"last\" and the same filters. Oldest "
+                "change first (default limit: 1000). Author and assignee names are empty in this "
+                "mode",
+            ),
+        ],
+        json_fields=["number", "title", "state", "url", "author", "createdAt", "updatedAt"],
+        allowed_fields=ISSUE_FIELDS,
+        bulk=True,
+        fanout=True,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_issue_view",
+        "View an issue",
+        command=("issue", "view"),
+        params=[
+            Param("number", "number", "Issue number", required=True, positional=True),
+            repository(),
+            Param("comments", "boolean", "View issue comments", switch="--comments"),
+            web("Open the issue in a web browser"),
+        ],
+        json_fields=[
+            "number", "title", "body", "state", "url", "author", "createdAt", "updatedAt",
+            "labels",
+        ],
+        allowed_fields=ISSUE_FIELDS,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_issue_create",
+        "Create an issue",
+        command=("issue", "create"),
+        params=[
+            Param("title", "string", "Title of the issue", required=True, option="--title"),
+            Param("body", "string", "Body/description of the issue", option="--body"),
+            Param("assignee", "string", "GitHub username to assign", option="--assignee"),
+            Param("label", "string", "Comma-separated list of labels", option="--label"),
+            Param("milestone", "string", "Milestone to add the issue to", option="--milestone"),
+            web("Open in browser to continue"),
+        ],
+        idempotency=WRITE,
+        invalidates=("gh_issue_list",),
+    ),
+    ToolSpec(
+        "gh_issue_close",
+        "Close an issue",
+        command=("issue", "close"),
+        params=[
+            Param("number", "number", "Issue number", required=True, positional=True),
+            Param("comment", "string", "Comment to add when closing", option="--comment"),
+        ],
+        idempotency=IDEMPOTENT,
+        # A retried close would post the comment again
+        writes_with=("comment",),
+        invalidates=("gh_issue_list", "gh_issue_view"),
+    ),
+    # Workflow commands
+    ToolSpec(
+        "gh_workflow_list",
+        "List workflows in a repository",
+        command=("workflow", "list"),
+        params=[
+            repository(),
+            Param("all", "boolean", "Include disabled workflows", switch="--all"),
+        ],
+        json_fields=["id", "name", "state", "path"],
+        allowed_fields=WORKFLOW_FIELDS,
+        bulk=True,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_workflow_view",
+        "View details about a workflow",
+        command=("workflow", "view"),
+        params=[
+            Param("workflow", "string", "Workflow ID or name", required=True, positional=True),
+            repository(),
+            web("Open the workflow in a web browser"),
+        ],
+    ),
+    ToolSpec(
+        "gh_run_list",
+        "List recent workflow runs",
+        command=("run", "list"),
+        params=[
+            repository(),
+            Param("workflow", "string", "Filter by workflow name or ID", option="--workflow"),
+            limit("Maximum number of runs to list", 20),
+            Param(
+                "status",
+                "string",
+                "Filter by run status",
+                enum=["completed", "success", "failure", "in_progress", "queued"],
+                option="--status",
+            ),
+        ],
+        json_fields=[
+            "databaseId", "name", "displayTitle", "status", "conclusion", "createdAt", "updatedAt",
+            "url",
+        ],
+        allowed_fields=RUN_LIST_FIELDS,
+        bulk=True,
+        fanout=True,
+    ),
+    ToolSpec(
+        "gh_run_view",
+        "View details about a workflow run",
+        command=("run", "view"),
+        params=[
+            Param("run_id", "number", "Workflow run ID", required=True, positional=True),
+            repository(),
+            Param(
+                "log",
+                "boolean",
+                f"View the log. Without a selection the last {DEFAULT_LOG_TAIL} lines are returned",
+            ),
+            Param(
+                "job",
+                "string",
+                "With log: job ID, or a case-insensitive substring of the job name",
+            ),
+            Param("step", "string", "With log: case-insensitive substring of the step name"),
+            Param("grep", "string", "With log: only lines matching this regular expression"),
+            Param(
+                "tail",
+                "number",
+                f"With log: return the last N (matching) lines (max: {MAX_LOG_LINES})",
+            ),
+            Param("start_line", "number", "With log: first (matching) line to return, 1-based"),
+            Param("end_line", "number", "With log: last (matching) line to return, inclusive"),
+            Param(
+                "byte_offset",
+                "number",
+                "With log: return raw log bytes starting at this offset (use with byte_length)",
+            ),
+            Param(
+                "byte_length",
+                "number",
+                f"With log: number of raw bytes to return (default: {DEFAULT_LOG_BYTES}, "
+                f"max: {MAX_LOG_BYTES})"
+            ),
+            Param(
+                "max_lines",
+                "number",
+                f"With log: maximum number of lines to return (default: {DEFAULT_LOG_MAX_LINES}, "
+                f"max: {MAX_LOG_LINES})"
+            ),
+            web("Open the run in a web browser"),
+        ],
+        json_fields=[
+            "databaseId", "name", "displayTitle", "status", "conclusion", "createdAt", "updatedAt",
+            "url", "jobs",
+        ],
+        allowed_fields=RUN_VIEW_FIELDS,
+    ),
+    # Release commands
+    ToolSpec(
+        "gh_release_list",
+        "List releases in a repository",
+        command=("release", "list"),
+        params=[
+            repository(),
+            limit("Maximum number of releases to list", 30),
+        ],
+        json_fields=[
+            "tagName", "name", "createdAt", "publishedAt", "url", "isPrerelease", "isDraft",
+        ],
+        allowed_fields=RELEASE_LIST_FIELDS,
+        bulk=True,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_release_view",
+        "View information about a release",
+        command=("release", "view"),
+        params=[
+            Param("tag", "string", "Release tag (defaults to latest)", positional=True),
+            repository(),
+            web("Open the release in a web browser"),
+        ],
+        json_fields=[
+            "tagName", "name", "body", "createdAt", "publishedAt", "url", "isPrerelease",
+            "isDraft",
+        ],
+        allowed_fields=RELEASE_VIEW_FIELDS,
+        cacheable=True,
+    ),
+    ToolSpec(
+        "gh_release_create",
+        "Create a new release",
+        command=("release", "create"),
+        params=[
+            Param("tag", "string", "Tag name for the release", required=True, positional=True),
+            Param("title", "string", "Release title", option="--title"),
+            Param("notes", "string", "Release notes", option="--notes"),
+            Param("draft", "boolean", "Create as draft release", switch="--draft"),
+            Param("prerelease", "boolean", "Mark as pre-release", switch="--prerelease"),
+            Param(
+                "generate_notes",
+                "boolean",
+                "Automatically generate release notes",
+                switch="--generate-notes",
+            ),
+        ],
+        idempotency=WRITE,
+        timeout=300.0,
+        invalidates=("gh_release_list", "gh_release_view"),
+    ),
+    # API and general commands
+    ToolSpec(
+        "gh_api",
+        "Make an authenticated GitHub API request",
+        command=("api",),
+        build=build_api_args,
+        params=[
+            Param(
+                "endpoint",
+                "string",
+                "API endpoint (e.g., /repos/OWNER/REPO/issues), or 'graphql' together with 'query'",
+                required=True,
+            ),
+            Param(
+                "method",
+                "string",
+                "HTTP method (default: GET)",
+                enum=["GET", "POST", "PUT", "PATCH", "DELETE"],
+            ),
+            Param("field", "string", "JSON field to extract from response"),
+            Param("jq", "string", "jq expression to filter response"),
+            Param(
+                "fields",
+                "array",
+                "Keep only these keys of the response, or of each item of a list or page; dotted "
+                "paths select nested keys (e.g. ['number', 'title', 'user.login']). Applied by the "
+                "server, without running jq",
+                schema={"items": {"type": "string"}},
+            ),
+            Param(
+                "query",
+                "string",
+                "GraphQL query, used with endpoint 'graphql'. Paginated queries must declare "
+                "$endCursor: String and select pageInfo { hasNextPage endCursor }",
+            ),
+            Param("variables", "object", "GraphQL query variables"),
+            Param(
+                "paginate",
+                "boolean",
+                "Return one page of results as {items, next_cursor}; repeat the call with "
+                "'cursor' to get the next page",
+            ),
+            Param(
+                "cursor",
+                "string",
+                "Continuation cursor from a previous page (implies paginate)",
+            ),
+            Param("per_page", "number", "Page size for paginated REST requests (max: 100)"),
+            Param(
+                "max_items",
+                "number",
+                "Stop paginating once this many items have been returned in total",
+            ),
+        ],
+        # Classified per call from the method, see server.tool_idempotency()
+        idempotency=WRITE,
+    ),
+    ToolSpec(
+        "gh_auth_status",
+        "View authentication status",
+        command=("auth", "status"),
+        timeout=10.0,
+    ),
+    ToolSpec(
+        "gh_status",
+        "Print information about relevant issues, pull requests, and notifications",
+        command=("status",),
+        params=[
+            Param("org", "string", "Filter by organization", option="--org"),
+        ],
+        timeout=30.0,
+    ),
+    # Search commands
+    ToolSpec(
+        "gh_search_repos",
+        "Search for repositories",
+        command=("search", "repos"),
+        params=[
+            Param("query", "string", "Search query", required=True, positional=True),
+            limit("Maximum number of results", 30),
+            Param("language", "string", "Filter by programming language", qualifier="language"),
+            Param("stars", "string", "Filter by stars (e.g., '>1000')", qualifier="stars"),
+        ],
+        json_fields=["name", "description", "url", "stargazerCount", "language"],
+        allowed_fields=SEARCH_REPO_FIELDS,
+        bulk=True,
+        timeout=30.0,
+    ),
+    ToolSpec(
+        "gh_search_issues",
+        "Search for issues and pull requests",
+        command=("search", "issues"),
+        params=[
+            Param("query", "string", "Search query", required=True, positional=True),
+            limit("Maximum number of results", 30),
+            Param("state", "string", "Filter by state", enum=["open", "closed"], qualifier="state"),
+        ],
+        json_fields=["number", "title", "state", "url", "repository"],
+        allowed_fields=SEARCH_ISSUE_FIELDS,
+        bulk=True,
+        timeout=30.0,
+    ),
+    ToolSpec(
+        "gh_search_local",
+        "Search issues and pull requests in the local mirror (GH_MCP_MIRROR_REPOS) in "
+        "milliseconds, without using the Search API rate limit. Repositories that are not "
+        "mirrored are searched through the Search API",
+        params=[
+            Param(
+                "query",
+                "string",
+                "Words that must all occur in the title, body, labels or author",
+                required=True,
+            ),
+            Param(
+                "repository",
+                "string",
+                "Repository in OWNER/REPO format (default: all mirrored repositories)",
+            ),
+            Param("state", "string", "Filter by state", enum=["open", "closed"]),
+            Param("type", "string", "Only issues or only pull requests", enum=["issue", "pr"]),
+            Param("limit", "number", "Maximum number of results (default: 30)"),
+        ],
+    ),
+    # Gist commands
+    ToolSpec(
+        "gh_gist_list",
+        "List your gists",
+        command=("gist", "list"),
+        params=[
+            limit("Maximum number of gists to list", 10),
+            Param("public", "boolean", "Show only public gists", switch="--public"),
+            Param("secret", "boolean", "Show only secret gists", switch="--secret"),
+        ],
+        bulk=True,
+    ),
+    ToolSpec(
+        "gh_gist_create",
+        "Create a new gist",
+        command=("gist", "create"),
+        params=[
+            Param(
+                "files",
+                "string",
+                "Comma-separated list of file paths",
+                required=True,
+                positional=True,
+                split=",",
+            ),
+            Param("description", "string", "Description of the gist", option="--desc"),
+            Param("public", "boolean", "Make gist public (default: secret)", switch="--public"),
+        ],
+        idempotency=WRITE,
+        timeout=120.0,
+    ),
+    # Batch execution
+    ToolSpec(
+        "gh_batch",
+        "Run many tool calls in parallel in one request and return a combined result with per-call "
+        "success or error",
+        params=[
+            Param("calls", "array", "Tool calls to run", required=True, schema={
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {
+                            "type": "string",
+                            "description": "Tool name, e.g. gh_repo_view"
+                        },
+                        "arguments": {
+                            "type": "object",
+                            "description": "Arguments for the tool"
+                        }
+                    },
+                    "required": ["name"]
+                }
+            }),
+            Param("concurrency", "number", "Maximum number of calls running at once (default: 8)"),
+        ],
+    ),
+    # Continuation of responses over the size budget
+    ToolSpec(
+        "gh_fetch_more",
+        "Read more of a response that was too large to return at once. Responses over the size "
+        "budget end with a note giving a handle and the offset to continue from",
+        params=[
+            Param("handle", "string", "Handle from the truncated response", required=True),
+            Param("offset", "integer", "Byte offset to read from (default: 0)"),
+            Param(
+                "length",
+                "integer",
+                "Number of bytes to read (default: 65536, at most the response budget)",
+            ),
+        ],
+    ),
+    # Server introspection
+    ToolSpec(
+        "gh_server_stats",
+        "Report server statistics: gh process concurrency, queue depth and wait times per priority "
+        "lane, response cache hit ratio, conditional request counts, and per-tool latency (queue, "
+        "spawn, GitHub, formatting), output bytes, errors, timeouts and cache hit ratio",
+    ),
+    ToolSpec(
+        "gh_server_ratelimit",
+        "Report the GitHub rate-limit budget the server is pacing against: remaining requests and "
+        "reset time per resource, secondary limit backoff, and calls delayed or rejected by pacing",
+        params=[
+            Param(
+                "refresh",
+                "boolean",
+                "Query the rate_limit endpoint before reporting (does not count against the limit)",
+            ),
+        ],
+    ),
+]
+
+TOOLS = {spec.name: spec for spec in TOOL_SPECS}
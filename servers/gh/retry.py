@@ -0,0 +1,191 @@
+"""
+Automatic retries of transiently failed gh commands.
+
+Failures are classified from gh's error output. Some errors mean the request
+never reached GitHub or was rejected unprocessed (connection refused, DNS
+failures, rate-limit rejections). Retrying those is safe for every call.
+Others mean the request may have been processed (502/503/504, connection
+resets), and those are retried only for reads and idempotent writes. Delays
+grow exponentially with full jitter and respect ``Retry-After``.
+"""
+
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+try:
+    from .etag_store import parse_http_response
+except ImportError:  # running as a script: python server.py
+    from etag_store import parse_http_response
+
+
+# Idempotency classes of tools
+READ = "read"              # no side effects
+IDEMPOTENT = "idempotent"  # repeating the call leaves the same end state
+WRITE = "write"            # repeating the call may duplicate its effect
+
+# Failure kinds
+REJECTED = "rejected"      # the request was not processed
+TRANSIENT = "transient"    # the request may have been processed
+
+REJECTED_PATTERNS = (
+    "secondary rate limit",
+    "http 429",
+    "connection refused",
+    "no such host",
+    "could not resolve host",
+    "temporary failure in name resolution",
+    "network is unreachable",
+    "tls handshake timeout",
+    "failed to establish a new connection",
+    "nameresolutionerror",
+)
+
+TRANSIENT_PATTERNS = (
+    "http 500",
+    "http 502",
+    "http 503",
+    "http 504",
+    "bad gateway",
+    "service unavailable",
+    "gateway timeout",
+    "connection reset",
+    "connection aborted",
+    "broken pipe",
+    "unexpected eof",
+    "i/o timeout",
+    "read timed out",
+    "stream error",
+)
+
+
+def failure_kind(result: dict[str, Any]) -> Optional[str]:
+    """
+    Classify a failed command result.
+
+    Returns
+    -------
+    Optional[str]
+        ``REJECTED`` or ``TRANSIENT`` for retryable failures, None otherwise
+    """
+    if result.get("success"):
+        return None
+    stderr = result.get("stderr", "").lower()
+    if any(pattern in stderr for pattern in REJECTED_PATTERNS):
+        return REJECTED
+    if any(pattern in stderr for pattern in TRANSIENT_PATTERNS):
+        return TRANSIENT
+    status, _, _ = parse_http_response(result.get("stdout", ""))
+    if status == 429:
+        return REJECTED
+    if status in (500, 502, 503, 504):
+        return TRANSIENT
+    return None
+
+
+def retry_after(result: dict[str, Any]) -> Optional[float]:
+    """Return the ``Retry-After`` seconds of a result with included headers."""
+    _, headers, _ = parse_http_response(result.get("stdout", ""))
+    try:
+        return float(headers["retry-after"]) if "retry-after" in headers else None
+    except ValueError:
+        return None
+
+
+def is_retryable(idempotency: str, kind: Optional[str]) -> bool:
+    """Return True if a failure of ``kind`` may be retried for a call of ``idempotency``."""
+    if kind == REJECTED:
+        return True
+    return kind == TRANSIENT and idempotency in (READ, IDEMPOTENT)
+
+
+class RetryPolicy:
+    """
+    Retry transient failures with exponential backoff and full jitter.
+
+    Parameters
+    ----------
+    attempts : int
+        Total attempts per call; 1 disables retries
+    base_delay : float
+        Backoff ceiling of the first retry in seconds, doubled on each retry
+    max_delay : float
+        Upper bound of the backoff ceiling in seconds
+    max_retry_after : float
+        Calls asked to wait longer than this by ``Retry-After`` are not retried
+    rng : Callable[[], float]
+        Source of uniform numbers in [0, 1)
+    sleep : Callable[[float], Awaitable]
+        Coroutine function used to wait
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        max_retry_after: float = 60.0,
+        rng: Callable[[], float] = random.random,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self._rng = rng
+        self._sleep = sleep
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+
+    def delay(self, attempt: int, hint: Optional[float] = None) -> float:
+        """Return the wait before retry number ``attempt`` (0-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = ceiling * self._rng()
+        return max(delay, hint) if hint is not None else delay
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[dict[str, Any]]],
+        idempotency: str = READ
+    ) -> dict[str, Any]:
+        """
+        Run ``call`` until it succeeds, fails permanently or attempts run out.
+
+        Parameters
+        ----------
+        call : Callable[[], Awaitable[dict]]
+            Coroutine function returning a ``run_gh_command`` result dictionary
+        idempotency : str
+            ``READ``, ``IDEMPOTENT`` or ``WRITE``
+
+        Returns
+        -------
+        dict
+            The result of the last attempt
+        """
+        attempt = 0
+        while True:
+            result = await call()
+            if result["success"]:
+                if attempt:
+                    self.recovered += 1
+                return result
+            if not is_retryable(idempotency, failure_kind(result)):
+                return result
+            hint = retry_after(result)
+            if attempt + 1 >= self.attempts or (hint is not None and hint > self.max_retry_after):
+                if attempt:
+                    self.exhausted += 1
+                return result
+            self.retries += 1
+            await self._sleep(self.delay(attempt, hint))
+            attempt += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+        }
@@ -0,0 +1,215 @@
+"""
+Bounded concurrency scheduler for gh invocations.
+
+Every gh process must hold a slot from the scheduler. Slots are limited
+globally and per repository, and waiting calls are granted in priority lane
+order: interactive calls first, then bulk list/search calls, then background
+work. Queue depth and wait times are tracked so the limits can be sized.
+"""
+
+import asyncio
+import bisect
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+
+# Priority lanes, lower value is served first
+INTERACTIVE = 0
+BULK = 1
+BACKGROUND = 2
+
+LANE_NAMES = {
+    INTERACTIVE: "interactive",
+    BULK: "bulk",
+    BACKGROUND: "background",
+}
+
+# Number of recent wait times kept per lane for percentile reporting
+WAIT_SAMPLES = 1000
+
+
+class _Waiter:
+    """A queued request for a slot."""
+
+    __slots__ = ("lane", "seq", "repo", "future", "enqueued")
+
+    def __init__(self, lane: int, seq: int, repo: Optional[str], future: asyncio.Future):
+        self.lane = lane
+        self.seq = seq
+        self.repo = repo
+        self.future = future
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.lane, self.seq) < (other.lane, other.seq)
+
+
+class _LaneStats:
+    """Wait time accounting for one lane."""
+
+    def __init__(self):
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, wait: float) -> None:
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent.append(wait)
+
+    def snapshot(self, queued: int) -> dict[str, Any]:
+        recent = sorted(self.recent)
+        if len(recent) >= 2:
+            import statistics
+
+            cuts = statistics.quantiles(recent, n=100, method="inclusive")
+            p50, p95 = cuts[49], cuts[94]
+        else:
+            p50 = p95 = recent[0] if recent else 0.0
+        return {
+            "queued": queued,
+            "granted": self.granted,
+            "wait_mean_ms": (
+                round(1000 * self.total_wait / self.granted, 3) if self.granted else 0.0
+            ),
+            "wait_p50_ms": round(1000 * p50, 3),
+            "wait_p95_ms": round(1000 * p95, 3),
+            "wait_max_ms": round(1000 * self.max_wait, 3),
+        }
+
+
+class GhScheduler:
+    """
+    Limit the number of in-flight gh processes.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        Maximum number of gh processes running at once
+    max_per_repo : int
+        Maximum number of gh processes running at once against one repository
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_per_repo: int = 4):
+        if max_concurrency < 1 or max_per_repo < 1:
+            raise ValueError("Concurrency limits must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_per_repo = max_per_repo
+        self._in_flight = 0
+        self._per_repo: dict[str, int] = {}
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._lanes = {lane: _LaneStats() for lane in LANE_NAMES}
+
+    def _can_run(self, repo: Optional[str]) -> bool:
+        if self._in_flight >= self.max_concurrency:
+            return False
+        return repo is None or self._per_repo.get(repo, 0) < self.max_per_repo
+
+    def _take(self, repo: Optional[str]) -> None:
+        self._in_flight += 1
+        if repo is not None:
+            self._per_repo[repo] = self._per_repo.get(repo, 0) + 1
+
+    def _release(self, repo: Optional[str]) -> None:
+        self._in_flight -= 1
+        if repo is not None:
+            remaining = self._per_repo[repo] - 1
+            if remaining:
+                self._per_repo[repo] = remaining
+            else:
+                del self._per_repo[repo]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters in lane order, skipping repos at their limit."""
+        index = 0
+        while index < len(self._waiters) and self._in_flight < self.max_concurrency:
+            waiter = self._waiters[index]
+            if waiter.future.done() or not self._can_run(waiter.repo):
+                index += 1
+                continue
+            del self._waiters[index]
+            self._take(waiter.repo)
+            waiter.future.set_result(None)
+
+    async def acquire(self, repo: Optional[str] = None, lane: int = INTERACTIVE) -> float:
+        """
+        Wait for a slot.
+
+        Parameters
+        ----------
+        repo : Optional[str]
+            Repository in OWNER/REPO format the call targets, if known
+        lane : int
+            Priority lane (INTERACTIVE, BULK or BACKGROUND)
+
+        Returns
+        -------
+        float
+            Seconds spent waiting for the slot
+        """
+        repo = repo.lower() if repo else None
+        if self._can_run(repo):
+            self._take(repo)
+            self._lanes[lane].record(0.0)
+            return 0.0
+
+        waiter = _Waiter(lane, next(self._seq), repo, asyncio.get_running_loop().create_future())
+        bisect.insort(self._waiters, waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as the caller gave up on it
+                self._release(repo)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        wait = time.monotonic() - waiter.enqueued
+        self._lanes[lane].record(wait)
+        return wait
+
+    def release(self, repo: Optional[str] = None) -> None:
+        """Return a slot obtained from :meth:`acquire`."""
+        self._release(repo.lower() if repo else None)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        repo: Optional[str] = None,
+        lane: int = INTERACTIVE
+    ) -> AsyncIterator[float]:
+        """Hold a slot for the duration of the ``async with`` block, yielding the wait time."""
+        wait = await self.acquire(repo, lane)
+        try:
+            yield wait
+        finally:
+            self.release(repo)
+
+    def queue_depth(self) -> int:
+        """Number of calls currently waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.future.done())
+
+    def stats(self) -> dict[str, Any]:
+        """Return a JSON-serializable snapshot of limits, queue depth and wait times."""
+        queued = {lane: 0 for lane in LANE_NAMES}
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                queued[waiter.lane] += 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_per_repo": self.max_per_repo,
+            "in_flight": self._in_flight,
+            "in_flight_per_repo": dict(self._per_repo),
+            "queue_depth": sum(queued.values()),
+            "lanes": {
+                name: self._lanes[lane].snapshot(queued[lane])
+                for lane, name in LANE_NAMES.items()
+            },
+        }
@@ -7,989 +7,1307 @@ through the Model Context Protocol (MCP).
 """
 
 import asyncio
+import contextlib
+import functools
 import json
-import subprocess
-from typing import Any, Optional
+import logging
+import re
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
 
 from mcp.server import Server
-from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
+from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource, ToolAnnotations
 
+try:
+    from .batch import run_calls
+    from .batcher import ViewBatcher
+    from .cache import ResponseCache
+    from .cassette import REPLAY, Cassette
+    from .config import env_bool, env_float, env_float_map, env_int, env_str
+    from .credentials import GhCredentials, is_rejected
+    from .etag_store import ETagStore, conditional_api_request, default_cache_dir, open_store
+    from .fanout import UPDATED, FanoutError, fan_out, parse_repositories
+    from .executor import run_process
+    from .formatting import FORMATS, PRETTY, encode_output, format_output
+    from .http_backend import HttpBackend
+    from .logs import (
+        DEFAULT_LOG_BYTES,
+        DEFAULT_LOG_MAX_LINES,
+        DEFAULT_LOG_TAIL,
+        MAX_LOG_BYTES,
+        MAX_LOG_LINES,
+        LogSpool,
+        default_spool_dir,
+        read_byte_range,
+        select_lines,
+        selection_size,
+    )
+    from .metrics import (
+        FORMAT,
+        GITHUB,
+        QUEUE,
+        ToolMetrics,
+        add_phase,
+        add_stdout_bytes,
+        note_cache,
+        note_timeout,
+        phase,
+    )
+    from .mirror import SEARCH_FIELDS, IssueMirror
+    from .pagination import PAGE_KEYS, fetch_graphql_page, fetch_rest_page
+    from .ratelimit import RateLimitExceeded, RateLimitGovernor
+    from .readiness import GhReadiness
+    from .registry import TOOLS, TOOL_SPECS, ToolSpec, parse_fields
+    from .retry import IDEMPOTENT, READ, WRITE, RetryPolicy
+    from .scheduler import BACKGROUND, BULK, INTERACTIVE, GhScheduler
+    from .spill import SpillStore, default_spill_dir, utf8_prefix
+    from .sync import (
+        ISSUE,
+        PULL_REQUEST,
+        SyncError,
+        SyncState,
+        Watermark,
+        export_item,
+        list_changes,
+        parse_since,
+        sync_key,
+        unsupported_fields,
+    )
+except ImportError:  # running as a script: python server.py
+    from batch import run_calls
+    from batcher import ViewBatcher
+    from cache import ResponseCache
+    from cassette import REPLAY, Cassette
+    from config import env_bool, env_float, env_float_map, env_int, env_str
+    from credentials import GhCredentials, is_rejected
+    from etag_store import ETagStore, conditional_api_request, default_cache_dir, open_store
+    from fanout import UPDATED, FanoutError, fan_out, parse_repositories
+    from executor import run_process
+    from formatting import FORMATS, PRETTY, encode_output, format_output
+    from http_backend import HttpBackend
+    from logs import (
+        DEFAULT_LOG_BYTES,
+        DEFAULT_LOG_MAX_LINES,
+        DEFAULT_LOG_TAIL,
+        MAX_LOG_BYTES,
+        MAX_LOG_LINES,
+        LogSpool,
+        default_spool_dir,
+        read_byte_range,
+        select_lines,
+        selection_size,
+    )
+    from metrics import (
+        FORMAT,
+        GITHUB,
+        QUEUE,
+        ToolMetrics,
+        add_phase,
+        add_stdout_bytes,
+        note_cache,
+        note_timeout,
+        phase,
+    )
+    from mirror import SEARCH_FIELDS, IssueMirror
+    from pagination import PAGE_KEYS, fetch_graphql_page, fetch_rest_page
+    from ratelimit import RateLimitExceeded, RateLimitGovernor
+    from readiness import GhReadiness
+    from registry import TOOLS, TOOL_SPECS, ToolSpec, parse_fields
+    from retry import IDEMPOTENT, READ, WRITE, RetryPolicy
+    from scheduler import BACKGROUND, BULK, INTERACTIVE, GhScheduler
+    from spill import SpillStore, default_spill_dir, utf8_prefix
+    from sync import (
+        ISSUE,
+        PULL_REQUEST,
+        SyncError,
+        SyncState,
+        Watermark,
+        export_item,
+        list_changes,
+        parse_since,
+        sync_key,
+        unsupported_fields,
+    )
+
+
+logger = logging.getLogger(__name__)
 
 app = Server("gh-server")
 
+scheduler = GhScheduler(
+    max_concurrency=env_int("GH_MCP_MAX_CONCURRENCY", 8),
+    max_per_repo=env_int("GH_MCP_MAX_PER_REPO", 4)
+)
+
+response_cache = ResponseCache(
+    max_entries=env_int("GH_MCP_CACHE_SIZE", 256),
+    ttl=env_float("GH_MCP_CACHE_TTL", 30.0)
+)
+
+@functools.lru_cache(maxsize=None)
+def get_etag_store() -> Optional[ETagStore]:
+    """
+    Return the conditional-request store for GET gh_api calls.
+
+    The SQLite file is opened on first use rather than at startup. Returns
+    None when the store is disabled, and with a cassette, whose recorded
+    arguments would otherwise depend on the store's contents.
+    """
+    if cassette is not None:
+        return None
+    return open_store(
+        env_str("GH_MCP_ETAG_STORE"),
+        max_entries=env_int("GH_MCP_ETAG_MAX_ENTRIES", 5000)
+    )
+
+
+GH_HOST = env_str("GH_HOST", "github.com")
+
+# Repositories whose issues and pull requests are mirrored for gh_search_local
+MIRROR_REPOSITORIES = [
+    name.strip() for name in env_str("GH_MCP_MIRROR_REPOS", "").split(",") if name.strip()
+]
+MIRROR_INTERVAL = env_float("GH_MCP_MIRROR_INTERVAL", 300.0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_mirror() -> Optional[IssueMirror]:
+    """
+    Return the local issue mirror, opening its SQLite file on first use.
+
+    Returns None when no repositories are mirrored or the file cannot be opened.
+    """
+    if not MIRROR_REPOSITORIES:
+        return None
+    import sqlite3
+
+    path = env_str("GH_MCP_MIRROR_PATH") or default_cache_dir() / "mirror.sqlite3"
+    try:
+        return IssueMirror(path, MIRROR_REPOSITORIES)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Issue mirror disabled, cannot open %s: %s", path, e)
+        return None
+
+
+def create_cassette() -> Optional[Cassette]:
+    """
+    Create the cassette selected by GH_MCP_CASSETTE and GH_MCP_CASSETTE_MODE.
+
+    Returns
+    -------
+    Optional[Cassette]
+        Cassette gh invocations are recorded to or replayed from, or None
+    """
+    path = env_str("GH_MCP_CASSETTE")
+    if not path:
+        return None
+    return Cassette(
+        path,
+        mode=env_str("GH_MCP_CASSETTE_MODE", REPLAY).lower(),
+        run=run_process,
+        latency=env_float("GH_MCP_CASSETTE_LATENCY", 0.0)
+    )
+
+
+cassette = create_cassette()
+
+# Runs gh, through the cassette when one is recorded or replayed
+run_gh_process = cassette.run if cassette is not None else run_process
+
+# Token and environment for gh children, resolved once instead of per spawn
+credentials = GhCredentials(
+    run_gh_process,
+    host=GH_HOST,
+    ttl=env_float("GH_MCP_TOKEN_TTL", 3600.0),
+    passthrough=env_str("GH_MCP_ENV_PASSTHROUGH", "").replace(",", " ").split()
+)
+
+
+async def probe_rate_limit() -> dict[str, Any]:
+    """Fetch the current rate-limit budgets; the endpoint itself is not rate limited."""
+    return await run_gh_command(
+        ["api", "rate_limit"],
+        lane=BACKGROUND,
+        timeout=15,
+        idempotency=READ
+    )
+
+
+# Paces calls to stay within GitHub's primary and secondary rate limits
+governor = RateLimitGovernor(
+    rate=env_float("GH_MCP_RATE_LIMIT_RPS", 15.0),
+    burst=env_float("GH_MCP_RATE_LIMIT_BURST", 30.0),
+    reserve=env_float("GH_MCP_RATE_LIMIT_RESERVE", 0.1),
+    max_wait=env_float("GH_MCP_RATE_LIMIT_MAX_WAIT", 60.0),
+    probe=probe_rate_limit,
+    probe_interval=env_float("GH_MCP_RATE_LIMIT_PROBE_INTERVAL", 300.0)
+)
+
+
+# Retries of transient failures, with exponential backoff and jitter
+retry_policy = RetryPolicy(
+    attempts=env_int("GH_MCP_RETRY_ATTEMPTS", 3),
+    base_delay=env_float("GH_MCP_RETRY_BASE_DELAY", 0.5),
+    max_delay=env_float("GH_MCP_RETRY_MAX_DELAY", 8.0)
+)
+
+
+def create_backend() -> Optional[HttpBackend]:
+    """
+    Create the backend selected by GH_MCP_BACKEND.
+
+    Returns
+    -------
+    Optional[HttpBackend]
+        The direct HTTP backend for ``http``, or None to spawn gh for every call
+    """
+    backend = env_str("GH_MCP_BACKEND", "gh").lower()
+    if backend == "gh":
+        return None
+    if backend != "http":
+        raise ValueError(f"GH_MCP_BACKEND must be 'gh' or 'http', got {backend!r}")
+    if cassette is not None:
+        logger.warning("GH_MCP_BACKEND=http is ignored while a cassette is recorded or replayed")
+        return None
+    try:
+        return HttpBackend(
+            credentials.token,
+            host=GH_HOST,
+            pool_size=scheduler.max_concurrency,
+            on_response=governor.observe_headers
+        )
+    except ImportError:
+        logger.warning("GH_MCP_BACKEND=http needs the requests package, falling back to gh")
+        return None
+
+
+http_backend = create_backend()
+
+# gh installation and authentication, checked in the background at startup
+readiness = GhReadiness(run_gh_process, host=GH_HOST)
+
+# Workflow run logs are spooled to disk and served in selections
+log_spool = LogSpool(
+    Path(env_str("GH_MCP_LOG_SPOOL_DIR") or default_spool_dir()),
+    max_bytes=env_int("GH_MCP_LOG_SPOOL_MAX_MB", 2048) * 1024 * 1024,
+    max_age=env_float("GH_MCP_LOG_SPOOL_MAX_AGE", 3600)
+)
+LOG_TIMEOUT = env_float("GH_MCP_LOG_TIMEOUT", 600)
+
+# Responses over the budget are spilled to disk and continued with gh_fetch_more
+spill_store = SpillStore(
+    Path(env_str("GH_MCP_SPILL_DIR") or default_spill_dir()),
+    max_bytes=env_int("GH_MCP_SPILL_MAX_MB", 1024) * 1024 * 1024,
+    max_age=env_float("GH_MCP_SPILL_MAX_AGE", 3600)
+)
+RESPONSE_BUDGET = env_int("GH_MCP_RESPONSE_BUDGET", 256 * 1024)
+RESPONSE_PREVIEW = env_int("GH_MCP_RESPONSE_PREVIEW", 64 * 1024)
+
+# Read-only tools whose successful responses are cached
+CACHEABLE_TOOLS = {spec.name for spec in TOOL_SPECS if spec.cacheable}
+
+# Cached tools whose responses a write tool makes stale
+INVALIDATED_BY = {spec.name: set(spec.invalidates) for spec in TOOL_SPECS if spec.invalidates}
+
+# Per-tool latency, output size, error and cache metrics
+tool_metrics = ToolMetrics()
+METRICS_TEXTFILE = env_str("GH_MCP_METRICS_TEXTFILE")
+METRICS_INTERVAL = env_float("GH_MCP_METRICS_INTERVAL", 15.0)
+
+
+def create_profiler() -> Optional[Any]:
+    """
+    Create the profiler when GH_MCP_PROFILE is set.
+
+    The profiling module, which loads tracemalloc, is only imported then.
+
+    Returns
+    -------
+    Optional[Profiler]
+        Profiler of tool calls and event-loop stalls, or None
+    """
+    if not env_bool("GH_MCP_PROFILE"):
+        return None
+    try:
+        from .profiling import Profiler
+    except ImportError:  # running as a script: python server.py
+        from profiling import Profiler
+    return Profiler(
+        slowest=env_int("GH_MCP_PROFILE_SLOWEST", 10),
+        interval=env_float("GH_MCP_PROFILE_INTERVAL", 0.005),
+        stall_threshold=env_float("GH_MCP_STALL_THRESHOLD", 0.1),
+        memory=env_bool("GH_MCP_PROFILE_MEMORY", True)
+    )
+
+
+profiler = create_profiler()
+
+# View tools that can be coalesced into batched GraphQL queries
+BATCHED_VIEWS = {
+    "gh_pr_view": "pr",
+    "gh_issue_view": "issue",
+}
+
+# Output encoding of gh results, overridable per call with the 'format' argument
+DEFAULT_OUTPUT_FORMAT = env_str("GH_MCP_OUTPUT_FORMAT", PRETTY)
+if DEFAULT_OUTPUT_FORMAT not in FORMATS:
+    raise ValueError(
+        f"GH_MCP_OUTPUT_FORMAT must be one of {', '.join(FORMATS)}, got {DEFAULT_OUTPUT_FORMAT!r}"
+    )
+
+OUTPUT_FORMAT_PROPERTY = {
+    "type": "string",
+    "enum": list(FORMATS),
+    "description": (
+        f"Output encoding (default: {DEFAULT_OUTPUT_FORMAT}): pretty (indented JSON), "
+        "json (minified), jsonl (one JSON object per line), tsv (header row then "
+        "tab-separated values), raw (gh output unchanged)"
+    )
+}
+
+# Arguments that only change how a result is presented, not what is fetched
+PRESENTATION_ARGUMENTS = {"format"}
+
+# Limits for list tools fanned out over 'repositories' or an 'org'
+FANOUT_CONCURRENCY = env_int("GH_MCP_FANOUT_CONCURRENCY", 8)
+FANOUT_MAX_REPOSITORIES = env_int("GH_MCP_FANOUT_MAX_REPOS", 200)
+
+# Incremental 'since' listings: item kind per tool, and the watermarks kept per listing
+SYNC_KINDS = {"gh_issue_list": ISSUE, "gh_pr_list": PULL_REQUEST}
+SYNC_DEFAULT_LIMIT = 1000
+sync_state = SyncState()
+
+# Bulk list and search tools yield to interactive calls when the scheduler is saturated
+BULK_TOOLS = {spec.name for spec in TOOL_SPECS if spec.bulk}
 
-def run_gh_command(args: list[str], input_data: Optional[str] = None) -> dict[str, Any]:
+# Seconds before a tool's gh process is killed. Tools without their own
+# timeout use GH_MCP_TIMEOUT; GH_MCP_TIMEOUTS overrides single tools, e.g.
+# "gh_pr_checkout=1800,gh_auth_status=5".
+DEFAULT_TIMEOUT = env_float("GH_MCP_TIMEOUT", 60.0)
+TOOL_TIMEOUTS = {spec.name: spec.timeout for spec in TOOL_SPECS if spec.timeout is not None}
+TOOL_TIMEOUTS.update(env_float_map("GH_MCP_TIMEOUTS"))
+
+
+def tool_timeout(name: str) -> Optional[float]:
+    """Return the timeout of a tool in seconds, None if it may run indefinitely."""
+    timeout = TOOL_TIMEOUTS.get(name, DEFAULT_TIMEOUT)
+    return timeout if timeout > 0 else None
+
+
+def tool_repository(name: str, arguments: dict[str, Any]) -> Optional[str]:
+    """
+    Return the OWNER/REPO a tool call targets, if it can be determined.
+
+    Parameters
+    ----------
+    name : str
+        Tool name
+    arguments : dict
+        Tool arguments
+
+    Returns
+    -------
+    Optional[str]
+        Repository in OWNER/REPO format, or None for calls that are not
+        scoped to an explicit repository
+    """
+    if arguments.get("repository"):
+        return arguments["repository"]
+    if name == "gh_api":
+        parts = arguments.get("endpoint", "").strip("/").split("/")
+        if len(parts) >= 3 and parts[0] == "repos":
+            return f"{parts[1]}/{parts[2]}"
+    return None
+
+
+async def run_gh_command(
+    args: list[str],
+    input_data: Optional[str] = None,
+    repository: Optional[str] = None,
+    lane: int = INTERACTIVE,
+    timeout: Optional[float] = 60,
+    on_stdout: Optional[Callable[[bytes], None]] = None,
+    idempotency: str = WRITE
+) -> dict[str, Any]:
     """
     Execute a gh command and return the result.
 
+    The command is first paced by the rate-limit governor, then runs once
+    the scheduler grants it a slot, so concurrent tool calls run in parallel
+    up to the configured global and per-repository limits. With the HTTP
+    backend enabled, ``gh api`` requests it supports are sent over a pooled
+    connection; everything else runs as a gh subprocess. Transient failures
+    are retried with backoff as far as the idempotency class of the call
+    allows.
+
     Parameters
     ----------
     args : list[str]
         Command arguments to pass to gh CLI
     input_data : Optional[str]
         Optional stdin input for the command
+    repository : Optional[str]
+        Repository the command targets, used for per-repository limits
+    lane : int
+        Scheduler priority lane (INTERACTIVE, BULK or BACKGROUND)
+    timeout : Optional[float]
+        Seconds before the command is killed
+    on_stdout : Optional[Callable[[bytes], None]]
+        Receives stdout chunks as they arrive instead of buffering them;
+        streamed commands are not retried
+    idempotency : str
+        READ, IDEMPOTENT or WRITE, deciding which failures are retried
 
     Returns
     -------
     dict
         Dictionary with 'stdout', 'stderr', 'returncode' keys
     """
+    if on_stdout is not None:
+        stream = on_stdout
+        streamed = 0
+
+        # Runs in the executor's pipe reader task, outside the call's metrics
+        def on_stdout(chunk: bytes) -> None:
+            nonlocal streamed
+            streamed += len(chunk)
+            stream(chunk)
+
+    if profiler is not None:
+        profiler.note_command(args)
+
+    async def attempt() -> dict[str, Any]:
+        try:
+            with phase(QUEUE):
+                await governor.acquire(args, input_data)
+        except RateLimitExceeded as e:
+            return {"stdout": "", "stderr": str(e), "returncode": 1, "success": False}
+        async with scheduler.slot(repository, lane) as wait:
+            add_phase(QUEUE, wait)
+            with phase(GITHUB):
+                result = None
+                if http_backend is not None and on_stdout is None:
+                    result = await http_backend.execute(args, input_data, timeout=timeout)
+                if result is None:
+                    argv = credentials.argv(args)
+                    env = await credentials.environment()
+                    result = await run_gh_process(
+                        argv, input_data=input_data, timeout=timeout, on_stdout=on_stdout, env=env
+                    )
+                    if is_rejected(result) and on_stdout is None:
+                        env = await credentials.rejected()
+                        result = await run_gh_process(
+                            argv, input_data=input_data, timeout=timeout, env=env
+                        )
+        governor.observe(args, result)
+        if result["returncode"] == -1 and result["stderr"].startswith("Command timed out"):
+            note_timeout()
+        if result["stdout"]:
+            add_stdout_bytes(len(result["stdout"].encode("utf-8")))
+        return result
+
+    if on_stdout is not None:
+        # Chunks already passed on cannot be taken back
+        result = await attempt()
+        add_stdout_bytes(streamed)
+        return result
+    return await retry_policy.run(attempt, idempotency)
+
+
+async def read_run_log(arguments: dict[str, Any]) -> tuple[bool, str]:
+    """
+    Serve a selection of a workflow run log.
+
+    The log is streamed to the spool once and selections are read from the
+    memory-mapped file, so the full log is never held in memory.
+
+    Parameters
+    ----------
+    arguments : dict
+        gh_run_view arguments
+
+    Returns
+    -------
+    tuple
+        Success flag and the selected log text
+    """
+    run_id = str(arguments["run_id"])
+    repository = arguments.get("repository")
+    job = str(arguments["job"]) if "job" in arguments else None
+    job_id = job if job is not None and job.isdigit() else None
+
+    try:
+        byte_offset = selection_size(arguments, "byte_offset")
+        byte_length = selection_size(arguments, "byte_length", MAX_LOG_BYTES)
+        tail = selection_size(arguments, "tail", MAX_LOG_LINES)
+        start_line = selection_size(arguments, "start_line")
+        end_line = selection_size(arguments, "end_line")
+        max_lines = selection_size(arguments, "max_lines", MAX_LOG_LINES)
+    except ValueError as e:
+        return False, str(e)
+
+    args = ["run", "view", run_id, "--log"]
+    if repository:
+        args.extend(["--repo", repository])
+    if job_id:
+        args.extend(["--job", job_id])
+    key = json.dumps([GH_HOST, (repository or "").lower(), run_id, job_id])
+
+    async def download(write: Callable[[bytes], None]) -> dict[str, Any]:
+        return await run_gh_command(
+            args,
+            repository=repository,
+            lane=BULK,
+            timeout=LOG_TIMEOUT,
+            on_stdout=write,
+            idempotency=READ
+        )
+
+    try:
+        path, result = await log_spool.fetch(key, download)
+    except OSError as e:
+        return False, f"Cannot use the log spool: {e}"
+    if path is None:
+        error_msg = f"Command failed with return code {result['returncode']}\n"
+        if result["stderr"]:
+            error_msg += f"Error: {result['stderr']}\n"
+        return False, error_msg
+
+    size = path.stat().st_size
+    if byte_offset is not None:
+        length = DEFAULT_LOG_BYTES if byte_length is None else byte_length
+        data = await asyncio.to_thread(read_byte_range, path, byte_offset, length)
+        header = f"# bytes {byte_offset}-{byte_offset + len(data)} of {size}"
+        return True, header + "\n" + data.decode("utf-8", errors="replace")
+
+    if tail is None and start_line is None and end_line is None:
+        tail = DEFAULT_LOG_TAIL
+    try:
+        selection = await asyncio.to_thread(
+            select_lines,
+            path,
+            job=None if job_id else job,
+            step=arguments.get("step"),
+            pattern=arguments.get("grep"),
+            tail=tail,
+            start_line=start_line,
+            end_line=end_line,
+            max_lines=DEFAULT_LOG_MAX_LINES if max_lines is None else max_lines
+        )
+    except re.error as e:
+        return False, f"Invalid grep pattern: {e}"
+
+    header = f"# log size {size} bytes, {len(selection['lines'])} lines returned"
+    if selection["matched"] is not None:
+        header += f", {selection['matched']} lines matched"
+    if selection["truncated"]:
+        header += " (truncated, narrow the selection or raise max_lines)"
+    return True, header + "\n" + "\n".join(selection["lines"])
+
+
+def tool_idempotency(name: str, arguments: dict[str, Any]) -> str:
+    """
+    Return the retry classification of a tool call.
+
+    gh_api calls are classified by their HTTP semantics: GET requests and
+    GraphQL queries are reads, PUT and DELETE are idempotent, anything else
+    is a write. Other tools use their registry classification, which some
+    arguments turn into a write (see ``ToolSpec.writes_with``).
+    """
+    if name == "gh_api":
+        if not is_api_write(arguments):
+            return READ
+        if "query" not in arguments and arguments.get("method") in ("PUT", "DELETE"):
+            return IDEMPOTENT
+        return WRITE
+    return TOOLS[name].call_idempotency(arguments) if name in TOOLS else READ
+
+
+def is_api_write(arguments: dict[str, Any]) -> bool:
+    """Return True if a gh_api call may modify data (non-GET request or GraphQL mutation)."""
+    if "query" in arguments:
+        return arguments["query"].lstrip().startswith("mutation")
+    return arguments.get("method", "GET") != "GET"
+
+
+def api_projection(arguments: dict[str, Any]) -> Optional[list[str]]:
+    """
+    Return the keys a gh_api call keeps of its response, None to keep all.
+
+    Pages keep their cursor and counts, and their items are projected.
+
+    Raises
+    ------
+    ValueError
+        If the 'fields' argument names no field
+    """
+    if arguments.get("fields") is None:
+        return None
+    fields = parse_fields(arguments["fields"])
+    if arguments.get("paginate") or arguments.get("cursor"):
+        return [f"items.{field}" for field in fields] + PAGE_KEYS
+    return fields
+
+
+async def fetch_api_page(arguments: dict[str, Any], run: Any) -> dict[str, Any]:
+    """
+    Fetch one page of a paginated gh_api call.
+
+    Parameters
+    ----------
+    arguments : dict
+        gh_api arguments
+    run : Callable
+        Coroutine function executing gh arguments
+
+    Returns
+    -------
+    dict
+        Result dictionary whose stdout holds the page and its continuation cursor
+    """
     try:
-        result = subprocess.run(
-            ["gh"] + args,
-            capture_output=True,
-            text=True,
-            input=input_data,
-            timeout=60
+        if "jq" in arguments or "field" in arguments:
+            raise ValueError("'jq' and 'field' cannot be combined with pagination")
+        max_items = int(arguments["max_items"]) if "max_items" in arguments else None
+        if "query" in arguments:
+            return await fetch_graphql_page(
+                run,
+                arguments["query"],
+                arguments.get("variables"),
+                cursor=arguments.get("cursor"),
+                max_items=max_items
+            )
+        if arguments.get("method", "GET") != "GET":
+            raise ValueError("Only GET requests can be paginated")
+        return await fetch_rest_page(
+            run,
+            arguments["endpoint"],
+            per_page=int(arguments["per_page"]) if "per_page" in arguments else None,
+            cursor=arguments.get("cursor"),
+            max_items=max_items
         )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode,
-            "success": result.returncode == 0
-        }
-    except subprocess.TimeoutExpired:
-        return {
-            "stdout": "",
-            "stderr": "Command timed out after 60 seconds",
-            "returncode": -1,
-            "success": False
-        }
-    except Exception as e:
-        return {
-            "stdout": "",
-            "stderr": str(e),
-            "returncode": -1,
-            "success": False
-        }
+    except ValueError as e:
+        return {"stdout": "", "stderr": str(e), "returncode": 1, "success": False}
+
+
+async def run_graphql_query(query: str) -> dict[str, Any]:
+    """Run a GraphQL query through ``gh api graphql``."""
+    return await run_gh_command(["api", "graphql", "-f", f"query={query}"], idempotency=READ)
+
+
+view_batcher = ViewBatcher(
+    run_graphql_query,
+    window=env_float("GH_MCP_BATCH_WINDOW_MS", 15) / 1000,
+    max_batch=env_int("GH_MCP_BATCH_MAX", 50)
+)
+
+
+async def execute_tool(
+    name: str,
+    arguments: dict[str, Any],
+    args: list[str],
+    input_data: Optional[str] = None
+) -> dict[str, Any]:
+    """
+    Run the gh command for a tool call.
+
+    The call goes through the response cache, the view batcher, the ETag
+    store and gh_api pagination where they apply.
+
+    Parameters
+    ----------
+    name : str
+        Tool name
+    arguments : dict
+        Tool arguments
+    args : list[str]
+        gh arguments built for the call
+    input_data : Optional[str]
+        Optional stdin input for the command
+
+    Returns
+    -------
+    dict
+        Dictionary with 'stdout', 'stderr', 'returncode', 'success' keys
+    """
+    repository = tool_repository(name, arguments)
+    cacheable = name in CACHEABLE_TOOLS and not arguments.get("web")
+    cache_arguments = {k: v for k, v in arguments.items() if k not in PRESENTATION_ARGUMENTS}
+    result = response_cache.get(name, cache_arguments) if cacheable else None
+    if cacheable and response_cache.enabled:
+        note_cache(result is not None)
+    if result is None:
+        run = functools.partial(
+            run_gh_command,
+            repository=repository,
+            lane=BULK if name in BULK_TOOLS else INTERACTIVE,
+            timeout=tool_timeout(name),
+            idempotency=tool_idempotency(name, arguments)
+        )
+        batchable = name in BATCHED_VIEWS and "--json" in args and not arguments.get("comments")
+        if batchable and repository:
+            fields = args[args.index("--json") + 1].split(",")
+            result = await view_batcher.view(
+                BATCHED_VIEWS[name], repository, arguments["number"], fields
+            )
+        if result is None:
+            if name == "gh_api" and (arguments.get("paginate") or arguments.get("cursor")):
+                result = await fetch_api_page(arguments, run)
+            elif (
+                name == "gh_api"
+                and input_data is None
+                and not is_api_write(arguments)
+                and get_etag_store() is not None
+            ):
+                result = await conditional_api_request(get_etag_store(), run, args)
+            else:
+                result = await run(args, input_data)
+        if cacheable and result["success"]:
+            response_cache.put(name, cache_arguments, result)
+
+    # Writes make cached reads of the same repository stale, even when they fail part way
+    if name in INVALIDATED_BY:
+        response_cache.invalidate(INVALIDATED_BY[name], repository)
+    elif name == "gh_api" and is_api_write(arguments):
+        response_cache.invalidate(CACHEABLE_TOOLS, repository)
+    return result
+
+
+def build_tool(spec: ToolSpec) -> Tool:
+    """Build the MCP tool definition of a spec."""
+    schema = spec.input_schema()
+    if spec.runs_gh:
+        schema["properties"]["format"] = OUTPUT_FORMAT_PROPERTY
+    return Tool(
+        name=spec.name,
+        description=spec.description,
+        inputSchema=schema,
+        annotations=ToolAnnotations(
+            readOnlyHint=spec.idempotency == READ,
+            idempotentHint=spec.idempotency != WRITE
+        )
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def tool_list() -> list[Tool]:
+    """Build the tool definitions on first use; later calls return the same list."""
+    return [build_tool(spec) for spec in TOOL_SPECS]
 
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List all available GitHub CLI tools."""
+    return tool_list()
+
+
+async def run_batch(arguments: dict[str, Any]) -> tuple[bool, str]:
+    """Run the sub-calls of a gh_batch call in parallel, see :func:`batch.run_calls`."""
+    return await run_calls(arguments, run_tool)
+
+
+async def org_repositories(org: str, topic: Optional[str] = None) -> list[str]:
+    """
+    Return the non-archived repositories of an organization.
+
+    Raises
+    ------
+    ValueError
+        If the repositories cannot be listed
+    """
+    args = [
+        "repo", "list", org, "--no-archived",
+        "--limit", str(FANOUT_MAX_REPOSITORIES + 1),
+        "--json", "nameWithOwner",
+    ]
+    if topic:
+        args.extend(["--topic", topic])
+    result = await run_gh_command(
+        args, lane=BULK, timeout=tool_timeout("gh_repo_list"), idempotency=READ
+    )
+    if not result["success"]:
+        raise ValueError(f"Could not list the repositories of {org}: {result['stderr'].strip()}")
+    repositories = json.loads(result["stdout"])
     return [
-        # Repository commands
-        Tool(
-            name="gh_repo_list",
-            description="List repositories for a user or organization",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "owner": {
-                        "type": "string",
-                        "description": "Repository owner (user or org). If not specified, lists repos for the authenticated user"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of repositories to list (default: 30)"
-                    },
-                    "visibility": {
-                        "type": "string",
-                        "enum": ["public", "private", "internal"],
-                        "description": "Filter by repository visibility"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_repo_view",
-            description="View information about a repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open the repository in a web browser"
-                    }
-                },
-                "required": ["repository"]
-            }
-        ),
-        Tool(
-            name="gh_repo_create",
-            description="Create a new repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "Name of the repository"
-                    },
-                    "description": {
-                        "type": "string",
-                        "description": "Description of the repository"
-                    },
-                    "public": {
-                        "type": "boolean",
-                        "description": "Make the repository public (default: private)"
-                    },
-                    "clone": {
-                        "type": "boolean",
-                        "description": "Clone the repository after creating"
-                    }
-                },
-                "required": ["name"]
-            }
-        ),
-        # Pull Request commands
-        Tool(
-            name="gh_pr_list",
-            description="List pull requests in a repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "state": {
-                        "type": "string",
-                        "enum": ["open", "closed", "merged", "all"],
-                        "description": "Filter by state (default: open)"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of PRs to list (default: 30)"
-                    },
-                    "assignee": {
-                        "type": "string",
-                        "description": "Filter by assignee"
-                    },
-                    "author": {
-                        "type": "string",
-                        "description": "Filter by author"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_pr_view",
-            description="View a pull request",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "number": {
-                        "type": "number",
-                        "description": "Pull request number"
-                    },
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "comments": {
-                        "type": "boolean",
-                        "description": "View pull request comments"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open the pull request in a web browser"
-                    }
-                },
-                "required": ["number"]
-            }
-        ),
-        Tool(
-            name="gh_pr_create",
-            description="Create a pull request",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {
-                        "type": "string",
-                        "description": "Title of the pull request"
-                    },
-                    "body": {
-                        "type": "string",
-                        "description": "Body/description of the pull request"
-                    },
-                    "base": {
-                        "type": "string",
-                        "description": "Base branch (default: default branch)"
-                    },
-                    "head": {
-                        "type": "string",
-                        "description": "Head branch (default: current branch)"
-                    },
-                    "draft": {
-                        "type": "boolean",
-                        "description": "Create as draft pull request"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open in browser to continue"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_pr_merge",
-            description="Merge a pull request",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "number": {
-                        "type": "number",
-                        "description": "Pull request number"
-                    },
-                    "merge_method": {
-                        "type": "string",
-                        "enum": ["merge", "squash", "rebase"],
-                        "description": "Merge method to use"
-                    },
-                    "delete_branch": {
-                        "type": "boolean",
-                        "description": "Delete the branch after merging"
-                    }
-                },
-                "required": ["number"]
-            }
-        ),
-        Tool(
-            name="gh_pr_checkout",
-            description="Check out a pull request in git",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "number": {
-                        "type": "number",
-                        "description": "Pull request number"
-                    },
-                    "branch": {
-                        "type": "string",
-                        "description": "Local branch name to use"
-                    }
-                },
-                "required": ["number"]
-            }
-        ),
-        # Issue commands
-        Tool(
-            name="gh_issue_list",
-            description="List issues in a repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "state": {
-                        "type": "string",
-                        "enum": ["open", "closed", "all"],
-                        "description": "Filter by state (default: open)"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of issues to list (default: 30)"
-                    },
-                    "assignee": {
-                        "type": "string",
-                        "description": "Filter by assignee"
-                    },
-                    "author": {
-                        "type": "string",
-                        "description": "Filter by author"
-                    },
-                    "label": {
-                        "type": "string",
-                        "description": "Filter by label"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_issue_view",
-            description="View an issue",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "number": {
-                        "type": "number",
-                        "description": "Issue number"
-                    },
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "comments": {
-                        "type": "boolean",
-                        "description": "View issue comments"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open the issue in a web browser"
-                    }
-                },
-                "required": ["number"]
-            }
-        ),
-        Tool(
-            name="gh_issue_create",
-            description="Create an issue",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {
-                        "type": "string",
-                        "description": "Title of the issue"
-                    },
-                    "body": {
-                        "type": "string",
-                        "description": "Body/description of the issue"
-                    },
-                    "assignee": {
-                        "type": "string",
-                        "description": "GitHub username to assign"
-                    },
-                    "label": {
-                        "type": "string",
-                        "description": "Comma-separated list of labels"
-                    },
-                    "milestone": {
-                        "type": "string",
-                        "description": "Milestone to add the issue to"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open in browser to continue"
-                    }
-                },
-                "required": ["title"]
-            }
-        ),
-        Tool(
-            name="gh_issue_close",
-            description="Close an issue",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "number": {
-                        "type": "number",
-                        "description": "Issue number"
-                    },
-                    "comment": {
-                        "type": "string",
-                        "description": "Comment to add when closing"
-                    }
-                },
-                "required": ["number"]
-            }
-        ),
-        # Workflow commands
-        Tool(
-            name="gh_workflow_list",
-            description="List workflows in a repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "all": {
-                        "type": "boolean",
-                        "description": "Include disabled workflows"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_workflow_view",
-            description="View details about a workflow",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "workflow": {
-                        "type": "string",
-                        "description": "Workflow ID or name"
-                    },
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open the workflow in a web browser"
-                    }
-                },
-                "required": ["workflow"]
-            }
-        ),
-        Tool(
-            name="gh_run_list",
-            description="List recent workflow runs",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "workflow": {
-                        "type": "string",
-                        "description": "Filter by workflow name or ID"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of runs to list (default: 20)"
-                    },
-                    "status": {
-                        "type": "string",
-                        "enum": ["completed", "success", "failure", "in_progress", "queued"],
-                        "description": "Filter by run status"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_run_view",
-            description="View details about a workflow run",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "run_id": {
-                        "type": "number",
-                        "description": "Workflow run ID"
-                    },
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "log": {
-                        "type": "boolean",
-                        "description": "View full log"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open the run in a web browser"
-                    }
-                },
-                "required": ["run_id"]
-            }
-        ),
-        # Release commands
-        Tool(
-            name="gh_release_list",
-            description="List releases in a repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of releases to list (default: 30)"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_release_view",
-            description="View information about a release",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "tag": {
-                        "type": "string",
-                        "description": "Release tag (defaults to latest)"
-                    },
-                    "repository": {
-                        "type": "string",
-                        "description": "Repository in OWNER/REPO format (defaults to current repo)"
-                    },
-                    "web": {
-                        "type": "boolean",
-                        "description": "Open the release in a web browser"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_release_create",
-            description="Create a new release",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "tag": {
-                        "type": "string",
-                        "description": "Tag name for the release"
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "Release title"
-                    },
-                    "notes": {
-                        "type": "string",
-                        "description": "Release notes"
-                    },
-                    "draft": {
-                        "type": "boolean",
-                        "description": "Create as draft release"
-                    },
-                    "prerelease": {
-                        "type": "boolean",
-                        "description": "Mark as pre-release"
-                    },
-                    "generate_notes": {
-                        "type": "boolean",
-                        "description": "Automatically generate release notes"
-                    }
-                },
-                "required": ["tag"]
-            }
-        ),
-        # API and general commands
-        Tool(
-            name="gh_api",
-            description="Make an authenticated GitHub API request",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "endpoint": {
-                        "type": "string",
-                        "description": "API endpoint (e.g., /repos/OWNER/REPO/issues)"
-                    },
-                    "method": {
-                        "type": "string",
-                        "enum": ["GET", "POST", "PUT", "PATCH", "DELETE"],
-                        "description": "HTTP method (default: GET)"
-                    },
-                    "field": {
-                        "type": "string",
-                        "description": "JSON field to extract from response"
-                    },
-                    "jq": {
-                        "type": "string",
-                        "description": "jq expression to filter response"
-                    }
-                },
-                "required": ["endpoint"]
-            }
-        ),
-        Tool(
-            name="gh_auth_status",
-            description="View authentication status",
-            inputSchema={
-                "type": "object",
-                "properties": {}
-            }
-        ),
-        Tool(
-            name="gh_status",
-            description="Print information about relevant issues, pull requests, and notifications",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "org": {
-                        "type": "string",
-                        "description": "Filter by organization"
-                    }
-                }
-            }
-        ),
-        # Search commands
-        Tool(
-            name="gh_search_repos",
-            description="Search for repositories",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of results (default: 30)"
-                    },
-                    "language": {
-                        "type": "string",
-                        "description": "Filter by programming language"
-                    },
-                    "stars": {
-                        "type": "string",
-                        "description": "Filter by stars (e.g., '>1000')"
-                    }
-                },
-                "required": ["query"]
-            }
-        ),
-        Tool(
-            name="gh_search_issues",
-            description="Search for issues and pull requests",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query"
-                    },
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of results (default: 30)"
-                    },
-                    "state": {
-                        "type": "string",
-                        "enum": ["open", "closed"],
-                        "description": "Filter by state"
-                    }
-                },
-                "required": ["query"]
-            }
-        ),
-        # Gist commands
-        Tool(
-            name="gh_gist_list",
-            description="List your gists",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "limit": {
-                        "type": "number",
-                        "description": "Maximum number of gists to list (default: 10)"
-                    },
-                    "public": {
-                        "type": "boolean",
-                        "description": "Show only public gists"
-                    },
-                    "secret": {
-                        "type": "boolean",
-                        "description": "Show only secret gists"
-                    }
-                }
-            }
-        ),
-        Tool(
-            name="gh_gist_create",
-            description="Create a new gist",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "files": {
-                        "type": "string",
-                        "description": "Comma-separated list of file paths"
-                    },
-                    "description": {
-                        "type": "string",
-                        "description": "Description of the gist"
-                    },
-                    "public": {
-                        "type": "boolean",
-                        "description": "Make gist public (default: secret)"
-                    }
-                },
-                "required": ["files"]
-            }
-        ),
+        repository["nameWithOwner"] for repository in repositories
+        if isinstance(repository, dict) and "nameWithOwner" in repository
     ]
 
 
+async def run_fanout(
+    spec: ToolSpec,
+    arguments: dict[str, Any],
+    output_format: str
+) -> tuple[bool, str]:
+    """
+    Run a list tool over several repositories, merging the results newest first.
+
+    Parameters
+    ----------
+    spec : ToolSpec
+        List tool supporting fan-out
+    arguments : dict
+        Tool arguments with 'repositories' or 'org'
+    output_format : str
+        Output encoding
+
+    Returns
+    -------
+    tuple
+        Success flag and the merged items, followed by a note on the
+        repositories that failed. The call fails only if all of them did.
+    """
+    try:
+        if arguments.get("repository") or (arguments.get("repositories") and arguments.get("org")):
+            raise ValueError("Use only one of 'repository', 'repositories' and 'org'")
+        limit = int(arguments.get("limit") or spec.default_limit)
+        fields = spec.selected_fields(arguments)
+        if arguments.get("org"):
+            repositories = await org_repositories(arguments["org"], arguments.get("topic"))
+        else:
+            repositories = parse_repositories(arguments["repositories"])
+        if len(repositories) > FANOUT_MAX_REPOSITORIES:
+            raise ValueError(
+                f"At most {FANOUT_MAX_REPOSITORIES} repositories can be listed at once, "
+                f"got {len(repositories)}"
+            )
+    except ValueError as e:
+        return False, str(e)
+
+    # Every repository is asked for the global limit, since any one may hold the newest items
+    base = {
+        key: value for key, value in arguments.items()
+        if key not in ("repositories", "org", "topic", "format")
+    }
+    base.update(limit=limit, fields=fields if UPDATED in fields else fields + [UPDATED])
+
+    async def fetch(repository: str) -> list[dict[str, Any]]:
+        repository_arguments = dict(base, repository=repository)
+        args, _ = spec.build_args(repository_arguments)
+        result = await execute_tool(spec.name, repository_arguments, args)
+        if not result["success"]:
+            raise FanoutError(
+                result["stderr"].strip() or f"gh exited with code {result['returncode']}"
+            )
+        try:
+            items = json.loads(result["stdout"])
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            raise FanoutError("gh did not return a JSON list")
+        return items
+
+    items, errors = await fan_out(repositories, fetch, limit, FANOUT_CONCURRENCY)
+    with phase(FORMAT):
+        text = encode_output(items, output_format)
+    if errors:
+        failures = "; ".join(
+            f"{repository}: {error}" for repository, error in sorted(errors.items())
+        )
+        text += (
+            f"\n\n[Could not list {len(errors)} of {len(repositories)} repositories: {failures}]"
+        )
+    return len(errors) < len(repositories) or not repositories, text
+
+
+async def run_sync(
+    spec: ToolSpec,
+    arguments: dict[str, Any],
+    output_format: str
+) -> tuple[bool, str]:
+    """
+    List the issues or pull requests changed since the last sync or a timestamp.
+
+    Parameters
+    ----------
+    spec : ToolSpec
+        gh_issue_list or gh_pr_list
+    arguments : dict
+        Tool arguments with 'since'
+    output_format : str
+        Output encoding
+
+    Returns
+    -------
+    tuple
+        Success flag and the changed items, oldest change first, followed by
+        a note with the new watermark
+    """
+    kind = SYNC_KINDS[spec.name]
+    try:
+        if arguments.get("repositories") or arguments.get("org"):
+            raise ValueError("'since' lists a single repository; combine it with 'repository' only")
+        since = parse_since(arguments["since"])
+        fields = spec.selected_fields(arguments)
+        unsupported = unsupported_fields(kind, fields)
+        if unsupported:
+            raise ValueError(f"Fields not available with 'since': {', '.join(unsupported)}")
+        limit = int(arguments.get("limit") or SYNC_DEFAULT_LIMIT)
+    except ValueError as e:
+        return False, str(e)
+
+    # gh fills in the current repository
+    repository = arguments.get("repository") or "{owner}/{repo}"
+    state = arguments.get("state", "open")
+    filters = {
+        "assignee": arguments.get("assignee"),
+        "creator": arguments.get("author"),
+        "labels": arguments.get("label")
+    }
+    key = sync_key(spec.name, repository, dict(filters, state=state))
+    previous = sync_state.get(key) if since is None else Watermark(since)
+    run = functools.partial(
+        run_gh_command,
+        repository=arguments.get("repository"),
+        lane=BULK,
+        timeout=tool_timeout(spec.name),
+        idempotency=READ
+    )
+    try:
+        items, watermark, complete = await list_changes(
+            run, kind, repository, previous, limit, state, filters
+        )
+    except SyncError as e:
+        return False, f"Could not list changes: {e}"
+    if watermark is not None:
+        sync_state.set(key, watermark)
+    sync_state.syncs += 1
+    sync_state.items += len(items)
+
+    with phase(FORMAT):
+        text = encode_output([export_item(kind, item, fields) for item in items], output_format)
+    if watermark is None:
+        return True, text + "\n\n[No items.]"
+    origin = f"since {previous.updated_at}" if previous else "in total"
+    more = "More changes are waiting" if not complete else "Later changes are returned"
+    return True, text + (
+        f"\n\n[{len(items)} items changed {origin}, synced up to {watermark.updated_at}. "
+        f"{more} with since \"last\", or since \"{watermark.updated_at}\" after a restart.]"
+    )
+
+
+async def search_local(arguments: dict[str, Any]) -> tuple[bool, str]:
+    """
+    Search issues and pull requests in the mirror, or through the Search API.
+
+    The API is used when the repository is not mirrored, or not yet synced
+    completely, and when no mirror is configured.
+    """
+    if not arguments.get("query"):
+        return False, "Missing required argument: query"
+    output_format = arguments.get("format", DEFAULT_OUTPUT_FORMAT)
+    query = str(arguments["query"])
+    repository = arguments.get("repository")
+    state = arguments.get("state")
+    kind = arguments.get("type")
+    limit = int(arguments.get("limit") or 30)
+
+    mirror = get_mirror()
+    if mirror is not None and (repository is None or mirror.mirrors(repository)):
+        try:
+            pull_requests = None if kind is None else kind == "pr"
+            items = await asyncio.to_thread(
+                mirror.search, query, repository, state, pull_requests, limit
+            )
+        except ValueError as e:
+            return False, str(e)
+        text = encode_output(items, output_format)
+        pending = []
+        if repository is None:
+            pending = [name for name in mirror.repositories if not mirror.mirrors(name)]
+        if pending:
+            text += f"\n\n[Not mirrored yet, so missing from the results: {', '.join(pending)}]"
+        return True, text
+
+    terms = [query]
+    if repository:
+        terms.append(f"repo:{repository}")
+    if kind:
+        terms.append(f"is:{kind}")
+    search_arguments = {
+        "query": " ".join(terms),
+        "limit": limit,
+        "fields": SEARCH_FIELDS,
+        "format": output_format
+    }
+    if state:
+        search_arguments["state"] = state
+    return await dispatch_tool("gh_search_issues", search_arguments)
+
+
+def continuation_note(handle: str, start: int, end: int, total: int) -> str:
+    """Return the note appended to a part of a spilled response."""
+    if end < total:
+        return (
+            f"\n\n[Showing bytes {start}-{end} of {total}. Call gh_fetch_more with "
+            f"handle \"{handle}\" and offset {end} for the rest.]"
+        )
+    return f"\n\n[End of output: bytes {start}-{end} of {total}.]"
+
+
+async def limit_response(text: str) -> str:
+    """
+    Spill a response over the budget to disk, returning its beginning and a handle.
+
+    Parameters
+    ----------
+    text : str
+        Complete response text
+
+    Returns
+    -------
+    str
+        ``text`` itself if it fits the budget (or spilling fails), otherwise
+        its first ``RESPONSE_PREVIEW`` bytes followed by a continuation note
+    """
+    # A UTF-8 character takes at most 4 bytes, so short texts need no encoding
+    if RESPONSE_BUDGET <= 0 or len(text) * 4 <= RESPONSE_BUDGET:
+        return text
+    data = text.encode("utf-8")
+    if len(data) <= RESPONSE_BUDGET:
+        return text
+    try:
+        handle = await asyncio.to_thread(spill_store.spill, data)
+    except OSError as e:
+        logger.warning("Could not spill a %d byte response: %s", len(data), e)
+        return text
+    preview = utf8_prefix(data, min(RESPONSE_PREVIEW, RESPONSE_BUDGET))
+    return preview.decode("utf-8") + continuation_note(handle, 0, len(preview), len(data))
+
+
+async def fetch_more(arguments: dict[str, Any]) -> tuple[bool, str]:
+    """Serve a byte range of a spilled response."""
+    handle = str(arguments.get("handle", ""))
+    offset = int(arguments.get("offset", 0))
+    length = int(arguments.get("length", RESPONSE_PREVIEW))
+    if offset < 0 or length < 4:
+        return False, "offset must not be negative and length must be at least 4"
+    if RESPONSE_BUDGET > 0:
+        length = min(length, RESPONSE_BUDGET)
+    chunk = await asyncio.to_thread(spill_store.read, handle, offset, length)
+    if chunk is None:
+        return False, (
+            f"Unknown or expired handle {handle!r}; repeat the original call to get a new one"
+        )
+    data, total = chunk
+    end = offset + len(data) if data else min(offset, total)
+    text = data.decode("utf-8", errors="replace")
+    return True, text + continuation_note(handle, offset, end, total)
+
+
+async def server_stats(arguments: dict[str, Any]) -> tuple[bool, str]:
+    """Report scheduler, cache, backend, retry, batching and per-tool statistics."""
+    store = get_etag_store()
+    mirror = get_mirror()
+    # Statistics of the SQLite stores are queried off the event loop
+    etag_stats = await asyncio.to_thread(store.stats) if store is not None else None
+    mirror_stats = await asyncio.to_thread(mirror.stats) if mirror is not None else None
+    stats = {
+        "gh": readiness.stats(),
+        "credentials": credentials.stats(),
+        "scheduler": scheduler.stats(),
+        "cache": response_cache.stats(),
+        "etag_store": etag_stats,
+        "http_backend": http_backend.stats() if http_backend is not None else None,
+        "retry": retry_policy.stats(),
+        "cassette": cassette.stats() if cassette is not None else None,
+        "spill": spill_store.stats(),
+        "sync": sync_state.stats(),
+        "mirror": mirror_stats,
+        "view_batcher": view_batcher.stats(),
+        "tools": tool_metrics.stats(),
+        "profile": profiler.stats() if profiler is not None else None
+    }
+    return True, json.dumps(stats, indent=2)
+
+
+async def server_ratelimit(arguments: dict[str, Any]) -> tuple[bool, str]:
+    """Report the rate-limit budget, probing it first when asked to."""
+    if arguments.get("refresh"):
+        await governor.refresh()
+    return True, json.dumps(governor.stats(), indent=2)
+
+
+# Tools answered by the server itself rather than by gh
+SERVER_HANDLERS: dict[str, Callable[[dict[str, Any]], Awaitable[tuple[bool, str]]]] = {
+    "gh_batch": run_batch,
+    "gh_fetch_more": fetch_more,
+    "gh_search_local": search_local,
+    "gh_server_stats": server_stats,
+    "gh_server_ratelimit": server_ratelimit,
+}
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     """Handle tool calls by executing the appropriate gh command."""
+    _, text = await run_tool(name, arguments or {})
+    return [TextContent(type="text", text=text)]
 
-    # Repository commands
-    if name == "gh_repo_list":
-        args = ["repo", "list"]
-        if "owner" in arguments:
-            args.append(arguments["owner"])
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        if "visibility" in arguments:
-            args.extend(["--" + arguments["visibility"]])
-        args.append("--json")
-        args.append("name,description,url,isPrivate,stargazerCount,updatedAt")
-
-    elif name == "gh_repo_view":
-        args = ["repo", "view", arguments["repository"]]
-        if arguments.get("web"):
-            args.append("--web")
-        else:
-            args.extend(["--json", "name,description,url,isPrivate,stargazerCount,defaultBranchRef,createdAt,updatedAt"])
-
-    elif name == "gh_repo_create":
-        args = ["repo", "create", arguments["name"]]
-        if "description" in arguments:
-            args.extend(["--description", arguments["description"]])
-        if arguments.get("public"):
-            args.append("--public")
-        else:
-            args.append("--private")
-        if arguments.get("clone"):
-            args.append("--clone")
-
-    # Pull Request commands
-    elif name == "gh_pr_list":
-        args = ["pr", "list"]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if "state" in arguments:
-            args.extend(["--state", arguments["state"]])
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        if "assignee" in arguments:
-            args.extend(["--assignee", arguments["assignee"]])
-        if "author" in arguments:
-            args.extend(["--author", arguments["author"]])
-        args.extend(["--json", "number,title,state,url,author,createdAt,updatedAt"])
-
-    elif name == "gh_pr_view":
-        args = ["pr", "view", str(arguments["number"])]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if arguments.get("comments"):
-            args.append("--comments")
-        if arguments.get("web"):
-            args.append("--web")
-        else:
-            args.extend(["--json", "number,title,body,state,url,author,createdAt,updatedAt,mergeable,baseRefName,headRefName"])
-
-    elif name == "gh_pr_create":
-        args = ["pr", "create"]
-        if "title" in arguments:
-            args.extend(["--title", arguments["title"]])
-        if "body" in arguments:
-            args.extend(["--body", arguments["body"]])
-        if "base" in arguments:
-            args.extend(["--base", arguments["base"]])
-        if "head" in arguments:
-            args.extend(["--head", arguments["head"]])
-        if arguments.get("draft"):
-            args.append("--draft")
-        if arguments.get("web"):
-            args.append("--web")
-
-    elif name == "gh_pr_merge":
-        args = ["pr", "merge", str(arguments["number"])]
-        if "merge_method" in arguments:
-            args.extend(["--" + arguments["merge_method"]])
-        if arguments.get("delete_branch"):
-            args.append("--delete-branch")
-
-    elif name == "gh_pr_checkout":
-        args = ["pr", "checkout", str(arguments["number"])]
-        if "branch" in arguments:
-            args.append(arguments["branch"])
-
-    # Issue commands
-    elif name == "gh_issue_list":
-        args = ["issue", "list"]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if "state" in arguments:
-            args.extend(["--state", arguments["state"]])
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        if "assignee" in arguments:
-            args.extend(["--assignee", arguments["assignee"]])
-        if "author" in arguments:
-            args.extend(["--author", arguments["author"]])
-        if "label" in arguments:
-            args.extend(["--label", arguments["label"]])
-        args.extend(["--json", "number,title,state,url,author,createdAt,updatedAt"])
-
-    elif name == "gh_issue_view":
-        args = ["issue", "view", str(arguments["number"])]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if arguments.get("comments"):
-            args.append("--comments")
-        if arguments.get("web"):
-            args.append("--web")
-        else:
-            args.extend(["--json", "number,title,body,state,url,author,createdAt,updatedAt,labels"])
-
-    elif name == "gh_issue_create":
-        args = ["issue", "create"]
-        args.extend(["--title", arguments["title"]])
-        if "body" in arguments:
-            args.extend(["--body", arguments["body"]])
-        if "assignee" in arguments:
-            args.extend(["--assignee", arguments["assignee"]])
-        if "label" in arguments:
-            args.extend(["--label", arguments["label"]])
-        if "milestone" in arguments:
-            args.extend(["--milestone", arguments["milestone"]])
-        if arguments.get("web"):
-            args.append("--web")
-
-    elif name == "gh_issue_close":
-        args = ["issue", "close", str(arguments["number"])]
-        if "comment" in arguments:
-            args.extend(["--comment", arguments["comment"]])
-
-    # Workflow commands
-    elif name == "gh_workflow_list":
-        args = ["workflow", "list"]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if arguments.get("all"):
-            args.append("--all")
-        args.extend(["--json", "id,name,state,path"])
-
-    elif name == "gh_workflow_view":
-        args = ["workflow", "view", arguments["workflow"]]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if arguments.get("web"):
-            args.append("--web")
-
-    elif name == "gh_run_list":
-        args = ["run", "list"]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if "workflow" in arguments:
-            args.extend(["--workflow", arguments["workflow"]])
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        if "status" in arguments:
-            args.extend(["--status", arguments["status"]])
-        args.extend(["--json", "databaseId,name,displayTitle,status,conclusion,createdAt,updatedAt,url"])
-
-    elif name == "gh_run_view":
-        args = ["run", "view", str(arguments["run_id"])]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if arguments.get("log"):
-            args.append("--log")
-        if arguments.get("web"):
-            args.append("--web")
-        else:
-            args.extend(["--json", "databaseId,name,displayTitle,status,conclusion,createdAt,updatedAt,url,jobs"])
-
-    # Release commands
-    elif name == "gh_release_list":
-        args = ["release", "list"]
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        args.extend(["--json", "tagName,name,createdAt,publishedAt,url,isPrerelease,isDraft"])
-
-    elif name == "gh_release_view":
-        args = ["release", "view"]
-        if "tag" in arguments:
-            args.append(arguments["tag"])
-        if "repository" in arguments:
-            args.extend(["--repo", arguments["repository"]])
-        if arguments.get("web"):
-            args.append("--web")
-        else:
-            args.extend(["--json", "tagName,name,body,createdAt,publishedAt,url,isPrerelease,isDraft"])
-
-    elif name == "gh_release_create":
-        args = ["release", "create", arguments["tag"]]
-        if "title" in arguments:
-            args.extend(["--title", arguments["title"]])
-        if "notes" in arguments:
-            args.extend(["--notes", arguments["notes"]])
-        if arguments.get("draft"):
-            args.append("--draft")
-        if arguments.get("prerelease"):
-            args.append("--prerelease")
-        if arguments.get("generate_notes"):
-            args.append("--generate-notes")
-
-    # API and general commands
-    elif name == "gh_api":
-        args = ["api", arguments["endpoint"]]
-        if "method" in arguments:
-            args.extend(["--method", arguments["method"]])
-        if "field" in arguments:
-            args.extend(["--jq", f'.{arguments["field"]}'])
-        elif "jq" in arguments:
-            args.extend(["--jq", arguments["jq"]])
-
-    elif name == "gh_auth_status":
-        args = ["auth", "status"]
-
-    elif name == "gh_status":
-        args = ["status"]
-        if "org" in arguments:
-            args.extend(["--org", arguments["org"]])
-
-    # Search commands
-    elif name == "gh_search_repos":
-        query = arguments["query"]
-        if "language" in arguments:
-            query += f" language:{arguments['language']}"
-        if "stars" in arguments:
-            query += f" stars:{arguments['stars']}"
-        args = ["search", "repos", query]
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        args.extend(["--json", "name,description,url,stargazerCount,language"])
-
-    elif name == "gh_search_issues":
-        query = arguments["query"]
-        if "state" in arguments:
-            query += f" state:{arguments['state']}"
-        args = ["search", "issues", query]
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        args.extend(["--json", "number,title,state,url,repository"])
-
-    # Gist commands
-    elif name == "gh_gist_list":
-        args = ["gist", "list"]
-        if "limit" in arguments:
-            args.extend(["--limit", str(arguments["limit"])])
-        if arguments.get("public"):
-            args.append("--public")
-        if arguments.get("secret"):
-            args.append("--secret")
-
-    elif name == "gh_gist_create":
-        args = ["gist", "create"]
-        for file in arguments["files"].split(","):
-            args.append(file.strip())
-        if "description" in arguments:
-            args.extend(["--desc", arguments["description"]])
-        if arguments.get("public"):
-            args.append("--public")
 
-    else:
-        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+async def run_tool(name: str, arguments: dict[str, Any]) -> tuple[bool, str]:
+    """
+    Execute a tool call, recording its metrics and spilling oversized responses.
+
+    Parameters
+    ----------
+    name : str
+        Tool name
+    arguments : dict
+        Tool arguments
+
+    Returns
+    -------
+    tuple
+        Success flag and the response text
+    """
+    # Unknown names share one entry, so clients cannot grow the metrics without bound
+    tool = name if name in TOOLS else "unknown"
+    with tool_metrics.track(tool) as call:
+        with profiler.track(tool, arguments) if profiler is not None else contextlib.nullcontext():
+            success, text = await dispatch_tool(name, arguments)
+            if name != "gh_fetch_more":
+                text = await limit_response(text)
+        call.failed = not success
+    return success, text
+
+
+async def dispatch_tool(name: str, arguments: dict[str, Any]) -> tuple[bool, str]:
+    """
+    Execute a tool call.
+
+    Parameters
+    ----------
+    name : str
+        Tool name
+    arguments : dict
+        Tool arguments
+
+    Returns
+    -------
+    tuple
+        Success flag and the response text
+    """
+    output_format = arguments.get("format", DEFAULT_OUTPUT_FORMAT)
+    if output_format not in FORMATS:
+        return False, f"Unknown format {output_format!r}, expected one of: {', '.join(FORMATS)}"
+
+    handler = SERVER_HANDLERS.get(name)
+    if handler is not None:
+        return await handler(arguments)
+    spec = TOOLS.get(name)
+    if spec is None:
+        return False, f"Unknown tool: {name}"
+    unavailable = await readiness.check()
+    if unavailable:
+        return False, unavailable
+    if name == "gh_run_view" and arguments.get("log") and not arguments.get("web"):
+        return await read_run_log(arguments)
+    if spec.name in SYNC_KINDS and arguments.get("since"):
+        return await run_sync(spec, arguments, output_format)
+    if spec.fanout and (arguments.get("repositories") or arguments.get("org")):
+        return await run_fanout(spec, arguments, output_format)
+    try:
+        args, input_data = spec.build_args(arguments)
+        fields = api_projection(arguments) if name == "gh_api" else None
+    except ValueError as e:
+        return False, str(e)
 
     # Execute the command
-    result = run_gh_command(args)
+    result = await execute_tool(name, arguments, args, input_data)
 
     # Format the response
     if result["success"]:
-        output = result["stdout"]
-        # Try to pretty-print JSON if possible
-        try:
-            json_data = json.loads(output)
-            output = json.dumps(json_data, indent=2)
-        except:
-            pass
-        return [TextContent(type="text", text=output)]
+        with phase(FORMAT):
+            return True, format_output(result["stdout"], output_format, fields)
     else:
         error_msg = f"Command failed with return code {result['returncode']}\n"
         if result["stderr"]:
             error_msg += f"Error: {result['stderr']}\n"
         if result["stdout"]:
             error_msg += f"Output: {result['stdout']}"
-        return [TextContent(type="text", text=error_msg)]
+        return False, error_msg
+
+
+async def warm_up() -> None:
+    """Check gh and resolve its token while the client initializes."""
+    await readiness.wait()
+    if readiness.authenticated:
+        await credentials.environment()
+        if credentials.error:
+            logger.warning("%s", credentials.error)
 
 
-async def main():
-    """Run the MCP server."""
+async def keep_mirror_current() -> None:
+    """Sync the issue mirror in the background once gh is usable."""
+    await readiness.wait()
+    mirror = get_mirror()
+    if mirror is None or not readiness.authenticated:
+        return
+    run = functools.partial(
+        run_gh_command,
+        lane=BACKGROUND,
+        timeout=DEFAULT_TIMEOUT,
+        idempotency=READ
+    )
+    await mirror.keep_current(run, MIRROR_INTERVAL)
+
+
+async def serve() -> None:
+    """Run the MCP server over stdio."""
     from mcp.server.stdio import stdio_server
 
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
+    if profiler is not None:
+        profiler.start()
+    tasks = [asyncio.ensure_future(warm_up())]
+    if METRICS_TEXTFILE:
+        tasks.append(asyncio.ensure_future(tool_metrics.export(METRICS_TEXTFILE, METRICS_INTERVAL)))
+    if MIRROR_REPOSITORIES:
+        tasks.append(asyncio.ensure_future(keep_mirror_current()))
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+    finally:
+        for task in tasks:
+            task.cancel()
+        if profiler is not None:
+            profiler.stop()
+
+
+def main() -> None:
+    """Console entry point: serve over stdio, or benchmark the startup time."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GitHub CLI MCP server")
+    parser.add_argument(
+        "--benchmark-startup",
+        action="store_true",
+        help=(
+            "Start the server repeatedly and report import time and time to the first "
+            "list_tools response"
         )
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=10,
+        help="Number of cold starts to measure (default: 10)"
+    )
+    options = parser.parse_args()
+
+    if options.benchmark_startup:
+        try:
+            from .startup import benchmark_startup
+        except ImportError:  # running as a script: python server.py
+            from startup import benchmark_startup
+        print(json.dumps(benchmark_startup(__file__, runs=options.runs), indent=2))
+        return
+    asyncio.run(serve())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
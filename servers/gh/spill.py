@@ -0,0 +1,140 @@
+"""
+Spill-to-disk store for tool responses larger than the response budget.
+
+A response over the budget is written to a file under a random handle and
+only its beginning is returned, together with the handle. ``gh_fetch_more``
+serves further byte ranges from the memory-mapped file, so neither the
+server nor a single message has to hold the whole response. Files are
+evicted by age and total size like spooled logs.
+"""
+
+import os
+import re
+import secrets
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    from .logs import ensure_private_dir, evict_files, read_byte_range
+except ImportError:  # running as a script: python server.py
+    from logs import ensure_private_dir, evict_files, read_byte_range
+
+
+HANDLE_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def default_spill_dir() -> Path:
+    """Return the per-user spill directory under the system temp directory."""
+    user = os.getuid() if hasattr(os, "getuid") else "user"
+    return Path(tempfile.gettempdir()) / f"gh-mcp-spill-{user}"
+
+
+def utf8_prefix(data: bytes, length: int) -> bytes:
+    """Return at most ``length`` bytes of ``data`` without splitting a UTF-8 character."""
+    if len(data) <= length:
+        return data
+    end = max(0, length)
+    # Back up over continuation bytes to the start of the split character
+    while end > 0 and data[end] & 0xC0 == 0x80:
+        end -= 1
+    return data[:end]
+
+
+class SpillStore:
+    """
+    On-disk store of oversized responses, evicted by age and total size.
+
+    Parameters
+    ----------
+    directory : Path
+        Spill directory
+    max_bytes : int
+        Total size of spilled responses before the least recently used are removed
+    max_age : float
+        Seconds an unread response is kept
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 1024 ** 3, max_age: float = 3600):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.spilled = 0
+        self.reads = 0
+
+    def path_for(self, handle: str) -> Optional[Path]:
+        """
+        Return the file of ``handle``, or None if it is malformed, evicted or
+        expired, or the directory is not private to the user.
+        """
+        if not HANDLE_PATTERN.fullmatch(handle):
+            return None
+        path = self.directory / f"{handle}.out"
+        try:
+            ensure_private_dir(self.directory)
+            if time.time() - path.stat().st_mtime >= self.max_age:
+                return None
+        except OSError:
+            return None
+        return path
+
+    def spill(self, data: bytes) -> str:
+        """
+        Store ``data`` and return its handle.
+
+        Raises
+        ------
+        OSError
+            If the response cannot be written, or the directory is not
+            private to the user
+        """
+        ensure_private_dir(self.directory)
+        handle = secrets.token_hex(16)
+        fd, partial = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(partial, self.directory / f"{handle}.out")
+        except BaseException:
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+        self.spilled += 1
+        self.evict()
+        return handle
+
+    def read(self, handle: str, offset: int, length: int) -> Optional[tuple[bytes, int]]:
+        """
+        Read a byte range of a spilled response.
+
+        The range is shortened so it does not end inside a UTF-8 character.
+
+        Returns
+        -------
+        tuple or None
+            The bytes and the total size of the response, or None if the
+            handle is unknown or has been evicted
+        """
+        path = self.path_for(handle)
+        if path is None:
+            return None
+        try:
+            os.utime(path)
+            size = path.stat().st_size
+            # One extra byte shows whether the range ends inside a character
+            data = read_byte_range(path, offset, length + 1)
+        except OSError:
+            # Evicted meanwhile
+            return None
+        if offset + length < size:
+            data = utf8_prefix(data, length)
+        self.reads += 1
+        return data, size
+
+    def evict(self) -> None:
+        """Remove expired responses, then the least recently used ones until under ``max_bytes``."""
+        evict_files(self.directory, "*.out", self.max_bytes, self.max_age)
+
+    def stats(self) -> dict[str, Any]:
+        return {"directory": str(self.directory), "spilled": self.spilled, "reads": self.reads}
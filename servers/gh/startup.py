@@ -0,0 +1,169 @@
+"""
+Startup benchmark for the MCP server.
+
+Cold start is paid on every client session, since clients spawn a new
+server process each time. The benchmark starts the server the way a client
+does, speaks MCP over its stdio and reports, as medians over several runs:
+
+- ``interpreter_ms``: starting a bare Python interpreter, for reference
+- ``import_ms``: importing the server module
+- ``initialize_ms``: process start until the ``initialize`` response
+- ``list_tools_ms``: process start until the first ``tools/list`` response
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+
+PROTOCOL_VERSION = "2025-06-18"
+
+
+def _send(process: subprocess.Popen, message: dict[str, Any]) -> None:
+    process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+    process.stdin.flush()
+
+
+def _receive(process: subprocess.Popen, request_id: int) -> dict[str, Any]:
+    """Read messages until the response to ``request_id`` arrives."""
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before responding")
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if message.get("id") == request_id:
+            if "error" in message:
+                raise RuntimeError(f"Server returned an error: {message['error']}")
+            return message
+
+
+def measure_session(
+    command: list[str],
+    timeout: float = 30,
+    env: Optional[dict[str, str]] = None
+) -> dict[str, Any]:
+    """
+    Start the server once and time the initialize and tools/list responses.
+
+    Returns
+    -------
+    dict
+        ``initialize_ms``, ``list_tools_ms`` and the number of ``tools``
+    """
+    with tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            env=env
+        )
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            _send(process, {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "startup-benchmark", "version": "1"},
+                },
+            })
+            _receive(process, 1)
+            initialized = time.perf_counter()
+            _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            _send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+            tools = _receive(process, 2)["result"]["tools"]
+            listed = time.perf_counter()
+        except (RuntimeError, OSError) as e:
+            stderr.seek(0)
+            detail = stderr.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"{e}\n{detail}" if detail else str(e)) from None
+        finally:
+            timer.cancel()
+            if process.stdin:
+                process.stdin.close()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+    return {
+        "initialize_ms": 1000 * (initialized - started),
+        "list_tools_ms": 1000 * (listed - started),
+        "tools": len(tools),
+    }
+
+
+def _time_command(command: list[str], cwd: Optional[str] = None) -> float:
+    started = time.perf_counter()
+    subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+    return 1000 * (time.perf_counter() - started)
+
+
+def measure_import(module: str, cwd: str) -> float:
+    """Return the milliseconds needed to import ``module`` in a fresh interpreter."""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - started)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    return 1000 * float(output.strip().splitlines()[-1])
+
+
+def benchmark_startup(script: str, runs: int = 10) -> dict[str, Any]:
+    """
+    Benchmark the cold start of a server script.
+
+    Parameters
+    ----------
+    script : str
+        Path of the server script to start with the current interpreter
+    runs : int
+        Number of cold starts to measure
+
+    Returns
+    -------
+    dict
+        Median timings in milliseconds and the number of tools listed
+    """
+    directory, filename = os.path.split(os.path.abspath(script))
+    module = os.path.splitext(filename)[0]
+    samples: dict[str, list[float]] = {
+        "interpreter_ms": [],
+        "import_ms": [],
+        "initialize_ms": [],
+        "list_tools_ms": []
+    }
+    tools = 0
+    for _ in range(max(1, runs)):
+        samples["interpreter_ms"].append(_time_command([sys.executable, "-c", "pass"]))
+        samples["import_ms"].append(measure_import(module, directory))
+        session = measure_session([sys.executable, os.path.join(directory, filename)])
+        samples["initialize_ms"].append(session["initialize_ms"])
+        samples["list_tools_ms"].append(session["list_tools_ms"])
+        tools = session["tools"]
+    report: dict[str, Any] = {"runs": max(1, runs)}
+    for name, values in samples.items():
+        report[name] = round(statistics.median(values), 1)
+    report["tools"] = tools
+    return report
@@ -0,0 +1,295 @@
+"""
+Incremental listing of issues and pull requests changed since a watermark.
+
+A sync lists ``GET /repos/{owner}/{repo}/issues`` with ``since`` and
+``sort=updated&direction=asc``, so GitHub only returns, and the server only
+pages through, items updated at or after the watermark, oldest change first.
+The newest ``updated_at`` seen becomes the next watermark. Since ``since``
+is inclusive, the numbers of the items at exactly the watermark are kept
+with it and skipped the next time. When a sync stops at its limit, the
+watermark is the last item returned, and the next sync continues from there
+without losing items.
+
+The issues endpoint returns pull requests too; they are told apart by their
+``pull_request`` key. Items are exported in the shape of ``gh issue list
+--json`` and ``gh pr list --json`` for the fields the endpoint provides.
+"""
+
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import urlencode
+
+try:
+    from .pagination import fetch_rest_page
+except ImportError:  # running as a script: python server.py
+    from pagination import fetch_rest_page
+
+
+Runner = Callable[..., Awaitable[dict[str, Any]]]
+
+ISSUE = "issue"
+PULL_REQUEST = "pr"
+
+# 'since' value continuing from the stored watermark
+LAST = "last"
+
+
+class SyncError(Exception):
+    """The changes could not be listed."""
+
+
+class Watermark:
+    """The newest ``updated_at`` a sync returned and the items updated at exactly that time."""
+
+    __slots__ = ("updated_at", "numbers")
+
+    def __init__(self, updated_at: str, numbers: Any = ()):
+        self.updated_at = updated_at
+        self.numbers = set(numbers)
+
+
+class SyncState:
+    """
+    Watermarks of incremental listings, per tool, repository and filter.
+
+    Parameters
+    ----------
+    max_entries : int
+        Number of listings kept, least recently synced ones are dropped
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._watermarks: OrderedDict[str, Watermark] = OrderedDict()
+        self.syncs = 0
+        self.items = 0
+
+    def get(self, key: str) -> Optional[Watermark]:
+        return self._watermarks.get(key)
+
+    def set(self, key: str, watermark: Watermark) -> None:
+        self._watermarks[key] = watermark
+        self._watermarks.move_to_end(key)
+        while len(self._watermarks) > self.max_entries:
+            self._watermarks.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {"watermarks": len(self._watermarks), "syncs": self.syncs, "items": self.items}
+
+
+def sync_key(tool: str, repository: str, filters: dict[str, Any]) -> str:
+    return json.dumps([tool, repository.lower(), sorted(filters.items())])
+
+
+def parse_since(value: Any) -> Optional[str]:
+    """
+    Parse a ``since`` argument.
+
+    Returns
+    -------
+    Optional[str]
+        The timestamp in UTC as ``YYYY-MM-DDTHH:MM:SSZ``, or None for
+        ``"last"``
+
+    Raises
+    ------
+    ValueError
+        If the value is neither ``"last"`` nor an ISO 8601 timestamp
+    """
+    if value is True or str(value).strip().lower() == LAST:
+        return None
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith("Z") else text)
+    except ValueError:
+        raise ValueError(
+            f"'since' must be \"last\" or an ISO 8601 timestamp, got {value!r}"
+        ) from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _state(issue: dict[str, Any]) -> str:
+    if (issue.get("pull_request") or {}).get("merged_at"):
+        return "MERGED"
+    return str(issue.get("state", "")).upper()
+
+
+def _user(user: dict[str, Any]) -> dict[str, Any]:
+    # The issues API has no display names; "name" is kept empty for gh's shape
+    return {
+        "id": user.get("node_id"),
+        "login": user.get("login", ""),
+        "name": user.get("name") or ""
+    }
+
+
+def _author(issue: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """Shape the author like gh: users carry id/name, apps are flagged as bots."""
+    user = issue.get("user")
+    if not user:
+        return None
+    if user.get("type") == "Bot":
+        login = user.get("login", "")
+        return {"is_bot": True, "login": "app/" + login.removesuffix("[bot]")}
+    return dict(_user(user), is_bot=False)
+
+
+def _labels(issue: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": label.get("node_id"),
+            "name": label.get("name"),
+            "description": label.get("description") or "",
+            "color": label.get("color")
+        }
+        for label in issue.get("labels") or []
+    ]
+
+
+def _milestone(issue: dict[str, Any]) -> Optional[dict[str, Any]]:
+    milestone = issue.get("milestone")
+    if not milestone:
+        return None
+    return {
+        "number": milestone.get("number"),
+        "title": milestone.get("title"),
+        "description": milestone.get("description") or "",
+        "dueOn": milestone.get("due_on"),
+    }
+
+
+# gh --json field name -> value taken from an issues API item
+COMMON_FIELDS: dict[str, Callable[[dict[str, Any]], Any]] = {
+    "id": lambda issue: issue.get("node_id"),
+    "number": lambda issue: issue.get("number"),
+    "title": lambda issue: issue.get("title"),
+    "body": lambda issue: issue.get("body") or "",
+    "state": _state,
+    "url": lambda issue: issue.get("html_url"),
+    "closed": lambda issue: issue.get("state") == "closed",
+    "closedAt": lambda issue: issue.get("closed_at"),
+    "createdAt": lambda issue: issue.get("created_at"),
+    "updatedAt": lambda issue: issue.get("updated_at"),
+    "author": _author,
+    "labels": _labels,
+    "assignees": lambda issue: [_user(user) for user in issue.get("assignees") or []],
+    "milestone": _milestone,
+}
+
+FIELDS = {
+    ISSUE: COMMON_FIELDS,
+    PULL_REQUEST: dict(COMMON_FIELDS, **{
+        "isDraft": lambda issue: bool(issue.get("draft")),
+        "mergedAt": lambda issue: (issue.get("pull_request") or {}).get("merged_at"),
+    }),
+}
+
+
+def unsupported_fields(kind: str, fields: list[str]) -> list[str]:
+    """Return the fields a sync of ``kind`` cannot provide."""
+    return [field for field in fields if field not in FIELDS[kind]]
+
+
+def export_item(kind: str, issue: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    """Convert an issues API item into gh's ``--json`` output shape."""
+    return {field: FIELDS[kind][field](issue) for field in fields}
+
+
+def changes_endpoint(
+    repository: str,
+    since: Optional[str],
+    state: str,
+    filters: dict[str, Any]
+) -> str:
+    """Return the issues API endpoint listing changes since ``since``, oldest first."""
+    query = {
+        # Merged pull requests are closed issues
+        "state": "closed" if state == "merged" else state,
+        "sort": "updated",
+        "direction": "asc",
+        "per_page": 100,
+    }
+    if since:
+        query["since"] = since
+    query.update({key: value for key, value in filters.items() if value is not None})
+    return f"repos/{repository}/issues?{urlencode(query)}"
+
+
+async def list_changes(
+    run: Runner,
+    kind: Optional[str],
+    repository: str,
+    since: Optional[Watermark],
+    limit: int,
+    state: str = "open",
+    filters: Optional[dict[str, Any]] = None
+) -> tuple[list[dict[str, Any]], Optional[Watermark], bool]:
+    """
+    List the issues or pull requests of a repository changed since a watermark.
+
+    Parameters
+    ----------
+    run : Callable
+        Coroutine function executing gh arguments
+    kind : Optional[str]
+        ISSUE or PULL_REQUEST, None for both
+    repository : str
+        Repository in OWNER/REPO format
+    since : Optional[Watermark]
+        Watermark of the previous sync, None to list from the beginning
+    limit : int
+        Maximum number of items returned
+    state : str
+        ``open``, ``closed``, ``all``, or ``merged`` for pull requests
+    filters : Optional[dict]
+        Further issues API parameters: ``assignee``, ``creator``, ``labels``
+
+    Returns
+    -------
+    tuple
+        The changed API items, oldest change first, the new watermark (None
+        if nothing was ever listed) and whether all changes were returned
+
+    Raises
+    ------
+    SyncError
+        If the API request fails
+    """
+    endpoint = changes_endpoint(
+        repository, since.updated_at if since else None, state, filters or {}
+    )
+    watermark = Watermark(since.updated_at, since.numbers) if since else None
+    items: list[dict[str, Any]] = []
+    cursor = None
+    while True:
+        result = await fetch_rest_page(run, endpoint, cursor=cursor)
+        if not result["success"]:
+            raise SyncError(
+                result["stderr"].strip()
+                or result["stdout"].strip()
+                or f"gh exited with code {result['returncode']}"
+            )
+        page = json.loads(result["stdout"])
+        for issue in page["items"]:
+            updated_at = issue.get("updated_at") or ""
+            number = issue.get("number")
+            if since and updated_at == since.updated_at and number in since.numbers:
+                continue
+            if watermark is None or updated_at > watermark.updated_at:
+                watermark = Watermark(updated_at, (number,))
+            elif updated_at == watermark.updated_at:
+                watermark.numbers.add(number)
+            if kind is not None and ("pull_request" in issue) != (kind == PULL_REQUEST):
+                continue
+            if state == "merged" and _state(issue) != "MERGED":
+                continue
+            items.append(issue)
+            if len(items) >= limit:
+                return items, watermark, False
+        cursor = page["next_cursor"]
+        if not cursor:
+            return items, watermark, True
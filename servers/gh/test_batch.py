@@ -0,0 +1,92 @@
+"""
+Tests for running gh_batch sub-calls in parallel.
+"""
+
+import asyncio
+import json
+
+from servers.gh.batch import MAX_BATCH_CALLS, run_calls
+
+
+def run(arguments, run_tool):
+    return asyncio.run(run_calls(arguments, run_tool))
+
+
+async def echo(name, arguments):
+    await asyncio.sleep(0)
+    if name == "gh_fail":
+        return False, "HTTP 404: Not Found"
+    if name == "gh_text":
+        return True, "plain text"
+    return True, json.dumps({"name": name, "arguments": arguments})
+
+
+def test_concurrency_is_capped():
+    running = 0
+    peak = 0
+
+    async def tracked(name, arguments):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return True, "{}"
+
+    ok, _ = run({"calls": [{"name": "gh_pr_view"}] * 10, "concurrency": 3}, tracked)
+    assert ok
+    assert peak == 3
+
+
+def test_entries_keep_their_index():
+    ok, text = run({"calls": [
+        {"name": "gh_pr_view", "arguments": {"number": 1}},
+        {"name": "gh_fail"},
+        "not a call",
+        {"name": "gh_text"},
+    ]}, echo)
+    combined = json.loads(text)
+    assert not ok
+    assert (combined["succeeded"], combined["failed"]) == (2, 2)
+    results = combined["results"]
+    assert [entry["index"] for entry in results] == [0, 1, 2, 3]
+    assert results[0]["result"] == {"name": "gh_pr_view", "arguments": {"number": 1}}
+    assert results[1] == {
+        "index": 1, "name": "gh_fail", "ok": False, "error": "HTTP 404: Not Found"
+    }
+    assert "needs a 'name'" in results[2]["error"]
+    assert results[3]["result"] == "plain text"
+
+
+def test_all_calls_succeeding():
+    ok, text = run({"calls": [{"name": "gh_pr_view"}, {"name": "gh_issue_view"}]}, echo)
+    assert ok
+    assert json.loads(text)["failed"] == 0
+
+
+def test_nested_batches_are_rejected():
+    ok, text = run({"calls": [{"name": "gh_batch", "arguments": {"calls": []}}]}, echo)
+    assert not ok
+    assert json.loads(text)["results"][0]["error"] == "gh_batch calls cannot be nested"
+
+
+def test_exceptions_become_errors():
+    async def failing(name, arguments):
+        raise KeyError("number")
+
+    ok, text = run({"calls": [{"name": "gh_pr_view"}]}, failing)
+    assert not ok
+    assert json.loads(text)["results"][0]["error"] == "Missing required argument: number"
+
+
+def test_invalid_arguments():
+    ok, text = run({"calls": [{"name": "gh_pr_view"}] * (MAX_BATCH_CALLS + 1)}, echo)
+    assert not ok
+    assert f"at most {MAX_BATCH_CALLS} calls" in text
+
+    ok, text = run({"calls": [], "concurrency": "abc"}, echo)
+    assert not ok
+    assert text == "'concurrency' must be an integer, got 'abc'"
+    ok, text = run({"calls": "gh_pr_view"}, echo)
+    assert not ok
+    assert "'calls' must be a list" in text
@@ -0,0 +1,126 @@
+"""
+Tests for batching of pull request and issue view calls.
+"""
+
+import asyncio
+import json
+
+from servers.gh.batcher import ViewBatcher, _Item, build_query, export_node
+
+
+class FakeGraphQL:
+    def __init__(self, response):
+        self.response = response
+        self.queries = []
+
+    async def __call__(self, query):
+        self.queries.append(query)
+        return {"stdout": json.dumps(self.response), "stderr": "", "returncode": 0, "success": True}
+
+
+def test_concurrent_views_share_one_query():
+    gh = FakeGraphQL({
+        "data": {
+            "r0": {
+                "i0": {
+                    "number": 1,
+                    "title": "PR one",
+                    "author": {"login": "a", "id": "U1", "name": "A"},
+                },
+                "i1": {"number": 2, "title": "Issue two", "labels": {"nodes": [{"name": "bug"}]}},
+            },
+            "r1": {"i0": None},
+        },
+        "errors": [{
+            "path": ["r1", "i0"],
+            "message": "Could not resolve to a PullRequest with the number of 9.",
+        }],
+    })
+
+    async def scenario():
+        batcher = ViewBatcher(gh, window=0.01)
+        return await asyncio.gather(
+            batcher.view("pr", "o/r", 1, ["number", "title", "author"]),
+            batcher.view("issue", "o/r", 2, ["number", "title", "labels"]),
+            batcher.view("pr", "o/other", 9, ["number"]),
+        ), batcher.stats()
+
+    (pr, issue, missing), stats = asyncio.run(scenario())
+    assert len(gh.queries) == 1
+    assert 'r0: repository(owner: "o", name: "r")' in gh.queries[0]
+    assert "i1: issue(number: 2)" in gh.queries[0]
+    assert json.loads(pr["stdout"]) == {
+        "author": {"id": "U1", "is_bot": False, "login": "a", "name": "A"},
+        "number": 1,
+        "title": "PR one",
+    }
+    assert json.loads(issue["stdout"])["labels"] == [{"name": "bug"}]
+    assert not missing["success"]
+    assert "number of 9" in missing["stderr"]
+    assert stats["batches"] == 1 and stats["batched_requests"] == 3
+
+
+def test_single_request_falls_back():
+    gh = FakeGraphQL({"data": {}})
+
+    async def scenario():
+        return await ViewBatcher(gh, window=0.01).view("pr", "o/r", 1, ["number"])
+
+    assert asyncio.run(scenario()) is None
+    assert gh.queries == []
+
+
+def test_unsupported_fields_and_missing_repository_fall_back():
+    async def scenario():
+        batcher = ViewBatcher(FakeGraphQL({}), window=0.01)
+        return (
+            await batcher.view("pr", "o/r", 1, ["number", "statusCheckRollup"]),
+            await batcher.view("pr", "", 1, ["number"]),
+        )
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_issue_view_of_pull_request_falls_back():
+    gh = FakeGraphQL({
+        "data": {"r0": {"i0": {"number": 1}, "i1": None}},
+        "errors": [{
+            "type": "NOT_FOUND",
+            "path": ["r0", "i1"],
+            "message": "Could not resolve to an Issue with the number of 2.",
+        }],
+    })
+
+    async def scenario():
+        batcher = ViewBatcher(gh, window=0.01)
+        return await asyncio.gather(
+            batcher.view("issue", "o/r", 1, ["number"]),
+            batcher.view("issue", "o/r", 2, ["number"]),
+        )
+
+    found, pull_request = asyncio.run(scenario())
+    assert found["success"]
+    assert pull_request is None
+
+
+def test_branch_names_are_not_batched():
+    async def scenario():
+        batcher = ViewBatcher(FakeGraphQL({}), window=0.01)
+        return await batcher.view("pr", "o/r", "feature-x", ["number"])
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_build_query_groups_by_repository():
+    query, aliases = build_query([
+        _Item("pr", "O", "R", 1, ["title"]),
+        _Item("pr", "o", "r", 2, ["title"]),
+    ])
+    assert query.count("repository(") == 1
+    assert set(aliases) == {(0, 0), (0, 1)}
+
+
+def test_export_bot_author():
+    assert export_node({"author": {"login": "dependabot"}}, ["author"]) == {
+        "author": {"is_bot": True, "login": "app/dependabot"}
+    }
@@ -0,0 +1,55 @@
+"""
+Tests for the benchmark suite and its fake gh.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from servers.gh.benchmark import compare, fake_gh, run_benchmarks
+from servers.gh.formatting import FORMATS
+
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the fake gh is a POSIX script")
+
+
+def test_fake_gh_answers_with_canned_json():
+    path_before = os.environ["PATH"]
+    with fake_gh(size=3, delay=0.2) as gh:
+        assert shutil.which("gh") == gh
+        started = time.perf_counter()
+        output = subprocess.run(
+            ["gh", "pr", "list"], check=True, capture_output=True, text=True
+        ).stdout
+        assert time.perf_counter() - started >= 0.2
+        assert [item["number"] for item in json.loads(output)] == [0, 1, 2]
+        token = subprocess.run(
+            ["gh", "auth", "token"], check=True, capture_output=True, text=True
+        ).stdout
+        assert token.strip() == "gho_fake"
+    assert os.environ["PATH"] == path_before
+    assert "GH_FAKE_SIZE" not in os.environ
+
+
+def test_run_benchmarks_reports_in_process_metrics():
+    report = run_benchmarks(size=5, calls=2, repeat=3)
+    metrics = report["metrics"]
+    assert report["config"] == {"size": 5, "delay": 0.0}
+    assert metrics["build_args_us"] > 0
+    assert {f"format_{name}_us" for name in FORMATS} <= set(metrics)
+
+
+def test_compare():
+    baseline = {"build_args_us": 10.0, "format_json_us": 1000.0, "spawn_us": 1000.0}
+    assert compare({"build_args_us": 14.0, "format_json_us": 1400.0}, baseline) == []
+    # Above the tolerance but within the absolute floor
+    assert compare({"build_args_us": 14.9}, baseline, tolerance=0.2) == []
+    assert compare({"format_json_us": 1600.0}, baseline) == [
+        "format_json_us: 1600.0us, baseline 1000.0us"
+    ]
+    # Reference metrics and metrics without a baseline are not compared
+    assert compare({"spawn_us": 9000.0, "new_us": 1.0}, baseline) == []
@@ -0,0 +1,66 @@
+"""
+Tests for the read-only response cache.
+"""
+
+from servers.gh.cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalized_arguments_share_a_key():
+    cache = ResponseCache()
+    cache.put("gh_pr_view", {"number": 5.0, "repository": "Owner/Repo"}, "pr")
+    assert cache.get("gh_pr_view", {"repository": "owner/repo", "number": 5}) == "pr"
+    assert cache.get("gh_issue_view", {"repository": "owner/repo", "number": 5}) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put("gh_pr_list", {}, "prs")
+    clock.now = 9.9
+    assert cache.get("gh_pr_list", {}) == "prs"
+    clock.now = 10.0
+    assert cache.get("gh_pr_list", {}) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("gh_pr_view", {"number": 1}, "one")
+    cache.put("gh_pr_view", {"number": 2}, "two")
+    cache.get("gh_pr_view", {"number": 1})
+    cache.put("gh_pr_view", {"number": 3}, "three")
+    assert cache.get("gh_pr_view", {"number": 2}) is None
+    assert cache.get("gh_pr_view", {"number": 1}) == "one"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_is_scoped_to_repository_and_tools():
+    cache = ResponseCache()
+    cache.put("gh_pr_view", {"number": 1, "repository": "o/a"}, "a")
+    cache.put("gh_pr_view", {"number": 1, "repository": "o/b"}, "b")
+    cache.put("gh_pr_view", {"number": 1}, "current")
+    cache.put("gh_issue_list", {"repository": "o/a"}, "issues")
+
+    assert cache.invalidate({"gh_pr_view"}, "O/A") == 2
+    assert cache.get("gh_pr_view", {"number": 1, "repository": "o/b"}) == "b"
+    assert cache.get("gh_issue_list", {"repository": "o/a"}) == "issues"
+
+    # A write without an explicit repository may have targeted any of them
+    assert cache.invalidate({"gh_pr_view"}) == 1
+    assert cache.get("gh_pr_view", {"number": 1, "repository": "o/b"}) is None
+
+
+def test_zero_ttl_disables_cache():
+    cache = ResponseCache(ttl=0)
+    cache.put("gh_pr_list", {}, "prs")
+    assert cache.get("gh_pr_list", {}) is None
+    assert not cache.stats()["enabled"]
@@ -0,0 +1,120 @@
+"""
+Tests for recording and replaying gh invocations.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from servers.gh.cassette import RECORD, REDACTED, REPLAY, Cassette
+
+
+def fake_runner(calls):
+    async def run(argv, input_data=None, timeout=None, on_stdout=None, on_stderr=None, env=None):
+        calls.append(argv)
+        if argv[1:3] == ["auth", "token"]:
+            stdout = "gho_secret\n"
+        else:
+            stdout = json.dumps({"args": argv[1:], "stdin": input_data, "call": len(calls)})
+        if on_stdout is not None:
+            on_stdout(stdout.encode())
+            stdout = ""
+        return {"stdout": stdout, "stderr": "", "returncode": 0, "success": True}
+
+    return run
+
+
+def record(path, *invocations):
+    calls = []
+    cassette = Cassette(path, RECORD, run=fake_runner(calls))
+
+    async def scenario():
+        return [await cassette.run(argv, **kwargs) for argv, kwargs in invocations]
+
+    return asyncio.run(scenario()), calls
+
+
+def test_record_and_replay(tmp_path):
+    path = tmp_path / "session.jsonl"
+    recorded, calls = record(
+        path,
+        (["/usr/bin/gh", "pr", "list"], {}),
+        (["/usr/bin/gh", "pr", "list"], {}),
+        (["/usr/bin/gh", "api", "graphql", "--input", "-"], {"input_data": "{}"}),
+    )
+    assert len(calls) == 3
+    assert len(path.read_text().splitlines()) == 3
+
+    replay = Cassette(path, REPLAY)
+
+    async def scenario():
+        # Matched without the executable's path, recordings answered in turn
+        return [
+            await replay.run(["gh", "pr", "list"]),
+            await replay.run(["gh", "pr", "list"]),
+            await replay.run(["gh", "pr", "list"]),
+            await replay.run(["gh", "api", "graphql", "--input", "-"], input_data="{}"),
+            await replay.run(["gh", "api", "graphql", "--input", "-"], input_data="{\"other\": 1}"),
+        ]
+
+    first, second, third, graphql, missing = asyncio.run(scenario())
+    assert first == recorded[0]
+    assert second == recorded[1]
+    assert third == recorded[0]
+    assert graphql == recorded[2]
+    assert not missing["success"]
+    assert "No recorded gh invocation" in missing["stderr"]
+    assert replay.stats()["replayed"] == 4
+    assert replay.stats()["missed"] == 1
+
+
+def test_token_is_redacted(tmp_path):
+    path = tmp_path / "session.jsonl"
+    recorded, _ = record(path, (["gh", "auth", "token", "--hostname", "github.com"], {}))
+    assert recorded[0]["stdout"] == "gho_secret\n"
+    assert "gho_secret" not in path.read_text()
+    assert json.loads(path.read_text())["stdout"] == REDACTED
+
+
+def test_streamed_output_is_recorded_and_replayed(tmp_path):
+    path = tmp_path / "session.jsonl"
+    chunks = []
+    record(path, (["gh", "run", "view", "1", "--log"], {"on_stdout": chunks.append}))
+    assert chunks
+
+    replayed = []
+    cassette = Cassette(path, REPLAY)
+    result = asyncio.run(
+        cassette.run(["gh", "run", "view", "1", "--log"], on_stdout=replayed.append)
+    )
+    assert replayed == chunks
+    assert result["stdout"] == ""
+
+
+def test_replay_latency_and_timeout(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_text(json.dumps({
+        "args": ["pr", "list"], "stdin": None, "stdout": "[]", "stderr": "",
+        "returncode": 0, "duration": 2.0, "recorded_at": 0,
+    }) + "\n")
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    cassette = Cassette(path, REPLAY, latency=0.5, sleep=sleep)
+    assert asyncio.run(cassette.run(["gh", "pr", "list"]))["success"]
+    assert slept == [1.0]
+
+    result = asyncio.run(cassette.run(["gh", "pr", "list"], timeout=0.25))
+    assert slept == [1.0, 0.25]
+    assert result["returncode"] == -1
+    assert "timed out" in result["stderr"]
+
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(ValueError, match="mode"):
+        Cassette(tmp_path / "x.jsonl", "playback")
+    with pytest.raises(ValueError, match="runner"):
+        Cassette(tmp_path / "x.jsonl", RECORD)
@@ -0,0 +1,132 @@
+"""
+Tests for the cached gh token and child environment.
+"""
+
+import asyncio
+
+import pytest
+
+from servers.gh.credentials import GhCredentials, is_rejected, minimal_environment, token_variable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def token_runner(tokens, calls):
+    async def run(argv, timeout=None):
+        calls.append(argv[1:])
+        token = tokens.pop(0)
+        if token is None:
+            return {"stdout": "", "stderr": "not logged in", "returncode": 1, "success": False}
+        return {"stdout": token + "\n", "stderr": "", "returncode": 0, "success": True}
+
+    return run
+
+
+ENVIRON = {
+    "PATH": "/usr/bin",
+    "HOME": "/home/user",
+    "LC_ALL": "C.UTF-8",
+    "GH_CONFIG_DIR": "/home/user/.config/gh",
+    "AWS_SECRET_ACCESS_KEY": "secret",
+    "CUSTOM_CA": "/etc/ca.pem",
+}
+
+
+def test_minimal_environment():
+    env = minimal_environment(ENVIRON, extra=["CUSTOM_CA"])
+    assert env["PATH"] == "/usr/bin"
+    assert env["LC_ALL"] == "C.UTF-8"
+    assert env["GH_CONFIG_DIR"] == "/home/user/.config/gh"
+    assert env["CUSTOM_CA"] == "/etc/ca.pem"
+    assert "AWS_SECRET_ACCESS_KEY" not in env
+    assert env["GH_PROMPT_DISABLED"] == "1"
+    assert env["GH_NO_UPDATE_NOTIFIER"] == "1"
+
+
+def test_token_variable():
+    assert token_variable("github.com") == "GH_TOKEN"
+    assert token_variable("acme.ghe.com") == "GH_TOKEN"
+    assert token_variable("github.example.com") == "GH_ENTERPRISE_TOKEN"
+
+
+def test_token_is_resolved_once_and_environment_reused():
+    calls = []
+    credentials = GhCredentials(
+        token_runner(["gho_one"], calls), environ=ENVIRON, clock=FakeClock()
+    )
+
+    async def scenario():
+        first = await credentials.environment()
+        second = await credentials.environment()
+        assert first is second
+        assert await credentials.token() == "gho_one"
+        return first
+
+    env = asyncio.run(scenario())
+    assert env["GH_TOKEN"] == "gho_one"
+    assert "AWS_SECRET_ACCESS_KEY" not in env
+    assert calls == [["auth", "token", "--hostname", "github.com"]]
+
+
+def test_token_expires_after_ttl():
+    calls = []
+    clock = FakeClock()
+    credentials = GhCredentials(
+        token_runner(["ghu_one", "ghu_two"], calls), ttl=100, environ=ENVIRON, clock=clock
+    )
+
+    async def scenario():
+        assert (await credentials.environment())["GH_TOKEN"] == "ghu_one"
+        clock.now = 99
+        assert (await credentials.environment())["GH_TOKEN"] == "ghu_one"
+        clock.now = 100
+        assert (await credentials.environment())["GH_TOKEN"] == "ghu_two"
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_rejected_token_is_refreshed():
+    calls = []
+    credentials = GhCredentials(
+        token_runner(["gho_old", "gho_new"], calls), environ=ENVIRON, clock=FakeClock()
+    )
+
+    async def scenario():
+        await credentials.environment()
+        return await credentials.rejected()
+
+    assert asyncio.run(scenario())["GH_TOKEN"] == "gho_new"
+    assert credentials.stats()["rejections"] == 1
+    assert is_rejected({"success": False, "stderr": "gh: Bad credentials (HTTP 401)"})
+    assert not is_rejected({"success": False, "stderr": "gh: Not Found (HTTP 404)"})
+
+
+def test_failed_resolution_falls_back_to_full_environment():
+    calls = []
+    clock = FakeClock()
+    credentials = GhCredentials(
+        token_runner([None, "gho_one"], calls),
+        retry_interval=30,
+        environ=ENVIRON,
+        clock=clock
+    )
+
+    async def scenario():
+        env = await credentials.environment()
+        assert env["AWS_SECRET_ACCESS_KEY"] == "secret"
+        assert env["GH_PROMPT_DISABLED"] == "1"
+        assert "GH_TOKEN" not in env
+        with pytest.raises(RuntimeError, match="not logged in"):
+            await credentials.token()
+        clock.now = 30
+        assert (await credentials.environment())["GH_TOKEN"] == "gho_one"
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
@@ -0,0 +1,89 @@
+"""
+Tests for the conditional-request ETag store.
+"""
+
+import asyncio
+
+from servers.gh.etag_store import ETagStore, conditional_api_request, parse_http_response
+
+
+def response(status, headers, body, returncode=0):
+    head = f"HTTP/2.0 {status} Status\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    return {
+        "stdout": head + "\r\n" + body,
+        "stderr": "",
+        "returncode": returncode,
+        "success": returncode == 0,
+    }
+
+
+class FakeGh:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def __call__(self, args):
+        self.calls.append(args)
+        return self.responses.pop(0)
+
+
+def test_parse_http_response():
+    status, headers, body = parse_http_response(
+        'HTTP/2.0 200 OK\r\nEtag: "abc"\r\nX-Ratelimit-Remaining: 4999\r\n\r\n{"a": 1}'
+    )
+    assert status == 200
+    assert headers == {"etag": '"abc"', "x-ratelimit-remaining": "4999"}
+    assert body == '{"a": 1}'
+    assert parse_http_response("plain") == (0, {}, "plain")
+
+
+def test_not_modified_is_served_from_store():
+    store = ETagStore(":memory:")
+    gh = FakeGh(
+        response(
+            200,
+            {"Etag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+            '{"n": 1}'
+        ),
+        response(304, {"Etag": '"v1"'}, "", returncode=1),
+    )
+    args = ["api", "/repos/o/r"]
+
+    first = asyncio.run(conditional_api_request(store, gh, args))
+    second = asyncio.run(conditional_api_request(store, gh, args))
+
+    assert first["stdout"] == second["stdout"] == '{"n": 1}'
+    assert second["success"]
+    assert gh.calls[0] == ["api", "--include", "/repos/o/r"]
+    assert 'If-None-Match: "v1"' in gh.calls[1]
+    assert "If-Modified-Since: Mon, 01 Jan 2024 00:00:00 GMT" in gh.calls[1]
+    assert store.stats()["not_modified"] == 1
+
+
+def test_changed_resource_replaces_stored_body():
+    store = ETagStore(":memory:")
+    gh = FakeGh(
+        response(200, {"Etag": '"v1"'}, "old"),
+        response(200, {"Etag": '"v2"'}, "new"),
+    )
+    asyncio.run(conditional_api_request(store, gh, ["api", "x"]))
+    result = asyncio.run(conditional_api_request(store, gh, ["api", "x"]))
+    assert result["stdout"] == "new"
+    assert store.lookup(store.key(["api", "x"]))[0] == '"v2"'
+
+
+def test_errors_are_not_stored():
+    store = ETagStore(":memory:")
+    gh = FakeGh(response(404, {"Etag": '"e"'}, '{"message": "Not Found"}', returncode=1))
+    result = asyncio.run(conditional_api_request(store, gh, ["api", "missing"]))
+    assert not result["success"]
+    assert result["stdout"] == '{"message": "Not Found"}'
+    assert store.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_pruned():
+    store = ETagStore(":memory:", max_entries=2)
+    for key in ("a", "b", "c"):
+        store.save(key, '"e"', None, key)
+    assert store.stats()["entries"] == 2
+    assert store.lookup("a") is None
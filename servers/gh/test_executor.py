@@ -0,0 +1,124 @@
+"""
+Tests for the asynchronous subprocess executor.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from servers.gh.executor import PROCESS_GROUPS, run_process
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_captures_output_and_returncode():
+    result = asyncio.run(run_process(python(
+        "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"
+    )))
+    assert result["stdout"] == "out\n"
+    assert result["stderr"] == "err\n"
+    assert result["returncode"] == 3
+    assert result["success"] is False
+
+
+def test_passes_stdin():
+    result = asyncio.run(run_process(
+        python("import sys; print(sys.stdin.read().upper())"),
+        input_data="hello"
+    ))
+    assert result["success"]
+    assert result["stdout"] == "HELLO\n"
+
+
+def test_processes_run_concurrently():
+    async def run_many():
+        return await asyncio.gather(*[
+            run_process(python("import time; time.sleep(0.5)")) for _ in range(5)
+        ])
+
+    start = time.monotonic()
+    results = asyncio.run(run_many())
+    assert all(r["success"] for r in results)
+    assert time.monotonic() - start < 2.0
+
+
+def test_timeout_kills_process():
+    start = time.monotonic()
+    result = asyncio.run(run_process(python("import time; time.sleep(30)"), timeout=0.5))
+    assert time.monotonic() - start < 5
+    assert result["returncode"] == -1
+    assert "timed out after 0.5 seconds" in result["stderr"]
+
+
+def test_streams_to_callback():
+    received = []
+    result = asyncio.run(run_process(
+        python("print('x' * 200000)"),
+        on_stdout=received.append
+    ))
+    assert result["success"]
+    assert result["stdout"] == ""
+    assert len(b"".join(received)) == 200001
+
+
+def test_missing_binary():
+    result = asyncio.run(run_process(["definitely-not-a-real-gh-binary"]))
+    assert result["returncode"] == -1
+    assert not result["success"]
+
+
+# Starts a grandchild that sleeps, prints its PID and waits on it
+SPAWN_GRANDCHILD = (
+    "import subprocess, sys, time\n"
+    "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+    "print(child.pid, flush=True)\n"
+    "child.wait()\n"
+)
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not PROCESS_GROUPS, reason="process groups are POSIX only")
+def test_timeout_kills_process_group():
+    result = asyncio.run(run_process(python(SPAWN_GRANDCHILD), timeout=1))
+    assert result["returncode"] == -1
+    grandchild = int(result["stdout"].split()[0])
+    deadline = time.monotonic() + 5
+    while alive(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(grandchild)
+
+
+@pytest.mark.skipif(not PROCESS_GROUPS, reason="process groups are POSIX only")
+def test_cancellation_kills_process_group():
+    pids = []
+
+    async def scenario():
+        task = asyncio.create_task(run_process(
+            python(SPAWN_GRANDCHILD),
+            on_stdout=lambda chunk: pids.extend(int(pid) for pid in chunk.split())
+        ))
+        while not pids:
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.monotonic()
+    asyncio.run(scenario())
+    assert time.monotonic() - start < 10
+    deadline = time.monotonic() + 5
+    while alive(pids[0]) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not alive(pids[0])
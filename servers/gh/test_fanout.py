@@ -0,0 +1,73 @@
+"""
+Tests for fanning list tools out over many repositories.
+"""
+
+import asyncio
+
+import pytest
+
+from servers.gh.fanout import FanoutError, fan_out, merge_newest, parse_repositories
+
+
+def item(number, updated):
+    return {"number": number, "updatedAt": f"2024-01-{updated:02d}T00:00:00Z"}
+
+
+def test_parse_repositories():
+    assert parse_repositories(["o/a", " o/b ", "o/a"]) == ["o/a", "o/b"]
+    assert parse_repositories("o/a,o/b") == ["o/a", "o/b"]
+    with pytest.raises(ValueError, match="nope"):
+        parse_repositories(["o/a", "nope"])
+    with pytest.raises(ValueError):
+        parse_repositories(3)
+
+
+def test_merge_newest_is_lazy():
+    consumed = []
+
+    def stream(name, days):
+        for day in days:
+            consumed.append((name, day))
+            yield item(day, day)
+
+    merged = merge_newest(stream("a", [9, 5, 1]), stream("b", [8, 7, 6, 2]), limit=3)
+    assert [entry["number"] for entry in merged] == [9, 8, 7]
+    # Neither stream was read much past the items it contributed
+    assert ("a", 1) not in consumed and ("b", 2) not in consumed
+    assert merge_newest([item(1, 1)], [{"number": 2}]) == [item(1, 1), {"number": 2}]
+
+
+def test_fan_out_merges_and_limits():
+    answers = {
+        "o/a": [item(1, 3), item(2, 10)],
+        "o/b": [item(3, 7), item(4, 1)],
+        "o/c": [item(5, 12)],
+    }
+    running = 0
+    peak = 0
+
+    async def fetch(repository):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 if repository == "o/a" else 0)
+        running -= 1
+        return [dict(entry) for entry in answers[repository]]
+
+    items, errors = asyncio.run(fan_out(list(answers), fetch, limit=3, concurrency=2))
+    assert [(entry["repository"], entry["number"]) for entry in items] == [
+        ("o/c", 5), ("o/a", 2), ("o/b", 3),
+    ]
+    assert errors == {}
+    assert peak == 2
+
+
+def test_fan_out_reports_failed_repositories():
+    async def fetch(repository):
+        if repository == "o/missing":
+            raise FanoutError("Could not resolve to a Repository")
+        return [item(1, 1)]
+
+    items, errors = asyncio.run(fan_out(["o/a", "o/missing"], fetch, limit=10))
+    assert [entry["repository"] for entry in items] == ["o/a"]
+    assert errors == {"o/missing": "Could not resolve to a Repository"}
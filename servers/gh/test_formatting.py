@@ -0,0 +1,81 @@
+"""
+Tests for tool output encodings.
+"""
+
+import json
+
+import pytest
+
+from servers.gh.formatting import format_output, project, to_tsv
+
+
+ROWS = json.dumps([
+    {"number": 1, "title": "Fix\tbug", "author": {"login": "a"}, "draft": False},
+    {"number": 2, "title": "Line\nbreak", "labels": []},
+])
+
+
+def test_json_is_minified():
+    assert format_output('{"a": [1, 2]}', "json") == '{"a":[1,2]}'
+
+
+def test_pretty_is_indented():
+    assert format_output('{"a":1}', "pretty") == '{\n  "a": 1\n}'
+
+
+def test_raw_is_unchanged():
+    assert format_output('{"a":  1}', "raw") == '{"a":  1}'
+
+
+def test_jsonl_has_one_row_per_line():
+    lines = format_output(ROWS, "jsonl").split("\n")
+    assert len(lines) == 2
+    assert json.loads(lines[1]) == {"number": 2, "title": "Line\nbreak", "labels": []}
+
+
+def test_tsv_has_header_and_escaped_cells():
+    assert format_output(ROWS, "tsv") == (
+        "number\ttitle\tauthor\tdraft\tlabels\n"
+        '1\tFix\\tbug\t{"login":"a"}\tfalse\t\n'
+        "2\tLine\\nbreak\t\t\t[]"
+    )
+
+
+def test_tsv_of_scalars():
+    assert to_tsv(["a", None, 3]) == "a\n\n3"
+
+
+def test_projection():
+    data = [
+        {
+            "number": 1,
+            "title": "a",
+            "user": {"login": "x", "id": 7},
+            "labels": [{"name": "bug", "id": 3}],
+        },
+        {"number": 2, "user": None},
+    ]
+    assert project(data, ["number", "user.login", "labels.name"]) == [
+        {"number": 1, "user": {"login": "x"}, "labels": [{"name": "bug"}]},
+        {"number": 2, "user": None},
+    ]
+    user = {"user": {"login": "x", "id": 7}}
+    assert project(user, ["user.id", "user"]) == user
+    assert project("text", ["a"]) == "text"
+
+
+def test_projected_output():
+    assert json.loads(format_output(ROWS, "raw", ["number"])) == [{"number": 1}, {"number": 2}]
+    assert format_output(ROWS, "tsv", ["title", "number"]) == (
+        "title\tnumber\nFix\\tbug\t1\nLine\\nbreak\t2"
+    )
+    assert format_output("not json", "json", ["a"]) == "not json"
+
+
+def test_non_json_output_is_passed_through():
+    assert format_output("Logged in to github.com\n", "tsv") == "Logged in to github.com\n"
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        format_output("{}", "yaml")
@@ -0,0 +1,75 @@
+"""
+Tests for the gh api argument handling of the HTTP backend.
+"""
+
+import pytest
+
+from servers.gh.http_backend import HttpBackend, apply_jq, format_jq_output, parse_api_args
+
+
+def test_parses_server_generated_arguments():
+    request = parse_api_args([
+        "api", "--include", "/repos/o/r/issues", "--method", "GET",
+        "--jq", ".title", "--header", 'If-None-Match: "abc"'
+    ])
+    assert request.endpoint == "/repos/o/r/issues"
+    assert request.http_method == "GET"
+    assert request.include
+    assert request.jq == ".title"
+    assert request.headers == {"If-None-Match": '"abc"'}
+
+
+def test_graphql_fields():
+    request = parse_api_args([
+        "api", "graphql", "-f", "query=query { viewer { login } }",
+        "-F", "first=10", "-F", "draft=false"
+    ])
+    assert request.is_graphql
+    assert request.http_method == "POST"
+    assert request.fields == {"query": "query { viewer { login } }", "first": 10, "draft": False}
+
+
+@pytest.mark.parametrize("args", [
+    ["repo", "view", "o/r"],
+    ["api", "/repos/{owner}/{repo}"],
+    ["api", "/user", "--paginate"],
+    ["api", "/user", "--jq", ".[] | .name"],
+    ["api", "graphql", "-F", "query=@query.graphql"],
+    ["api"],
+])
+def test_declines_unsupported_arguments(args):
+    assert parse_api_args(args) is None
+
+
+def test_apply_jq_paths():
+    data = {"owner": {"login": "octocat"}, "topics": ["a", "b"], "none": None}
+    assert apply_jq(data, ".owner.login") == "octocat"
+    assert apply_jq(data, ".topics[1]") == "b"
+    assert apply_jq(data, ".missing") is None
+    assert apply_jq(data, ".none.deeper") is None
+    assert apply_jq(data, ".") == data
+    with pytest.raises(ValueError):
+        apply_jq(data, ".topics.name")
+
+
+def test_format_jq_output():
+    assert format_jq_output("text") == "text\n"
+    assert format_jq_output({"a": 1}) == '{"a": 1}\n'
+    assert format_jq_output(None) == "null\n"
+
+
+@pytest.mark.parametrize("endpoint, url", [
+    ("/repos/o/r", "https://api.github.com/repos/o/r"),
+    ("https://api.github.com/repositories/1/issues?page=2", "https://api.github.com/repositories/1/issues?page=2"),
+    ("https://evil.example/repos/o/r", None),
+    ("http://api.github.com/repos/o/r", None),
+    ("https://api.github.com.evil.example/repos/o/r", None),
+])
+def test_token_only_goes_to_the_api_host(endpoint, url):
+    pytest.importorskip("requests")
+
+    async def token(refresh=False):
+        return "secret"
+
+    backend = HttpBackend(token)
+    assert backend._url(parse_api_args(["api", endpoint])) == url
@@ -0,0 +1,156 @@
+"""
+Tests for spooled workflow log access.
+"""
+
+import asyncio
+import os
+import stat
+
+import pytest
+
+from servers.gh.logs import (
+    LogSpool,
+    ensure_private_dir,
+    read_byte_range,
+    select_lines,
+    selection_size,
+    tail_lines,
+)
+
+
+LOG = "".join(
+    f"{job}\t{step}\t2024-01-01T00:00:0{i}Z line {i}\n"
+    for i, (job, step) in enumerate([
+        ("build", "Set up job"),
+        ("build", "Run tests"),
+        ("build", "Run tests"),
+        ("lint", "Run ruff"),
+        ("lint", "Run ruff"),
+    ])
+)
+
+
+def write_log(tmp_path, text=LOG):
+    path = tmp_path / "run.log"
+    path.write_text(text)
+    return path
+
+
+def test_tail_lines(tmp_path):
+    path = write_log(tmp_path)
+    assert [line.split(b" ")[-1] for line in tail_lines(path, 2)] == [b"3", b"4"]
+    assert len(tail_lines(path, 100)) == 5
+    assert tail_lines(write_log(tmp_path, ""), 3) == []
+    assert tail_lines(write_log(tmp_path, "a\nb"), 1) == [b"b"]
+
+
+def test_byte_range(tmp_path):
+    path = write_log(tmp_path)
+    assert read_byte_range(path, 0, 5) == b"build"
+    assert read_byte_range(path, len(LOG) + 10, 5) == b""
+
+
+def test_job_step_and_regex_filters(tmp_path):
+    path = write_log(tmp_path)
+    selection = select_lines(path, job="BUILD", step="tests")
+    assert [line[-6:] for line in selection["lines"]] == ["line 1", "line 2"]
+    assert selection["matched"] == 2
+
+    selection = select_lines(path, pattern=r"line [34]$")
+    assert len(selection["lines"]) == 2
+    assert all(line.startswith("lint") for line in selection["lines"])
+
+
+def test_line_range_and_max_lines(tmp_path):
+    path = write_log(tmp_path)
+    selection = select_lines(path, start_line=2, end_line=3)
+    assert [line[-6:] for line in selection["lines"]] == ["line 1", "line 2"]
+
+    selection = select_lines(path, max_lines=2)
+    assert len(selection["lines"]) == 2
+    assert selection["truncated"]
+    assert selection["matched"] is None
+
+
+def test_filtered_tail(tmp_path):
+    path = write_log(tmp_path)
+    selection = select_lines(path, job="build", tail=1)
+    assert selection["lines"][0].endswith("line 2")
+    assert selection["matched"] == 3
+    assert selection["truncated"]
+
+
+def test_spool_streams_once_and_reuses_file(tmp_path):
+    spool = LogSpool(tmp_path / "spool")
+    downloads = []
+
+    async def download(write):
+        downloads.append(1)
+        await asyncio.sleep(0.01)
+        write(b"job\tstep\tchunk one\n")
+        write(b"job\tstep\tchunk two\n")
+        return {"stdout": "", "stderr": "", "returncode": 0, "success": True}
+
+    async def scenario():
+        (first, _), (second, _) = await asyncio.gather(
+            spool.fetch("o/r:1", download), spool.fetch("o/r:1", download)
+        )
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert first.read_bytes().count(b"\n") == 2
+    assert len(downloads) == 1
+    # Locks are only kept while a log is being fetched
+    assert spool._locks == {}
+
+
+def test_failed_download_leaves_no_file(tmp_path):
+    spool = LogSpool(tmp_path)
+
+    async def download(write):
+        write(b"partial")
+        return {
+            "stdout": "", "stderr": "run is still in progress", "returncode": 1, "success": False
+        }
+
+    path, result = asyncio.run(spool.fetch("o/r:2", download))
+    assert path is None
+    assert result["stderr"] == "run is still in progress"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_eviction_by_total_size(tmp_path):
+    spool = LogSpool(tmp_path, max_bytes=10)
+    for i, name in enumerate(["a", "b"]):
+        path = spool.path_for(name)
+        path.write_bytes(b"x" * 8)
+    spool.evict()
+    assert len(list(tmp_path.glob("*.log"))) == 1
+
+
+def test_selection_sizes_are_capped():
+    assert selection_size({"tail": "20"}, "tail", maximum=100) == 20
+    assert selection_size({"byte_length": 10 ** 9}, "byte_length", maximum=100) == 100
+    assert selection_size({}, "tail") is None
+    with pytest.raises(ValueError, match="negative"):
+        selection_size({"byte_offset": -1}, "byte_offset")
+    with pytest.raises(ValueError, match="integer"):
+        selection_size({"max_lines": "all"}, "max_lines")
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_spool_directory_must_be_private(tmp_path):
+    ensure_private_dir(tmp_path / "new")
+    assert stat.S_IMODE((tmp_path / "new").stat().st_mode) & 0o077 == 0
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    (shared / LogSpool(shared).path_for("o/r:1").name).write_bytes(b"planted\n")
+
+    async def download(write):
+        return {"stdout": "", "stderr": "", "returncode": 0, "success": True}
+
+    with pytest.raises(PermissionError, match="writable by other users"):
+        asyncio.run(LogSpool(shared).fetch("o/r:1", download))
@@ -0,0 +1,112 @@
+"""
+Tests for per-tool metrics.
+"""
+
+import asyncio
+
+import pytest
+
+from servers.gh.metrics import (
+    FORMAT,
+    GITHUB,
+    QUEUE,
+    SPAWN,
+    Histogram,
+    ToolMetrics,
+    add_phase,
+    add_stdout_bytes,
+    note_cache,
+    note_timeout,
+)
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0, float("inf")))
+    for value in [0.005] * 90 + [0.05] * 8 + [0.5, 3.0]:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.95) == 0.1
+    assert histogram.quantile(1.0) == 3.0
+    assert histogram.snapshot()["max_ms"] == 3000.0
+
+
+def test_call_is_recorded_per_tool():
+    metrics = ToolMetrics()
+
+    async def call(tool, hit, fail=False):
+        with metrics.track(tool) as record:
+            add_phase(QUEUE, 0.002)
+            add_phase(GITHUB, 0.05)
+            add_phase(SPAWN, 0.01)
+            add_phase(FORMAT, 0.001)
+            add_stdout_bytes(100)
+            note_cache(hit)
+            record.failed = fail
+
+    async def scenario():
+        await call("gh_pr_list", hit=False)
+        await call("gh_pr_list", hit=True)
+        await call("gh_pr_list", hit=False, fail=True)
+
+    asyncio.run(scenario())
+    stats = metrics.stats()["gh_pr_list"]
+    assert stats["calls"] == 3
+    assert stats["errors"] == 1
+    assert stats["stdout_bytes"] == 300
+    assert stats["cache_hit_ratio"] == 0.333
+    latency = stats["latency"]
+    assert set(latency) == {"total", "queue", "spawn", "github", "format"}
+    # Spawning is not counted as GitHub time
+    assert latency["github"]["mean_ms"] == 40.0
+    assert latency["spawn"]["mean_ms"] == 10.0
+
+
+def test_nothing_is_recorded_outside_calls_or_in_background_tasks():
+    metrics = ToolMetrics()
+
+    async def background():
+        add_phase(SPAWN, 1.0)
+        note_timeout()
+
+    async def scenario():
+        add_phase(SPAWN, 1.0)
+        with metrics.track("gh_repo_list"):
+            await asyncio.ensure_future(background())
+
+    asyncio.run(scenario())
+    stats = metrics.stats()["gh_repo_list"]
+    assert stats["timeouts"] == 0
+    assert set(stats["latency"]) == {"total"}
+
+
+def test_exception_counts_as_error():
+    metrics = ToolMetrics()
+
+    async def scenario():
+        with metrics.track("gh_api"):
+            raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
+    assert metrics.stats()["gh_api"]["errors"] == 1
+
+
+def test_prometheus_textfile(tmp_path):
+    metrics = ToolMetrics()
+
+    async def scenario():
+        with metrics.track("gh_pr_list"):
+            add_phase(GITHUB, 0.2)
+            note_timeout()
+
+    asyncio.run(scenario())
+    path = tmp_path / "gh_mcp.prom"
+    metrics.write_textfile(str(path))
+    text = path.read_text()
+    assert 'gh_mcp_tool_calls_total{tool="gh_pr_list"} 1' in text
+    assert 'gh_mcp_tool_timeouts_total{tool="gh_pr_list"} 1' in text
+    assert 'gh_mcp_tool_phase_seconds_bucket{tool="gh_pr_list",phase="github",le="0.25"} 1' in text
+    assert 'gh_mcp_tool_phase_seconds_bucket{tool="gh_pr_list",phase="github",le="0.1"} 0' in text
+    assert 'gh_mcp_tool_phase_seconds_count{tool="gh_pr_list",phase="github"} 1' in text
+    assert list(tmp_path.iterdir()) == [path]
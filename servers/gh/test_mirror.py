@@ -0,0 +1,130 @@
+"""
+Tests for the local full-text mirror of issues and pull requests.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from servers.gh.mirror import IssueMirror, match_expression
+
+
+def issue(number, updated, title, body="", labels=(), pull=False, state="open"):
+    item = {
+        "number": number,
+        "title": title,
+        "body": body,
+        "state": state,
+        "html_url": f"https://github.com/o/r/issues/{number}",
+        "user": {"login": "octo"},
+        "labels": [{"name": label} for label in labels],
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": f"2024-01-01T00:00:{updated:02d}Z",
+    }
+    if pull:
+        item["pull_request"] = {"merged_at": None}
+    return item
+
+
+class FakeApi:
+    """Serves the issues endpoint of one repository, changes since ``since`` oldest first."""
+
+    def __init__(self, items):
+        self.items = items
+        self.requests = 0
+
+    async def __call__(self, args, input_data=None):
+        self.requests += 1
+        since = parse_qs(urlsplit(args[-1]).query).get("since", [""])[0]
+        body = sorted(
+            (item for item in self.items if item["updated_at"] >= since),
+            key=lambda item: item["updated_at"]
+        )
+        return {
+            "stdout": "HTTP/2.0 200 OK\r\n\r\n" + json.dumps(body),
+            "stderr": "",
+            "returncode": 0,
+            "success": True
+        }
+
+
+def numbers(results):
+    return [result["number"] for result in results]
+
+
+def test_match_expression():
+    assert match_expression('crash on "start-up"') == '"crash" "on" "start" "up"'
+    with pytest.raises(ValueError):
+        match_expression("?!")
+
+
+def test_sync_and_search(tmp_path):
+    api = FakeApi([
+        issue(1, 1, "Crash on startup", "Segfault when the config is missing"),
+        issue(2, 2, "Docs typo", "The startup guide has a typo", labels=["docs"]),
+        issue(3, 3, "Faster startup", pull=True, state="closed"),
+    ])
+    mirror = IssueMirror(tmp_path / "mirror.sqlite3", ["O/R"])
+    assert not mirror.mirrors("o/r")
+    assert asyncio.run(mirror.sync(api, "O/R")) == 3
+    assert mirror.mirrors("o/r")
+
+    results = mirror.search("startup")
+    # Title matches rank above body matches
+    assert numbers(results)[-1] == 2
+    assert results[0]["repository"] == {"name": "R", "nameWithOwner": "O/R"}
+    assert numbers(mirror.search("startup", pull_requests=True)) == [3]
+    assert numbers(mirror.search("startup", state="open", pull_requests=False)) == [1, 2]
+    assert numbers(mirror.search("docs")) == [2]
+    assert numbers(mirror.search("octo segfault")) == [1]
+    assert mirror.search("startup", repository="x/y") == []
+
+    # An edited item is re-indexed, and only changes are fetched
+    api.items[0] = issue(1, 9, "Crash on shutdown")
+    assert asyncio.run(mirror.sync(api, "O/R")) == 1
+    assert numbers(mirror.search("shutdown")) == [1]
+    assert 1 not in numbers(mirror.search("startup"))
+    mirror.close()
+
+    # The watermark is kept in the database
+    reopened = IssueMirror(tmp_path / "mirror.sqlite3", ["O/R"])
+    assert reopened.watermark("o/r").updated_at == "2024-01-01T00:00:09Z"
+    assert asyncio.run(reopened.sync(api, "O/R")) == 0
+    assert reopened.stats()["items"] == 3
+
+
+def test_failed_sync_is_reported():
+    async def failing(args, input_data=None):
+        return {"stdout": "", "stderr": "HTTP 404: Not Found", "returncode": 1, "success": False}
+
+    mirror = IssueMirror(":memory:", ["o/missing"])
+    asyncio.run(mirror.sync_all(failing))
+    assert "404" in mirror.stats()["repositories"]["o/missing"]["error"]
+    assert not mirror.mirrors("o/missing")
+
+
+def test_unexpected_errors_do_not_stop_updates():
+    calls = 0
+
+    async def malformed(args, input_data=None):
+        nonlocal calls
+        calls += 1
+        return {
+            "stdout": "HTTP/2.0 200 OK\r\n\r\n" + json.dumps([{"title": "no number"}]),
+            "stderr": "",
+            "returncode": 0,
+            "success": True
+        }
+
+    async def scenario(mirror):
+        task = asyncio.ensure_future(mirror.keep_current(malformed, interval=0))
+        while calls < 2:
+            await asyncio.sleep(0)
+        assert not task.done()
+        task.cancel()
+
+    mirror = IssueMirror(":memory:", ["o/r"])
+    asyncio.run(scenario(mirror))
+    assert "KeyError" in mirror.stats()["repositories"]["o/r"]["error"]
@@ -0,0 +1,110 @@
+"""
+Tests for cursor-based gh api pagination.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from servers.gh.pagination import (
+    decode_cursor,
+    encode_cursor,
+    extract_items,
+    fetch_graphql_page,
+    fetch_rest_page,
+    parse_link_header,
+)
+
+
+def rest_response(body, link=None):
+    headers = "HTTP/2.0 200 OK\r\nContent-Type: application/json\r\n"
+    if link:
+        headers += f"Link: {link}\r\n"
+    stdout = headers + "\r\n" + json.dumps(body)
+    return {"stdout": stdout, "stderr": "", "returncode": 0, "success": True}
+
+
+class FakeGh:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    async def __call__(self, args, input_data=None):
+        self.calls.append((args, input_data))
+        return self.pages.pop(0)
+
+
+def test_cursor_round_trip():
+    state = {"kind": "rest", "url": "https://api.github.com/x?page=2", "seen": 3}
+    assert decode_cursor(encode_cursor(state)) == state
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_parse_link_header():
+    links = parse_link_header(
+        '<https://api.github.com/r?page=2>; rel="next", '
+        '<https://api.github.com/r?page=9>; rel="last"'
+    )
+    assert links == {"next": "https://api.github.com/r?page=2", "last": "https://api.github.com/r?page=9"}
+
+
+def test_extract_items_from_wrapped_responses():
+    assert extract_items([1, 2]) == ([1, 2], {})
+    assert extract_items({"total_count": 7, "items": [1]}) == ([1], {"total_count": 7})
+
+
+def test_rest_pages_follow_link_header():
+    gh = FakeGh([
+        rest_response([1, 2], link='<https://api.github.com/repos/o/r/issues?page=2>; rel="next"'),
+        rest_response([3]),
+    ])
+    first = json.loads(asyncio.run(fetch_rest_page(gh, "/repos/o/r/issues", per_page=2))["stdout"])
+    assert gh.calls[0][0] == ["api", "--include", "/repos/o/r/issues?per_page=2"]
+    assert first["items"] == [1, 2]
+
+    result = asyncio.run(fetch_rest_page(gh, "/repos/o/r/issues", cursor=first["next_cursor"]))
+    second = json.loads(result["stdout"])
+    assert gh.calls[1][0][-1] == "https://api.github.com/repos/o/r/issues?page=2"
+    assert second["items"] == [3]
+    assert second["next_cursor"] is None
+    assert second["total_returned"] == 3
+
+
+def test_max_items_stops_pagination():
+    gh = FakeGh([
+        rest_response([1, 2], link='<https://x/next>; rel="next"'),
+        rest_response([3, 4], link='<https://x/after>; rel="next"'),
+    ])
+    first = json.loads(asyncio.run(fetch_rest_page(gh, "/x", max_items=3))["stdout"])
+    result = asyncio.run(fetch_rest_page(gh, "/x", cursor=first["next_cursor"]))
+    second = json.loads(result["stdout"])
+    assert second["items"] == [3]
+    assert second["next_cursor"] is None
+
+
+def test_graphql_pages_follow_page_info():
+    query = (
+        "query($endCursor: String) { viewer { repositories(first: 2, after: $endCursor) "
+        "{ nodes { name } pageInfo { hasNextPage endCursor } } } }"
+    )
+    page = {"data": {"viewer": {"repositories": {
+        "nodes": [{"name": "a"}, {"name": "b"}],
+        "pageInfo": {"hasNextPage": True, "endCursor": "Y3Vyc29y"},
+    }}}}
+    gh = FakeGh([
+        {"stdout": json.dumps(page), "stderr": "", "returncode": 0, "success": True},
+        {"stdout": json.dumps(page), "stderr": "", "returncode": 0, "success": True},
+    ])
+    first = json.loads(asyncio.run(fetch_graphql_page(gh, query, {"x": 1}))["stdout"])
+    assert first["items"] == [{"name": "a"}, {"name": "b"}]
+    assert json.loads(gh.calls[0][1])["variables"] == {"x": 1, "endCursor": None}
+
+    asyncio.run(fetch_graphql_page(gh, query, {"x": 1}, cursor=first["next_cursor"]))
+    assert json.loads(gh.calls[1][1])["variables"]["endCursor"] == "Y3Vyc29y"
+
+
+def test_graphql_query_needs_end_cursor():
+    with pytest.raises(ValueError):
+        asyncio.run(fetch_graphql_page(FakeGh([]), "query { viewer { login } }"))
@@ -0,0 +1,104 @@
+"""
+Tests for the opt-in profiler and stall detection.
+"""
+
+import asyncio
+import logging
+import time
+import tracemalloc
+
+from servers.gh.profiling import Profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_slowest_calls_are_kept_with_commands_and_stacks():
+    profiler = Profiler(slowest=2, interval=0.001, stall_threshold=10, memory=False)
+
+    async def call(tool, seconds):
+        with profiler.track(tool, {"repository": "o/r", "body": "x" * 1000}):
+            profiler.note_command([tool, "list"])
+            busy(seconds)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        profiler.start()
+        try:
+            await call("fast", 0.0)
+            await call("slow", 0.1)
+            await call("medium", 0.05)
+        finally:
+            profiler.stop()
+
+    asyncio.run(scenario())
+    slowest = profiler.stats()["slowest"]
+    assert [entry["tool"] for entry in slowest] == ["slow", "medium"]
+    assert slowest[0]["commands"] == [["slow", "list"]]
+    assert len(slowest[0]["arguments"]["body"]) < 1000
+    assert slowest[0]["samples"] > 0
+    assert any("busy" in frame for frame in slowest[0]["stacks"][0]["stack"])
+
+
+def test_commands_of_background_tasks_are_not_attributed():
+    profiler = Profiler(memory=False)
+
+    async def background():
+        profiler.note_command(["api", "rate_limit"])
+
+    async def scenario():
+        with profiler.track("gh_pr_list", {}):
+            await asyncio.ensure_future(background())
+
+    asyncio.run(scenario())
+    assert profiler.stats()["slowest"][0]["commands"] == []
+
+
+def test_stall_is_detected_and_logged(caplog):
+    profiler = Profiler(interval=0.005, stall_threshold=0.05, memory=False)
+
+    async def scenario():
+        profiler.start()
+        try:
+            await asyncio.sleep(0.05)
+            with profiler.track("gh_blocking", {}):
+                busy(0.3)
+            await asyncio.sleep(0.1)
+        finally:
+            profiler.stop()
+
+    with caplog.at_level(logging.WARNING, logger="servers.gh.profiling"):
+        asyncio.run(scenario())
+    stalls = profiler.stats()["stalls"]
+    assert stalls["count"] == 1
+    stall = stalls["recent"][0]
+    assert stall["tool"] == "gh_blocking"
+    assert stall["duration_ms"] >= 200
+    assert any("busy" in frame for frame in stall["stack"])
+    assert "Event loop blocked" in caplog.text
+
+
+def test_largest_allocations_are_kept():
+    profiler = Profiler(slowest=1, memory=True)
+    kept = []
+
+    async def scenario():
+        profiler.start()
+        try:
+            with profiler.track("small", {}):
+                kept.append(bytearray(1000))
+            with profiler.track("large", {}):
+                kept.append(bytearray(1_000_000))
+        finally:
+            profiler.stop()
+
+    asyncio.run(scenario())
+    assert not tracemalloc.is_tracing()
+    largest = profiler.stats()["largest_allocations"]
+    assert [entry["tool"] for entry in largest] == ["large"]
+    # Other allocations may be freed meanwhile
+    assert largest[0]["memory_growth"] >= 900_000
+    assert any("test_profiling.py" in line for line in largest[0]["allocations"])
@@ -0,0 +1,189 @@
+"""
+Tests for the rate-limit governor.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from servers.gh.ratelimit import (
+    CORE,
+    GRAPHQL,
+    SEARCH,
+    READ_COST,
+    WRITE_COST,
+    RateLimitExceeded,
+    RateLimitGovernor,
+    classify,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def governor(clock, **kwargs):
+    kwargs.setdefault("probe_interval", 0)
+    return RateLimitGovernor(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_classify():
+    assert classify(["api", "repos/o/r/issues"]) == (CORE, READ_COST)
+    assert classify(["api", "--method", "POST", "repos/o/r/issues", "-f", "title=x"]) == (
+        CORE, WRITE_COST
+    )
+    assert classify(["api", "repos/o/r/issues", "-f", "title=x"]) == (CORE, WRITE_COST)
+    assert classify(["api", "search/issues", "-X", "GET", "-f", "q=bug"]) == (SEARCH, READ_COST)
+    assert classify(["api", "graphql", "-f", "query=query { viewer { login } }"]) == (
+        GRAPHQL, READ_COST
+    )
+    assert classify(["api", "graphql", "-f", "query=mutation { x }"]) == (GRAPHQL, WRITE_COST)
+    assert classify(["api", "rate_limit"]) == (None, 0)
+    assert classify(["pr", "list", "--repo", "o/r"]) == (GRAPHQL, READ_COST)
+    assert classify(["pr", "merge", "1"]) == (GRAPHQL, WRITE_COST)
+    assert classify(["run", "list"]) == (CORE, READ_COST)
+    assert classify(["workflow", "run", "ci.yml"]) == (CORE, WRITE_COST)
+    assert classify(["search", "repos", "mcp"]) == (SEARCH, READ_COST)
+
+
+def test_token_bucket_paces_bursts():
+    clock = FakeClock()
+    gov = governor(clock, rate=10, burst=3)
+
+    async def scenario():
+        return [await gov.acquire(["run", "list"]) for _ in range(5)]
+
+    waits = asyncio.run(scenario())
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.1)
+    assert waits[4] == pytest.approx(0.1)
+    assert gov.stats()["paced_calls"] == 2
+
+
+def test_writes_cost_more():
+    clock = FakeClock()
+    gov = governor(clock, rate=1, burst=5)
+    asyncio.run(gov.acquire(["pr", "create"]))
+    wait = asyncio.run(gov.acquire(["pr", "list"]))
+    assert wait == pytest.approx(1.0)
+
+
+def test_low_budget_spreads_calls_until_reset():
+    clock = FakeClock()
+    gov = governor(clock, rate=0, reserve=0.1)
+    gov.observe_headers(200, {
+        "x-ratelimit-limit": "5000",
+        "x-ratelimit-remaining": "100",
+        "x-ratelimit-reset": str(int(clock.now + 200)),
+        "x-ratelimit-resource": "core",
+    })
+
+    async def scenario():
+        return [await gov.acquire(["api", "repos/o/r"]) for _ in range(3)]
+
+    waits = asyncio.run(scenario())
+    assert waits[0] == 0.0
+    assert waits[1] == pytest.approx(2.0)
+    assert waits[2] == pytest.approx(2.0, rel=0.05)
+    assert gov.stats()["resources"]["core"]["remaining"] == 97
+
+
+def test_healthy_budget_is_not_paced():
+    clock = FakeClock()
+    gov = governor(clock, rate=0)
+    gov.update(CORE, limit=5000, remaining=4000, reset=clock.now + 3000)
+    assert asyncio.run(gov.acquire(["api", "repos/o/r"])) == 0.0
+
+
+def test_exhausted_budget_fails_fast():
+    clock = FakeClock()
+    gov = governor(clock, rate=0, max_wait=60)
+    gov.update(GRAPHQL, limit=5000, remaining=0, reset=clock.now + 1800)
+    with pytest.raises(RateLimitExceeded, match="graphql"):
+        asyncio.run(gov.acquire(["pr", "list"]))
+    # Other resources are unaffected
+    assert asyncio.run(gov.acquire(["run", "list"])) == 0.0
+    assert gov.stats()["rejected_calls"] == 1
+
+
+def test_exhausted_budget_waits_for_close_reset():
+    clock = FakeClock()
+    gov = governor(clock, rate=0, max_wait=60)
+    gov.update(CORE, limit=60, remaining=0, reset=clock.now + 10)
+    assert asyncio.run(gov.acquire(["api", "repos/o/r"])) == pytest.approx(10)
+    # After the reset the stale budget no longer applies
+    assert asyncio.run(gov.acquire(["api", "repos/o/r"])) == 0.0
+
+
+def test_secondary_limit_blocks_all_calls():
+    clock = FakeClock()
+    gov = governor(clock, rate=0)
+    gov.observe(["pr", "create"], {
+        "stdout": "",
+        "stderr": "HTTP 403: You have exceeded a secondary rate limit.",
+        "returncode": 1,
+        "success": False,
+    })
+    assert asyncio.run(gov.acquire(["pr", "list"])) == pytest.approx(60)
+
+    gov.observe_headers(429, {"retry-after": "5"})
+    assert asyncio.run(gov.acquire(["pr", "list"])) == pytest.approx(5)
+
+
+def test_included_headers_update_budget():
+    clock = FakeClock()
+    gov = governor(clock)
+    stdout = (
+        "HTTP/2.0 200 OK\r\n"
+        "X-Ratelimit-Limit: 5000\r\n"
+        "X-Ratelimit-Remaining: 4321\r\n"
+        "X-Ratelimit-Reset: 1700003600\r\n"
+        "X-Ratelimit-Resource: core\r\n"
+        "X-Ratelimit-Used: 679\r\n"
+        "\r\n"
+        "{}"
+    )
+    result = {"stdout": stdout, "stderr": "", "returncode": 0, "success": True}
+    gov.observe(["api", "--include", "repos/o/r"], result)
+    core = gov.stats()["resources"]["core"]
+    assert core["remaining"] == 4321
+    assert core["used"] == 679
+    assert core["source"] == "headers"
+
+
+def test_probe_runs_in_background_and_on_refresh():
+    clock = FakeClock()
+    probes = []
+
+    async def probe():
+        probes.append(clock.now)
+        data = {"resources": {
+            "core": {"limit": 5000, "remaining": 4999, "reset": clock.now + 3600, "used": 1},
+            "search": {"limit": 30, "remaining": 30, "reset": clock.now + 60, "used": 0},
+        }}
+        return {"stdout": json.dumps(data), "stderr": "", "returncode": 0, "success": True}
+
+    gov = RateLimitGovernor(rate=0, probe=probe, probe_interval=300, clock=clock, sleep=clock.sleep)
+
+    async def scenario():
+        await gov.acquire(["run", "list"])
+        await asyncio.sleep(0)
+        await gov.acquire(["run", "list"])
+        await asyncio.sleep(0)
+        await gov.refresh()
+
+    asyncio.run(scenario())
+    assert len(probes) == 2
+    stats = gov.stats()
+    assert set(stats["resources"]) == {"core", "search"}
+    assert stats["resources"]["search"]["source"] == "probe"
@@ -0,0 +1,78 @@
+"""
+Tests for the background gh readiness probe.
+"""
+
+import asyncio
+
+from servers.gh.readiness import GhReadiness
+
+
+def fake_runner(responses, calls):
+    async def run(argv, timeout=None):
+        calls.append(argv[1])
+        await asyncio.sleep(0)
+        return responses[argv[1]]
+
+    return run
+
+
+def ok(stdout=""):
+    return {"stdout": stdout, "stderr": "", "returncode": 0, "success": True}
+
+
+def failed(stderr):
+    return {"stdout": "", "stderr": stderr, "returncode": 1, "success": False}
+
+
+def test_installed_and_authenticated():
+    calls = []
+    readiness = GhReadiness(fake_runner({
+        "--version": ok("gh version 2.60.0 (2024-10-01)\nhttps://github.com/cli/cli\n"),
+        "auth": ok(),
+    }, calls))
+
+    async def scenario():
+        readiness.start()
+        assert await readiness.check() is None
+        await readiness.wait()
+
+    asyncio.run(scenario())
+    stats = readiness.stats()
+    assert stats["version"] == "gh version 2.60.0 (2024-10-01)"
+    assert stats["authenticated"] is True
+    assert stats["checked"]
+    assert calls == ["--version", "auth"]
+
+
+def test_missing_gh_is_reported_without_auth_check():
+    calls = []
+    readiness = GhReadiness(fake_runner({
+        "--version": failed("[Errno 2] No such file or directory: 'gh'"),
+    }, calls))
+    message = asyncio.run(readiness.check())
+    assert "gh is not available" in message
+    assert "cli.github.com" in message
+    assert calls == ["--version"]
+
+
+def test_check_does_not_wait_for_authentication():
+    calls = []
+    auth_started = None
+
+    async def run(argv, timeout=None):
+        calls.append(argv[1])
+        if argv[1] == "auth":
+            auth_started.set()
+            await asyncio.sleep(10)
+        return ok("gh version 2.60.0")
+
+    readiness = GhReadiness(run)
+
+    async def scenario():
+        nonlocal auth_started
+        auth_started = asyncio.Event()
+        assert await asyncio.wait_for(readiness.check(), 1) is None
+        await auth_started.wait()
+        assert readiness.authenticated is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,117 @@
+"""
+Tests for the declarative tool registry.
+"""
+
+import json
+
+import pytest
+
+from servers.gh.registry import TOOL_SPECS, TOOLS
+from servers.gh.retry import IDEMPOTENT, READ, WRITE
+
+
+def args_for(tool, **arguments):
+    return TOOLS[tool].build_args(arguments)[0]
+
+
+def test_names_are_unique():
+    assert len(TOOLS) == len(TOOL_SPECS)
+
+
+def test_schemas_are_consistent():
+    for spec in TOOL_SPECS:
+        schema = spec.input_schema()
+        assert schema["type"] == "object"
+        assert set(schema.get("required", [])) <= set(schema["properties"])
+        json.dumps(schema)
+
+
+def test_options_switches_and_json_fields():
+    assert args_for("gh_pr_list", repository="o/r", state="open", limit=5, author="me") == [
+        "pr", "list", "--repo", "o/r", "--state", "open", "--limit", "5", "--author", "me",
+        "--json", "number,title,state,url,author,createdAt,updatedAt",
+    ]
+    assert args_for("gh_workflow_list", all=True)[:3] == ["workflow", "list", "--all"]
+
+
+def test_field_selection():
+    assert args_for("gh_pr_list", fields=["number", "title"])[-2:] == ["--json", "number,title"]
+    args = args_for("gh_pr_view", number=1, fields="title, reviewDecision,title")
+    assert args[-1] == "title,reviewDecision"
+    assert args_for("gh_run_view", run_id=1, fields=["status"])[-1] == "status"
+    with pytest.raises(ValueError, match="mergeable"):
+        args_for("gh_issue_list", fields=["title", "mergeable"])
+    with pytest.raises(ValueError):
+        args_for("gh_pr_list", fields=[])
+    schema = TOOLS["gh_pr_list"].input_schema()["properties"]["fields"]
+    assert "mergeable" in schema["items"]["enum"]
+    # Default fields are always allowed, and tools without --json take no fields
+    for spec in TOOL_SPECS:
+        assert set(spec.json_fields or ()) <= set(spec.allowed_fields)
+    assert "fields" not in TOOLS["gh_pr_merge"].input_schema()["properties"]
+
+
+def test_fanout_parameters():
+    fanout = {spec.name for spec in TOOL_SPECS if spec.fanout}
+    assert fanout == {"gh_pr_list", "gh_issue_list", "gh_run_list"}
+    for name in fanout:
+        assert {"repositories", "org", "topic"} <= set(TOOLS[name].input_schema()["properties"])
+    # Server-side parameters do not reach gh
+    assert "acme" not in args_for("gh_pr_list", org="acme", topic="cli")
+
+
+def test_positionals_and_value_flags():
+    assert args_for("gh_pr_merge", number=7, merge_method="squash", delete_branch=True) == [
+        "pr", "merge", "7", "--squash", "--delete-branch",
+    ]
+    args = args_for("gh_repo_list", owner="octo", visibility="public")
+    assert args[:4] == ["repo", "list", "octo", "--public"]
+    assert args_for("gh_pr_checkout", number=3, branch="fix") == ["pr", "checkout", "3", "fix"]
+
+
+def test_web_replaces_json_fields():
+    assert args_for("gh_pr_view", number=1, web=True) == ["pr", "view", "1", "--web"]
+    assert "--json" in args_for("gh_pr_view", number=1)
+
+
+def test_switch_with_otherwise():
+    assert args_for("gh_repo_create", name="x") == ["repo", "create", "x", "--private"]
+    args = args_for("gh_repo_create", name="x", public=True, clone=True)
+    assert args == ["repo", "create", "x", "--public", "--clone"]
+
+
+def test_search_qualifiers_and_split():
+    assert args_for("gh_search_repos", query="mcp", language="python", stars=">10")[:3] == [
+        "search", "repos", "mcp language:python stars:>10",
+    ]
+    args = args_for("gh_gist_create", files="a.py, b.py", public=True)
+    assert args == ["gist", "create", "a.py", "b.py", "--public"]
+
+
+def test_missing_required_argument():
+    with pytest.raises(KeyError):
+        args_for("gh_issue_create", body="no title")
+
+
+def test_api_builder():
+    args, input_data = TOOLS["gh_api"].build_args(
+        {"endpoint": "graphql", "query": "{ viewer { login } }"}
+    )
+    assert args == ["api", "graphql", "--input", "-"]
+    assert json.loads(input_data) == {"query": "{ viewer { login } }", "variables": {}}
+    assert args_for("gh_api", endpoint="repos/o/r", method="GET", field="name") == [
+        "api", "repos/o/r", "--method", "GET", "--jq", ".name",
+    ]
+    with pytest.raises(ValueError):
+        args_for("gh_api", endpoint="repos/o/r", query="{ x }")
+
+
+def test_execution_properties():
+    assert TOOLS["gh_pr_merge"].idempotency == WRITE
+    assert TOOLS["gh_issue_close"].call_idempotency({"number": 5}) == IDEMPOTENT
+    assert TOOLS["gh_issue_close"].call_idempotency({"number": 5, "comment": "thanks!"}) == WRITE
+    assert TOOLS["gh_pr_list"].idempotency == READ
+    assert TOOLS["gh_run_list"].default_limit == 20
+    assert TOOLS["gh_pr_list"].default_limit == 30
+    assert TOOLS["gh_pr_view"].default_limit is None
+    assert not TOOLS["gh_batch"].runs_gh
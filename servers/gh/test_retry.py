@@ -0,0 +1,131 @@
+"""
+Tests for retries of transient gh failures.
+"""
+
+import asyncio
+
+from servers.gh.registry import TOOLS
+from servers.gh.retry import (
+    IDEMPOTENT,
+    READ,
+    REJECTED,
+    TRANSIENT,
+    WRITE,
+    RetryPolicy,
+    failure_kind,
+    is_retryable,
+)
+
+
+def ok(stdout="{}"):
+    return {"stdout": stdout, "stderr": "", "returncode": 0, "success": True}
+
+
+def failed(stderr, stdout=""):
+    return {"stdout": stdout, "stderr": stderr, "returncode": 1, "success": False}
+
+
+def policy(**kwargs):
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    kwargs.setdefault("rng", lambda: 1.0)
+    return RetryPolicy(sleep=sleep, **kwargs), sleeps
+
+
+def scripted(*results):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return results[len(calls) - 1]
+
+    return call, calls
+
+
+def test_failure_kind():
+    assert failure_kind(failed("gh: Server Error (HTTP 502)")) == TRANSIENT
+    assert failure_kind(failed("read: connection reset by peer")) == TRANSIENT
+    assert failure_kind(failed("HTTP 403: You have exceeded a secondary rate limit")) == REJECTED
+    assert failure_kind(failed("dial tcp: lookup api.github.com: no such host")) == REJECTED
+    assert failure_kind(failed("", stdout="HTTP/2.0 503 Service Unavailable\r\n\r\n")) == TRANSIENT
+    assert failure_kind(failed("GraphQL: Could not resolve to a PullRequest")) is None
+    assert failure_kind(failed("Command timed out after 60 seconds")) is None
+    assert failure_kind(ok()) is None
+
+
+def test_writes_retry_only_rejected_requests():
+    assert is_retryable(READ, TRANSIENT)
+    assert is_retryable(IDEMPOTENT, TRANSIENT)
+    assert not is_retryable(WRITE, TRANSIENT)
+    assert is_retryable(WRITE, REJECTED)
+    assert not is_retryable(READ, None)
+
+
+def test_transient_read_is_retried_with_backoff():
+    retry, sleeps = policy(attempts=4, base_delay=0.5, max_delay=1.5)
+    call, calls = scripted(failed("HTTP 502"), failed("HTTP 502"), failed("HTTP 502"), ok())
+    result = asyncio.run(retry.run(call, READ))
+    assert result["success"]
+    assert len(calls) == 4
+    assert sleeps == [0.5, 1.0, 1.5]
+    assert retry.stats()["recovered"] == 1
+
+
+def test_transient_write_is_not_retried():
+    retry, sleeps = policy()
+    call, calls = scripted(failed("HTTP 502"), ok())
+    result = asyncio.run(retry.run(call, WRITE))
+    assert not result["success"]
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_commented_close_is_not_retried():
+    retry, _ = policy()
+    call, calls = scripted(failed("gh: Server Error (HTTP 502)"), ok())
+    idempotency = TOOLS["gh_issue_close"].call_idempotency({"number": 5, "comment": "thanks!"})
+    assert not asyncio.run(retry.run(call, idempotency))["success"]
+    assert len(calls) == 1
+
+
+def test_rejected_write_is_retried():
+    retry, _ = policy()
+    call, calls = scripted(failed("connect: connection refused"), ok())
+    assert asyncio.run(retry.run(call, WRITE))["success"]
+    assert len(calls) == 2
+
+
+def test_attempts_are_bounded():
+    retry, sleeps = policy(attempts=2)
+    call, calls = scripted(failed("HTTP 503"), failed("HTTP 503"), ok())
+    assert not asyncio.run(retry.run(call, READ))["success"]
+    assert len(calls) == 2
+    # No backoff after the last attempt
+    assert sleeps == [0.5]
+    assert retry.stats()["exhausted"] == 1
+
+
+def test_retry_after_is_honored():
+    retry, sleeps = policy(rng=lambda: 0.0)
+    limited = failed("", stdout="HTTP/2.0 429 Too Many Requests\r\nRetry-After: 3\r\n\r\n")
+    call, _ = scripted(limited, ok())
+    assert asyncio.run(retry.run(call, READ))["success"]
+    assert sleeps == [3.0]
+
+
+def test_long_retry_after_is_not_waited_out():
+    retry, sleeps = policy(max_retry_after=10)
+    limited = failed("", stdout="HTTP/2.0 429 Too Many Requests\r\nRetry-After: 600\r\n\r\n")
+    call, calls = scripted(limited, ok())
+    assert not asyncio.run(retry.run(call, READ))["success"]
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_jitter_stays_below_ceiling():
+    retry = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    for attempt in range(6):
+        assert 0 <= retry.delay(attempt) <= min(4.0, 2 ** attempt)
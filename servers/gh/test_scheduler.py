@@ -0,0 +1,89 @@
+"""
+Tests for the gh concurrency scheduler.
+"""
+
+import asyncio
+
+import pytest
+
+from servers.gh.scheduler import BACKGROUND, BULK, INTERACTIVE, GhScheduler
+
+
+def test_global_limit():
+    async def scenario():
+        scheduler = GhScheduler(max_concurrency=2, max_per_repo=2)
+        peak = 0
+
+        async def job(i):
+            nonlocal peak
+            async with scheduler.slot(f"o/r{i}"):
+                peak = max(peak, scheduler.stats()["in_flight"])
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[job(i) for i in range(10)])
+        return peak, scheduler.stats()
+
+    peak, stats = asyncio.run(scenario())
+    assert peak == 2
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_per_repo_limit_does_not_block_other_repos():
+    async def scenario():
+        scheduler = GhScheduler(max_concurrency=4, max_per_repo=1)
+        await scheduler.acquire("o/a")
+        blocked = asyncio.create_task(scheduler.acquire("O/A"))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        # A different repository still gets a slot immediately
+        assert await scheduler.acquire("o/b") == 0.0
+        scheduler.release("o/a")
+        await blocked
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight_per_repo"] == {"o/a": 1, "o/b": 1}
+
+
+def test_lanes_are_served_in_priority_order():
+    async def scenario():
+        scheduler = GhScheduler(max_concurrency=1)
+        order = []
+        await scheduler.acquire()
+
+        async def job(lane, label):
+            async with scheduler.slot(lane=lane):
+                order.append(label)
+
+        tasks = [
+            asyncio.create_task(job(BACKGROUND, "background")),
+            asyncio.create_task(job(BULK, "bulk")),
+            asyncio.create_task(job(INTERACTIVE, "interactive")),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queue_depth"] == 3
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["interactive", "bulk", "background"]
+    assert stats["lanes"]["background"]["granted"] == 1
+    assert stats["lanes"]["background"]["wait_max_ms"] > 0
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        scheduler = GhScheduler(max_concurrency=1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.queue_depth() == 0
+        scheduler.release()
+        return scheduler.stats()
+
+    assert asyncio.run(scenario())["in_flight"] == 0
@@ -0,0 +1,85 @@
+"""
+Tests for spilling oversized responses to disk.
+"""
+
+import os
+import time
+
+import pytest
+
+from servers.gh.spill import SpillStore, utf8_prefix
+
+
+TEXT = "résumé ✓ " * 100
+
+
+def test_utf8_prefix():
+    data = "aé✓".encode("utf-8")
+    assert utf8_prefix(data, 10) == data
+    assert utf8_prefix(data, 1) == b"a"
+    # Never splits the two-byte é or the three-byte ✓
+    assert utf8_prefix(data, 2) == b"a"
+    assert utf8_prefix(data, 3) == "aé".encode("utf-8")
+    assert utf8_prefix(data, 5) == "aé".encode("utf-8")
+    assert utf8_prefix(data, 0) == b""
+
+
+def test_spill_and_read(tmp_path):
+    store = SpillStore(tmp_path / "spill")
+    data = TEXT.encode("utf-8")
+    handle = store.spill(data)
+    assert len(handle) == 32
+    assert list((tmp_path / "spill").iterdir()) == [tmp_path / "spill" / f"{handle}.out"]
+
+    parts, offset = [], 0
+    while offset < len(data):
+        chunk, total = store.read(handle, offset, 7)
+        assert total == len(data)
+        chunk.decode("utf-8")  # ranges end on character boundaries
+        assert 0 < len(chunk) <= 7
+        parts.append(chunk)
+        offset += len(chunk)
+    assert b"".join(parts) == data
+    assert store.read(handle, len(data) + 5, 10) == (b"", len(data))
+    assert store.stats()["spilled"] == 1
+
+
+def test_unknown_handles(tmp_path):
+    store = SpillStore(tmp_path)
+    assert store.read("0" * 32, 0, 10) is None
+    assert store.read("../../etc/passwd", 0, 10) is None
+    assert store.read("", 0, 10) is None
+
+
+def test_expired_handle(tmp_path):
+    store = SpillStore(tmp_path, max_age=60)
+    handle = store.spill(b"old response")
+    path = store.path_for(handle)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert store.read(handle, 0, 10) is None
+    store.evict()
+    assert not path.exists()
+
+
+def test_eviction_by_total_size(tmp_path):
+    store = SpillStore(tmp_path, max_bytes=250)
+    first = store.spill(b"a" * 100)
+    second = store.spill(b"b" * 100)
+    old = time.time() - 30
+    os.utime(store.path_for(second), (old, old))
+    # Reading refreshes the first response, so the second is evicted
+    store.read(first, 0, 10)
+    store.spill(b"c" * 100)
+    assert store.read(first, 0, 1) == (b"a", 100)
+    assert store.read(second, 0, 1) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_shared_directory_is_refused(tmp_path):
+    store = SpillStore(tmp_path)
+    handle = store.spill(TEXT.encode("utf-8"))
+    tmp_path.chmod(0o777)
+    assert store.read(handle, 0, 10) is None
+    with pytest.raises(PermissionError):
+        store.spill(b"private")
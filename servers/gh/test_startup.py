@@ -0,0 +1,39 @@
+"""
+Tests for the startup benchmark.
+"""
+
+import sys
+
+import pytest
+
+from servers.gh.startup import measure_session
+
+
+# Minimal MCP server answering initialize and tools/list over stdio
+FAKE_SERVER = r"""
+import json, sys
+for line in sys.stdin:
+    message = json.loads(line)
+    if message.get("method") == "initialize":
+        result = {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "serverInfo": {"name": "fake", "version": "1"},
+        }
+    elif message.get("method") == "tools/list":
+        result = {"tools": [{"name": "a", "inputSchema": {}}, {"name": "b", "inputSchema": {}}]}
+    else:
+        continue
+    print(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}), flush=True)
+"""
+
+
+def test_measure_session():
+    session = measure_session([sys.executable, "-c", FAKE_SERVER])
+    assert session["tools"] == 2
+    assert 0 < session["initialize_ms"] <= session["list_tools_ms"]
+
+
+def test_server_crash_is_reported():
+    with pytest.raises(RuntimeError, match="boom"):
+        measure_session([sys.executable, "-c", "import sys; sys.exit('boom')"])
@@ -0,0 +1,167 @@
+"""
+Tests for incremental listing of changed issues and pull requests.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from servers.gh.sync import (
+    ISSUE,
+    PULL_REQUEST,
+    SyncError,
+    SyncState,
+    Watermark,
+    changes_endpoint,
+    export_item,
+    list_changes,
+    parse_since,
+    unsupported_fields,
+)
+
+
+def issue(number, updated, pull=False, merged=False):
+    item = {
+        "number": number,
+        "title": f"#{number}",
+        "state": "closed" if merged else "open",
+        "html_url": f"https://github.com/o/r/issues/{number}",
+        "user": {"login": "octo", "node_id": "U1", "type": "User"},
+        "assignees": [{"login": "hubot", "node_id": "U2", "type": "User"}],
+        "labels": [{"node_id": "L1", "name": "bug", "color": "f00", "description": None}],
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": f"2024-01-01T00:00:{updated:02d}Z",
+    }
+    if pull:
+        item["pull_request"] = {"merged_at": "2024-01-02T00:00:00Z" if merged else None}
+    return item
+
+
+class FakeApi:
+    """Serves the issues endpoint from a list sorted by update time, two items per page."""
+
+    def __init__(self, items):
+        self.items = items
+        self.urls = []
+
+    async def __call__(self, args, input_data=None):
+        url = args[-1]
+        self.urls.append(url)
+        query = parse_qs(urlsplit(url).query)
+        since = query.get("since", [""])[0]
+        page = int(query.get("page", ["1"])[0])
+        matching = [item for item in self.items if item["updated_at"] >= since]
+        body = matching[2 * (page - 1):2 * page]
+        headers = "HTTP/2.0 200 OK\r\n"
+        if len(matching) > 2 * page:
+            headers += f'Link: <repos/o/r/issues?since={since}&page={page + 1}>; rel="next"\r\n'
+        return {
+            "stdout": headers + "\r\n" + json.dumps(body),
+            "stderr": "",
+            "returncode": 0,
+            "success": True
+        }
+
+
+def numbers(items):
+    return [item["number"] for item in items]
+
+
+def test_parse_since():
+    assert parse_since("last") is None
+    assert parse_since(True) is None
+    assert parse_since("2024-05-01T10:00:00Z") == "2024-05-01T10:00:00Z"
+    assert parse_since("2024-05-01T12:00:00+02:00") == "2024-05-01T10:00:00Z"
+    assert parse_since("2024-05-01") == "2024-05-01T00:00:00Z"
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
+
+
+def test_endpoint_asks_for_changes_oldest_first():
+    endpoint = changes_endpoint(
+        "o/r", "2024-01-01T00:00:00Z", "merged", {"creator": "me", "labels": None}
+    )
+    query = parse_qs(urlsplit(endpoint).query)
+    assert query == {
+        "state": ["closed"], "sort": ["updated"], "direction": ["asc"], "per_page": ["100"],
+        "since": ["2024-01-01T00:00:00Z"], "creator": ["me"],
+    }
+
+
+def test_sync_returns_only_changes():
+    api = FakeApi([issue(1, 1), issue(2, 2, pull=True), issue(3, 3), issue(4, 3)])
+    items, watermark, complete = asyncio.run(list_changes(api, ISSUE, "o/r", None, limit=100))
+    assert numbers(items) == [1, 3, 4]
+    assert complete
+    assert (watermark.updated_at, watermark.numbers) == ("2024-01-01T00:00:03Z", {3, 4})
+
+    # Nothing changed: the items at the inclusive boundary are not returned again
+    items, watermark, _ = asyncio.run(list_changes(api, ISSUE, "o/r", watermark, limit=100))
+    assert items == []
+    assert watermark.updated_at == "2024-01-01T00:00:03Z"
+
+    api.items.append(issue(1, 5))
+    items, watermark, _ = asyncio.run(list_changes(api, ISSUE, "o/r", watermark, limit=100))
+    assert numbers(items) == [1]
+    assert any("since=2024-01-01T00%3A00%3A03Z" in url for url in api.urls)
+
+
+def test_sync_resumes_after_limit():
+    api = FakeApi([issue(n, n) for n in range(1, 6)])
+    seen = []
+    watermark = None
+    complete = False
+    while not complete:
+        items, watermark, complete = asyncio.run(
+            list_changes(api, ISSUE, "o/r", watermark, limit=2)
+        )
+        seen.extend(numbers(items))
+    assert seen == [1, 2, 3, 4, 5]
+
+
+def test_pull_requests_and_merged_state():
+    api = FakeApi([issue(1, 1), issue(2, 2, pull=True), issue(3, 3, pull=True, merged=True)])
+    items, _, _ = asyncio.run(
+        list_changes(api, PULL_REQUEST, "o/r", None, limit=10, state="merged")
+    )
+    assert numbers(items) == [3]
+    exported = export_item(
+        PULL_REQUEST, items[0], ["number", "state", "author", "assignees", "mergedAt", "labels"]
+    )
+    assert exported == {
+        "number": 3,
+        "state": "MERGED",
+        "author": {"id": "U1", "is_bot": False, "login": "octo", "name": ""},
+        "assignees": [{"id": "U2", "login": "hubot", "name": ""}],
+        "mergedAt": "2024-01-02T00:00:00Z",
+        "labels": [{"id": "L1", "name": "bug", "description": "", "color": "f00"}],
+    }
+    assert unsupported_fields(ISSUE, ["title", "comments", "mergedAt"]) == ["comments", "mergedAt"]
+    bot = dict(items[0], user={"login": "dependabot[bot]", "node_id": "B1", "type": "Bot"})
+    assert export_item(PULL_REQUEST, bot, ["author"]) == {
+        "author": {"is_bot": True, "login": "app/dependabot"}
+    }
+
+
+def test_api_errors():
+    async def failing(args, input_data=None):
+        return {
+            "stdout": "HTTP/2.0 404 Not Found\r\n\r\n",
+            "stderr": "HTTP 404: Not Found",
+            "returncode": 1,
+            "success": False
+        }
+
+    with pytest.raises(SyncError, match="404"):
+        asyncio.run(list_changes(failing, ISSUE, "o/missing", None, limit=10))
+
+
+def test_state_keeps_recent_watermarks():
+    state = SyncState(max_entries=2)
+    for key in "abc":
+        state.set(key, Watermark("2024-01-01T00:00:00Z"))
+    assert state.get("a") is None
+    assert state.get("c") is not None
+    assert state.stats()["watermarks"] == 2